@@ -0,0 +1,196 @@
+"""
+Waiting room admission policy for the Zoom meeting tracker API.
+
+Instead of "Admit All", /cmd_admit can admit only the people who are expected:
+
+1. Staff (names starting with "@" or "#", see rename/README.md) are admitted.
+2. Names on the registration list are admitted. Names are compared normalized (no accents,
+   case, emoji or punctuation, see search.normalize()) and with their words sorted, so
+   "DOE, Jane" matches "Jane Doe". Both are set lookups.
+3. Otherwise the closest registered names are found with the trigram index, and a name
+   whose trigrams overlap one of them by at least `fuzzy_threshold` (Jaccard) is admitted,
+   which covers typos and small spelling differences.
+4. Everyone else is held for the host to check.
+
+The registration list is a text file with one name per line; empty lines and lines
+starting with "#" are skipped. Lists uploaded through the API are saved in the database,
+so they survive restarts and every backend worker uses the latest one.
+"""
+
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from breakout_planner import is_staff
+from search import NameIndex, normalize, trigrams
+
+
+def word_key(normalized):
+    """Return a normalized name with its words sorted, for word order insensitive lookup"""
+    return " ".join(sorted(normalized.split()))
+
+
+def similarity(a, b):
+    """Return the Jaccard similarity of the trigrams of two normalized names"""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def parse_admitted(reply):
+    """Return the names a `zoom-manage admit <names>` command admitted
+
+    Args:
+        reply (str): Its output, with a "<n> of <m> admitted" line followed by the names
+            admitted, separated by tabs.
+    """
+    match = re.search(r"^\d+ of \d+ admitted((?:\t[^\t\n]*)*)$", reply, re.MULTILINE)
+    if match is None:
+        return []  # e.g. "Nobody is waiting"
+    return match.group(1).split("\t")[1:]
+
+
+def read_registrations(path):
+    """Return the names in a registration file"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+REGISTRATIONS_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS registration_lists (
+        list_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        saved TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS registrations (
+        list_id INTEGER NOT NULL,
+        name TEXT NOT NULL
+    )
+    """,
+)
+
+
+def init_registrations(conn):
+    """Create the registration tables if they do not exist"""
+    for statement in REGISTRATIONS_SCHEMA:
+        conn.execute(statement)
+
+
+def save_registrations(database, names):
+    """Save a registration list, replacing the previous one, and return its id"""
+    with sqlite3.connect(database) as conn:
+        cursor = conn.execute(
+            "INSERT INTO registration_lists (saved) VALUES (?)",
+            (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),),
+        )
+        list_id = cursor.lastrowid
+        conn.execute("DELETE FROM registrations WHERE list_id < ?", (list_id,))
+        conn.executemany(
+            "INSERT INTO registrations (list_id, name) VALUES (?, ?)",
+            [(list_id, name) for name in names],
+        )
+    return list_id
+
+
+def latest_registrations(database):
+    """Return the id of the latest saved registration list, or None"""
+    with sqlite3.connect(database) as conn:
+        (list_id,) = conn.execute(
+            "SELECT MAX(list_id) FROM registration_lists"
+        ).fetchone()
+    return list_id
+
+
+def load_registrations(database, list_id):
+    """Return the names of a saved registration list"""
+    with sqlite3.connect(database) as conn:
+        names = conn.execute(
+            "SELECT name FROM registrations WHERE list_id = ? ORDER BY rowid",
+            (list_id,),
+        ).fetchall()
+    return [name for (name,) in names]
+
+
+class AdmitPolicy:
+    """Decide who to admit from the waiting room"""
+
+    def __init__(self, names=(), fuzzy_threshold=0.6):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.list_id = None  # the saved registration list in use, if any
+        self._lock = threading.Lock()
+        self.load(names)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._exact)
+
+    def load(self, names):
+        """Replace the registration list"""
+        exact = {}  # normalized name -> registered name
+        words = {}  # normalized name with sorted words -> registered name
+        index = NameIndex()
+        for name in names:
+            normalized = normalize(name)
+            if not normalized:
+                continue
+            exact.setdefault(normalized, name)
+            words.setdefault(word_key(normalized), name)
+            index.add(name, "registered")
+        with self._lock:
+            self._exact, self._words, self._index = exact, words, index
+            # Held names are decided again on every admit, so remember the answers
+            self._decisions = {}
+
+    def decide(self, name):
+        """Return (admit, reason, registered name or None) for a waiting name"""
+        with self._lock:
+            decisions = self._decisions
+        if name not in decisions:
+            decisions[name] = self._decide(name)
+        return decisions[name]
+
+    def _decide(self, name):
+        if is_staff(name):
+            return True, "staff", None
+        normalized = normalize(name)
+        with self._lock:
+            exact, words, index = self._exact, self._words, self._index
+        if normalized in exact:
+            return True, "registered", exact[normalized]
+        if word_key(normalized) in words:
+            return True, "registered", words[word_key(normalized)]
+        best, best_score = None, 0.0
+        for candidate, _, _ in index.search(name, limit=3):
+            score = similarity(normalized, normalize(candidate))
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is not None and best_score >= self.fuzzy_threshold:
+            return True, f"similar ({best_score:.2f})", best
+        return False, "not registered", best
+
+    def plan(self, waiting, batch_size=50):
+        """Split the waiting names into batches to admit and names to hold
+
+        Args:
+            waiting (List[str]): The names in the waiting room, in arrival order.
+            batch_size (int): Most names per zoom-manage admit command.
+
+        Returns:
+            Tuple[List[List[str]], List[dict]]: The admit batches, and a decision
+            ({"name", "admit", "reason", "match"}) for every waiting name.
+        """
+        decisions = []
+        admit = []
+        for name in waiting:
+            allowed, reason, match = self.decide(name)
+            decisions.append(
+                {"name": name, "admit": allowed, "reason": reason, "match": match}
+            )
+            if allowed:
+                admit.append(name)
+        batches = [admit[i : i + batch_size] for i in range(0, len(admit), batch_size)]
+        return batches, decisions
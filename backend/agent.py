@@ -0,0 +1,121 @@
+"""
+Client for a running `zoom-manage agent`.
+
+Starting zoom-manage with osascript for every dashboard action repeats its setup (reading
+the environment, finding Zoom and the participants window, loading rename mappings).
+`zoom-manage agent` does that once and then serves commands over two named pipes in the
+logs/ directory, because AppleScript has no socket API:
+
+- `agent.in`: requests, one line of tab separated fields "<id> <command> [args...]"
+- `agent.out`: replies, one line "<id> <status> <message>", status 0 on success
+- `agent.pid`: the process id of the agent
+
+When no agent is running, AgentClient.run() raises AgentUnavailable so the caller can
+fall back to starting zoom-manage. Commands are serialized with a lock on `agent.lock`,
+so backend worker processes never read each other's replies.
+"""
+
+import errno
+import fcntl
+import itertools
+import os
+import threading
+import time
+
+
+class AgentUnavailable(Exception):
+    """No zoom-manage agent is running"""
+
+
+class AgentClient:
+    """Send commands to `zoom-manage agent` one at a time"""
+
+    def __init__(self, directory, timeout=300, poll_interval=0.05):
+        self.request_path = os.path.join(directory, "agent.in")
+        self.reply_path = os.path.join(directory, "agent.out")
+        self.pid_path = os.path.join(directory, "agent.pid")
+        self.lock_path = os.path.join(directory, "agent.lock")
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def running(self):
+        """Return True if the agent process in agent.pid is alive"""
+        try:
+            with open(self.pid_path) as f:
+                pid = int(f.read().strip())
+            os.kill(pid, 0)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def run(self, *argv):
+        """Run a zoom-manage command in the agent and wait for it to finish.
+
+        Args:
+            *argv (str): The command and its arguments, e.g. "roster".
+
+        Returns:
+            Tuple[int, str]: (status, message) where status 0 means success.
+
+        Raises:
+            AgentUnavailable: If no agent is running.
+            TimeoutError: If the agent did not reply within `timeout` seconds.
+        """
+        if not self.running():
+            raise AgentUnavailable(f"No agent process in {self.pid_path}")
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)  # released when the file is closed
+            request_id = f"{os.getpid()}-{next(self._ids)}"
+            deadline = time.monotonic() + self.timeout
+            # Open the reply pipe first, so the agent never waits for a reader
+            try:
+                reply_fd = os.open(self.reply_path, os.O_RDONLY | os.O_NONBLOCK)
+            except FileNotFoundError as e:
+                raise AgentUnavailable(f"Missing {self.reply_path}") from e
+            try:
+                line = "\t".join((request_id, *argv)) + "\n"
+                self._send(line.encode(), deadline)
+                return self._receive(reply_fd, request_id, deadline)
+            finally:
+                os.close(reply_fd)
+
+    def _send(self, data, deadline):
+        # The agent only reads the request pipe between commands, so wait while it is busy
+        while True:
+            try:
+                request_fd = os.open(self.request_path, os.O_WRONLY | os.O_NONBLOCK)
+                break
+            except FileNotFoundError as e:
+                raise AgentUnavailable(f"Missing {self.request_path}") from e
+            except OSError as e:
+                if e.errno != errno.ENXIO:
+                    raise
+                if not self.running():
+                    raise AgentUnavailable("The agent exited") from e
+                if time.monotonic() > deadline:
+                    raise TimeoutError("The agent is busy") from e
+                time.sleep(self.poll_interval)
+        try:
+            os.write(request_fd, data)
+        finally:
+            os.close(request_fd)
+
+    def _receive(self, reply_fd, request_id, deadline):
+        buffer = b""
+        while time.monotonic() < deadline:
+            try:
+                chunk = os.read(reply_fd, 4096)
+            except BlockingIOError:
+                chunk = b""
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                fields = line.decode(errors="replace").split("\t", 2)
+                # Skip replies to earlier requests that timed out
+                if len(fields) == 3 and fields[0] == request_id:
+                    return int(fields[1]), fields[2]
+            if not chunk:
+                time.sleep(self.poll_interval)
+        raise TimeoutError(f"No reply from the agent for request {request_id}")
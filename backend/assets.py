@@ -0,0 +1,169 @@
+"""
+Dashboard and static assets served by the Zoom meeting tracker API.
+
+The dashboard (frontend/index.html) is served at `/`, so opening it is one local round
+trip. Its libraries are loaded from cdn.jsdelivr.net unless they were vendored into
+frontend/vendor/ (see tools/vendor_assets.py), in which case the page points at the local
+copies and works offline.
+
+Every other file is served at `/static/<name>.<hash><ext>`, with a content hash in the
+name, so it can be cached for a year: a changed file gets a new name, and the page (which
+is never cached without revalidation) points at it. Files are read, hashed and compressed
+with gzip (and brotli, when the `brotli` package is installed) once at startup, and every
+response carries an ETag, so a revalidation is answered with an empty 304.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is enough for every browser
+    brotli = None
+
+CDN_URL = re.compile(r'(?:src|href)="(https://cdn\.jsdelivr\.net/npm/[^"]+)"')
+LOCAL_URL = re.compile(r'((?:src|href)=")\./([^"/]+)"')
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def vendor_name(url):
+    """Return the file name in frontend/vendor/ for a CDN URL
+
+    For example, https://cdn.jsdelivr.net/npm/vue@2.6.14/dist/vue.js is vue@2.6.14-vue.js.
+    """
+    package = url.split("/npm/", 1)[1].split("/", 1)[0]
+    return f"{package}-{url.rsplit('/', 1)[1]}"
+
+
+def cdn_urls(html):
+    """Return the CDN URLs a page loads, leaving out commented-out ones"""
+    html = re.sub(r"<!--.*?-->", "", html, flags=re.DOTALL)
+    return list(dict.fromkeys(CDN_URL.findall(html)))
+
+
+def accepted_encodings(header):
+    """Return the content codings an Accept-Encoding header allows"""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        quality = params.strip().removeprefix("q=")
+        if quality and quality.strip("0.") == "":
+            continue  # q=0 means "not acceptable"
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class Asset:
+    """One file, with its precompressed variants and validators"""
+
+    __slots__ = ("body", "encoded", "digest", "media_type", "cache_control")
+
+    # Compressed once per file, so spend the time on the smallest result
+    GZIP_LEVEL = 9
+    BROTLI_QUALITY = 11
+
+    def __init__(self, body, media_type, cache_control):
+        self.body = body
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.encoded = {}  # content coding -> body, only when smaller
+        if media_type.startswith(COMPRESSIBLE):
+            variants = {"gzip": gzip.compress(body, self.GZIP_LEVEL, mtime=0)}
+            if brotli is not None:
+                variants["br"] = brotli.compress(body, quality=self.BROTLI_QUALITY)
+            for coding, data in variants.items():
+                if len(data) < len(body):
+                    self.encoded[coding] = data
+
+    def response(self, headers):
+        """Return the response for a request with these headers
+
+        Args:
+            headers (Mapping[str, str]): The request headers.
+        """
+        accepted = accepted_encodings(headers.get("accept-encoding", ""))
+        coding = next(
+            (c for c in ("br", "gzip") if c in self.encoded and c in accepted), None
+        )
+        etag = f'"{self.digest}-{coding}"' if coding else f'"{self.digest}"'
+        response_headers = {
+            "ETag": etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = headers.get("if-none-match", "")
+        if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=response_headers)
+        if coding:
+            response_headers["Content-Encoding"] = coding
+        return Response(
+            self.encoded.get(coding, self.body),
+            media_type=self.media_type,
+            headers=response_headers,
+        )
+
+
+class AssetStore:
+    """The dashboard page and the files it loads, ready to serve"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index = None
+        self.vendored = []  # CDN URLs the page loads from frontend/vendor/ instead
+        self._assets = {}  # hashed name -> Asset
+
+    def load(self):
+        """Read, hash and compress the files in the frontend directory
+
+        Returns:
+            int: The number of static files.
+        """
+        assets, urls = {}, {}
+        vendor = os.path.join(self.directory, "vendor")
+        for folder in (self.directory, vendor):
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                path = os.path.join(folder, name)
+                if not os.path.isfile(path) or name.endswith((".html", ".py", ".md")):
+                    continue
+                with open(path, "rb") as f:
+                    body = f.read()
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                if media_type.startswith("text/"):
+                    media_type += "; charset=utf-8"
+                asset = Asset(body, media_type, IMMUTABLE)
+                stem, ext = os.path.splitext(name)
+                hashed = f"{stem}.{asset.digest[:10]}{ext}"
+                assets[hashed] = asset
+                urls[os.path.relpath(path, self.directory)] = f"/static/{hashed}"
+        index_path = os.path.join(self.directory, "index.html")
+        index, vendored = None, []
+        if os.path.isfile(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                html = f.read()
+            for url in cdn_urls(html):
+                local = urls.get(os.path.join("vendor", vendor_name(url)))
+                if local:
+                    html = html.replace(f'"{url}"', f'"{local}"')
+                    vendored.append(url)
+            html = LOCAL_URL.sub(
+                lambda m: f'{m.group(1)}{urls.get(m.group(2), "./" + m.group(2))}"',
+                html,
+            )
+            index = Asset(html.encode(), "text/html; charset=utf-8", REVALIDATE)
+        self._assets, self.index, self.vendored = assets, index, vendored
+        return len(assets)
+
+    def get(self, name):
+        """Return the Asset for a hashed name, or None"""
+        return self._assets.get(name)
@@ -0,0 +1,196 @@
+"""
+Breakout room planner for the Zoom meeting tracker API.
+
+Assigns the joined participants to breakout rooms in a single greedy pass:
+
+1. Staff (names starting with "@" or "#", see rename/README.md) are spread across the
+   rooms first, so every room gets its share.
+2. Keep-together groups are placed next, largest first.
+3. Everyone else fills the smallest room that has space.
+
+Each placement avoids rooms holding someone the participant already shared a room with in
+an earlier round. Rooms are kept in a min-heap by size, and only the rooms of previous
+roommates are checked for repeats, so a plan costs O(n log rooms) plus the size of the
+history of each participant.
+"""
+
+import heapq
+import math
+import sqlite3
+from collections import defaultdict
+
+STAFF_PREFIXES = ("@", "#")
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS breakout_plans (
+        round INTEGER NOT NULL,
+        room TEXT NOT NULL,
+        name TEXT NOT NULL,
+        PRIMARY KEY (round, name)
+    )
+"""
+
+
+def is_staff(name, prefixes=STAFF_PREFIXES):
+    """Return True if the name follows the staff renaming convention"""
+    return name.startswith(prefixes)
+
+
+def met_pairs(history):
+    """Return {name: set of names} of everyone who shared a room in earlier rounds
+
+    Args:
+        history (Iterable[Iterable[Iterable[str]]]): Earlier rounds, each a list of rooms,
+            each a list of names.
+    """
+    met = defaultdict(set)
+    for rounds in history:
+        for room in rounds:
+            room = list(room)
+            for name in room:
+                met[name].update(room)
+    for name, others in met.items():
+        others.discard(name)
+    return met
+
+
+def plan_rooms(names, rooms, capacity=None, groups=(), history=()):
+    """Assign participants to breakout rooms.
+
+    Args:
+        names (List[str]): The participants to assign, e.g. the joined roster.
+        rooms (List[str]): Room names; the plan has one entry per room.
+        capacity (int): Most participants per room. Defaults to an even split.
+        groups (List[List[str]]): Participants to keep in the same room. Names that are
+            not in `names` are ignored.
+        history (List[List[List[str]]]): Earlier rounds, see met_pairs().
+
+    Returns:
+        Tuple[Dict[str, List[str]], int]: The participants per room, in the order of
+            `rooms`, and the number of pairs who share a room again.
+
+    Raises:
+        ValueError: If there are no rooms, or the participants or a group do not fit.
+    """
+    if not rooms:
+        raise ValueError("At least one room is needed")
+    names = list(dict.fromkeys(names))
+    if capacity is None:
+        capacity = max(1, math.ceil(len(names) / len(rooms)))
+    if capacity * len(rooms) < len(names):
+        raise ValueError(
+            f"{len(names)} participants do not fit in {len(rooms)} rooms of {capacity}"
+        )
+
+    # Build the units to place: keep-together groups, then single participants
+    present = set(names)
+    grouped = set()
+    units = []
+    for group in groups:
+        unit = [name for name in dict.fromkeys(group) if name in present - grouped]
+        if len(unit) > capacity:
+            raise ValueError(f"Group of {len(unit)} is larger than {capacity}: {unit}")
+        if unit:
+            grouped.update(unit)
+            units.append(unit)
+    units.extend([name] for name in names if name not in grouped)
+
+    def order(unit):
+        # Staff first, then larger groups first, keeping the roster order otherwise
+        return (not any(is_staff(name) for name in unit), -len(unit))
+
+    units.sort(key=order)
+
+    met = met_pairs(history)
+    members = [[] for _ in rooms]
+    room_of = {}
+    heap = [(0, index) for index in range(len(rooms))]
+    repeats = 0
+
+    for unit in units:
+        conflicts = defaultdict(int)
+        for name in unit:
+            for other in met.get(name, ()):
+                if other in room_of:
+                    conflicts[room_of[other]] += 1
+        index = _pick_room(heap, members, conflicts, capacity - len(unit))
+        if index is None:
+            raise ValueError(f"No room has space for {unit}")
+        repeats += conflicts.get(index, 0)
+        members[index].extend(unit)
+        for name in unit:
+            room_of[name] = index
+        heapq.heappush(heap, (len(members[index]), index))
+
+    return dict(zip(rooms, members)), repeats
+
+
+def _pick_room(heap, members, conflicts, max_size):
+    """Pop and return the smallest room without conflicts, else the least conflicted one.
+
+    Heap entries are (size, index) and go stale when a room grows; the caller pushes the
+    room back with its new size.
+    """
+    skipped = []
+    chosen = None
+    while heap:
+        size, index = heapq.heappop(heap)
+        if size != len(members[index]) or size > max_size:
+            # Stale entry, or a full room that will never have space for this unit
+            if size == len(members[index]):
+                skipped.append((size, index))
+            continue
+        if index not in conflicts:
+            chosen = index
+            break
+        skipped.append((size, index))
+    if chosen is None:
+        candidates = [index for index in conflicts if len(members[index]) <= max_size]
+        if candidates:
+            chosen = min(candidates, key=lambda i: (conflicts[i], len(members[i]), i))
+            skipped = [entry for entry in skipped if entry[1] != chosen]
+    for entry in skipped:
+        heapq.heappush(heap, entry)
+    return chosen
+
+
+def plan_text(plan):
+    """Format a plan for `zoom-manage breakout assign`, one "Room->Participant" per line
+
+    Lines starting with "#" are escaped with a backslash, as in the breakout and rename
+    files.
+    """
+    lines = []
+    for room, names in plan.items():
+        for name in names:
+            line = f"{room}->{name}"
+            lines.append("\\" + line if line.startswith("#") else line)
+    return "\n".join(lines) + "\n"
+
+
+def init_breakout(conn):
+    """Create the breakout plan table if it does not exist"""
+    conn.execute(SCHEMA)
+
+
+def save_round(database, plan):
+    """Store a plan as the next round and return its number"""
+    with sqlite3.connect(database) as conn:
+        (last,) = conn.execute("SELECT MAX(round) FROM breakout_plans").fetchone()
+        number = (last or 0) + 1
+        conn.executemany(
+            "INSERT INTO breakout_plans (round, room, name) VALUES (?, ?, ?)",
+            [(number, room, name) for room, names in plan.items() for name in names],
+        )
+    return number
+
+
+def load_rounds(database):
+    """Return the stored rounds, oldest first, as {round: {room: [names]}}"""
+    rounds = {}
+    with sqlite3.connect(database) as conn:
+        for number, room, name in conn.execute(
+            "SELECT round, room, name FROM breakout_plans ORDER BY round, rowid"
+        ):
+            rounds.setdefault(number, {}).setdefault(room, []).append(name)
+    return rounds
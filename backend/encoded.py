@@ -0,0 +1,87 @@
+"""
+Pre-encoded JSON responses for the Zoom meeting tracker API.
+
+Every open dashboard tab polls /waiting and /joined, and each poll used to build the
+roster dict again and encode it again, uncompressed. EncodedCache keeps the encoded bytes
+of each response, with gzip (and brotli) variants, together with the roster version they
+were made from. Readers get the cached bytes until the roster changes, so a roster of
+thousands of participants is encoded and compressed once per change, not once per poll.
+Responses carry an ETag, so a tab polling an unchanged roster gets an empty 304.
+
+The JSON is encoded with orjson when it is installed, and with the standard library
+otherwise; both give the same compact output as FastAPI's JSONResponse.
+"""
+
+import json
+import threading
+
+from assets import Asset
+from metrics import REGISTRY, timed
+
+try:
+    import orjson
+except ImportError:  # optional: only faster
+    orjson = None
+
+ENCODED_READS = REGISTRY.counter(
+    "zoom_opm_encoded_reads_total",
+    "Reads of pre-encoded responses, by whether the cached bytes were current",
+    ("result",),
+)
+ENCODE_SECONDS = REGISTRY.histogram(
+    "zoom_opm_encode_seconds", "Time spent encoding and compressing a cached response"
+)
+
+
+def encode_json(content):
+    """Return `content` as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+class EncodedResponse(Asset):
+    """An encoded JSON body with its compressed variants"""
+
+    __slots__ = ()
+
+    # Compressed on the request path after every change, so favor speed
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 4
+
+    def __init__(self, body):
+        super().__init__(body, "application/json", "no-cache")
+
+
+class EncodedCache:
+    """Encoded responses by key, made again when their version changes"""
+
+    def __init__(self, render):
+        """
+        Args:
+            render (callable): Returns the content to encode for a key.
+        """
+        self.render = render
+        self._lock = threading.Lock()
+        self._cache = {}  # key -> (version, EncodedResponse)
+
+    def get(self, key, version):
+        """Return the EncodedResponse for `key` as of `version`"""
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            ENCODED_READS.inc("hit")
+            return cached[1]
+        # One reader encodes; the others wait for it instead of doing the same work
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                ENCODED_READS.inc("hit")
+                return cached[1]
+            ENCODED_READS.inc("miss")
+            content = self.render(key)
+            with timed(ENCODE_SECONDS):
+                response = EncodedResponse(encode_json(content))
+            self._cache[key] = (version, response)
+            return response
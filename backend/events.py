@@ -0,0 +1,242 @@
+"""
+Role change event lifecycle for the Zoom meeting tracker API.
+
+The roster appends a row to `events` for every host/co-host change, and /reset never
+drops that table, so during long programs it grows without bound, and so does every
+backup. This module keeps it small:
+
+- Compaction: settled events (older than `settle` seconds) are folded into `role_changes`,
+  one row per burst of changes to a participant with no gap longer than `window` seconds.
+  The row keeps the role before and after the burst and the number of changes, so a
+  host flip-flopping ten times in a minute becomes one row.
+- Archival: /reset writes the meeting's role changes and remaining events to a gzip
+  compressed JSON lines file next to the database backup, and removes them from the live
+  database.
+- Incremental vacuum: the database uses auto_vacuum=INCREMENTAL, and the maintenance
+  thread returns freed pages to the file system a few at a time, so the live database
+  and its backups stay small without a blocking VACUUM.
+"""
+
+import gzip
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from metrics import REGISTRY, timed
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+COMPACTED = REGISTRY.counter(
+    "zoom_opm_events_compacted_total", "Role change events folded into bursts"
+)
+MAINTENANCE_SECONDS = REGISTRY.histogram(
+    "zoom_opm_events_maintenance_seconds",
+    "Time spent compacting events and vacuuming",
+    ("step",),
+)
+FREE_PAGES = REGISTRY.gauge(
+    "zoom_opm_db_free_pages", "Unused database pages left after incremental vacuum"
+)
+
+ROLE_CHANGES_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS role_changes (
+        name TEXT NOT NULL,
+        first_seen TEXT NOT NULL,
+        last_seen TEXT NOT NULL,
+        old_role TEXT,
+        new_role TEXT,
+        changes INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS role_changes_name ON role_changes (name, last_seen)",
+)
+
+
+def init_events(conn):
+    """Create the role_changes table if it does not exist"""
+    for statement in ROLE_CHANGES_SCHEMA:
+        conn.execute(statement)
+
+
+def enable_incremental_vacuum(conn):
+    """Switch the database to auto_vacuum=INCREMENTAL
+
+    A new database only needs the pragma. An existing one is rebuilt with VACUUM once,
+    which needs exclusive access; if another connection is busy it is retried on the
+    next start.
+    """
+    (mode,) = conn.execute("PRAGMA auto_vacuum").fetchone()
+    if mode == 2:
+        return
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    try:
+        conn.execute("VACUUM")
+    except sqlite3.OperationalError as e:
+        logging.getLogger(__name__).warning("Cannot enable incremental vacuum: %s", e)
+
+
+def _parse(timestamp):
+    return datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+
+
+def compact_events(database, window=60, settle=300, now=None):
+    """Fold settled events into role_changes bursts and delete them from events
+
+    A burst continues the participant's latest role_changes row if it started less than
+    `window` seconds after that row ended.
+
+    Returns:
+        int: The number of events folded.
+    """
+    cutoff = ((now or datetime.now()) - timedelta(seconds=settle)).strftime(
+        TIMESTAMP_FORMAT
+    )
+    with sqlite3.connect(database) as conn:
+        # Several backend workers may compact at once; only one reads and deletes
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT event_id, name, timestamp, old_role, new_role FROM events "
+            "WHERE timestamp < ? ORDER BY name, timestamp, event_id",
+            (cutoff,),
+        ).fetchall()
+        if not rows:
+            return 0
+        for name, events in groupby(rows, key=lambda row: row[1]):
+            # [rowid or None, name, first_seen, last_seen, old_role, new_role, changes]
+            burst = conn.execute(
+                "SELECT rowid, * FROM role_changes WHERE name = ? "
+                "ORDER BY last_seen DESC LIMIT 1",
+                (name,),
+            ).fetchone()
+            burst = list(burst) if burst else None
+            for _, _, timestamp, old_role, new_role in events:
+                if (
+                    burst is not None
+                    and (_parse(timestamp) - _parse(burst[3])).total_seconds() <= window
+                ):
+                    burst[3], burst[5], burst[6] = timestamp, new_role, burst[6] + 1
+                    continue
+                if burst is not None:
+                    _save_burst(conn, burst)
+                burst = [None, name, timestamp, timestamp, old_role, new_role, 1]
+            _save_burst(conn, burst)
+        conn.execute(
+            "DELETE FROM events WHERE event_id IN (%s)" % ",".join("?" * len(rows)),
+            [row[0] for row in rows],
+        )
+    COMPACTED.inc(amount=len(rows))
+    return len(rows)
+
+
+def _save_burst(conn, burst):
+    rowid, *values = burst
+    if rowid is None:
+        conn.execute("INSERT INTO role_changes VALUES (?, ?, ?, ?, ?, ?)", values)
+    else:
+        conn.execute(
+            "UPDATE role_changes SET last_seen = ?, new_role = ?, changes = ? "
+            "WHERE rowid = ?",
+            (values[2], values[4], values[5], rowid),
+        )
+
+
+def archive_events(database, path):
+    """Move the role changes and events to a gzip compressed JSON lines file
+
+    Returns:
+        int: The number of records archived; no file is written when there are none.
+    """
+    with sqlite3.connect(database) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        records = [
+            {
+                "type": "role_change",
+                "name": name,
+                "first_seen": first_seen,
+                "last_seen": last_seen,
+                "old_role": old_role,
+                "new_role": new_role,
+                "changes": changes,
+            }
+            for name, first_seen, last_seen, old_role, new_role, changes in conn.execute(
+                "SELECT * FROM role_changes ORDER BY first_seen, rowid"
+            )
+        ] + [
+            {
+                "type": "event",
+                "name": name,
+                "timestamp": timestamp,
+                "old_role": old_role,
+                "new_role": new_role,
+            }
+            for name, timestamp, old_role, new_role in conn.execute(
+                "SELECT name, timestamp, old_role, new_role FROM events "
+                "ORDER BY event_id"
+            )
+        ]
+        if not records:
+            return 0
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        conn.execute("DELETE FROM role_changes")
+        conn.execute("DELETE FROM events")
+    return len(records)
+
+
+def incremental_vacuum(database, pages=500):
+    """Release up to `pages` free pages and return how many remain free"""
+    with sqlite3.connect(database) as conn:
+        # execute() steps the pragma once, which frees one page; executescript()
+        # runs it to completion
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+        (free,) = conn.execute("PRAGMA freelist_count").fetchone()
+    FREE_PAGES.set(value=free)
+    return free
+
+
+class EventMaintenance:
+    """Background thread that compacts events and vacuums every `interval` seconds"""
+
+    def __init__(self, database, interval=60, window=60, settle=300, pages=500):
+        self.database = database
+        self.interval = interval
+        self.window = window
+        self.settle = settle
+        self.pages = pages
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """Compact settled events, then release free pages"""
+        with timed(MAINTENANCE_SECONDS, "compact"):
+            compact_events(self.database, self.window, self.settle)
+        with timed(MAINTENANCE_SECONDS, "vacuum"):
+            incremental_vacuum(self.database, self.pages)
+
+    def start(self):
+        """Start the maintenance thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="event-maintenance", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the maintenance thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        logger = logging.getLogger(__name__)
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                logger.warning("Event maintenance failed, will retry: %s", e)
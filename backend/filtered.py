@@ -0,0 +1,167 @@
+"""
+Filtered rosters (hands raised, camera on, no audio, ...) for the Zoom meeting tracker API.
+
+`zoom-manage` sends the participants matching a filter as one or more batches tagged with
+the filter name, a unique pass id and the time the pass started. Every batch upserts its
+names, so a participant keeps the first_seen of the pass where they first matched, and
+last_seen is the start of the latest pass that saw them. The last batch of a pass is
+marked complete, and participants last seen by a pass that started earlier are dropped,
+which keeps the current set per filter without rewriting it. A pass that overlaps another
+one (a command run while the agent sweeps) never drops what the other one saw. Reads use
+the (filter, first_seen) index, so "hands raised, in order of first seen" is a single
+indexed query.
+
+`zoom-manage scan` reads the roster and every filter in one sweep, and its participant
+records are split into the same per-filter batches by update_scan().
+"""
+
+import sqlite3
+from datetime import datetime
+
+from roster import parse_roles
+
+# Filter names match the zoom-manage commands that produce them
+FILTERS = ("hands", "camera_off", "camera_on", "phone", "no_audio", "muted", "unmuted")
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# zoom-manage formats dates as MM/DD/YYYY HH:MM:SS
+INPUT_FORMATS = (TIMESTAMP_FORMAT, "%m/%d/%Y %H:%M:%S")
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS filtered (
+        filter TEXT NOT NULL,
+        name TEXT NOT NULL,
+        first_seen TEXT NOT NULL,
+        last_seen TEXT NOT NULL,
+        pass_id TEXT NOT NULL,
+        PRIMARY KEY (filter, name)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS filtered_first_seen ON filtered (filter, first_seen)",
+)
+
+
+def init_filtered(conn):
+    """Create the filtered roster table and its index if they do not exist"""
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def normalize_timestamp(timestamp):
+    """Return `timestamp` in the database format, or now if it is empty.
+
+    Raises:
+        ValueError: If the timestamp is in neither of the accepted formats.
+    """
+    if not timestamp:
+        return datetime.now().strftime(TIMESTAMP_FORMAT)
+    for fmt in INPUT_FORMATS:
+        try:
+            return datetime.strptime(timestamp, fmt).strftime(TIMESTAMP_FORMAT)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized timestamp: {timestamp}")
+
+
+def update_filtered(database, filter_name, names, pass_id, timestamp, complete):
+    """Record one batch of a filtered roster pass.
+
+    Args:
+        database (str): Path to the SQLite database.
+        filter_name (str): One of FILTERS.
+        names (List[str]): Participants matching the filter in this batch.
+        pass_id (str): Identifies the pass the batch belongs to, unique per pass.
+        timestamp (str): When the pass started, already normalized.
+        complete (bool): True for the last batch of the pass.
+
+    Returns:
+        Tuple[int, int]: (names upserted, participants removed)
+    """
+    with sqlite3.connect(database) as conn:
+        return _record_batch(conn, filter_name, names, pass_id, timestamp, complete)
+
+
+def _record_batch(conn, filter_name, names, pass_id, timestamp, complete):
+    rows = [
+        (filter_name, parse_roles(name)[0], timestamp, timestamp, pass_id)
+        for name in names
+    ]
+    # A batch of a pass that started before the one that last saw the row arrives late
+    conn.executemany(
+        "INSERT INTO filtered (filter, name, first_seen, last_seen, pass_id) "
+        "VALUES (?, ?, ?, ?, ?) ON CONFLICT (filter, name) DO UPDATE SET "
+        "first_seen = min(first_seen, excluded.first_seen), "
+        "pass_id = CASE WHEN excluded.last_seen >= last_seen "
+        "THEN excluded.pass_id ELSE pass_id END, "
+        "last_seen = max(last_seen, excluded.last_seen)",
+        rows,
+    )
+    removed = 0
+    if complete:
+        # Rows of passes that started at the same time or later are theirs to drop
+        removed = conn.execute(
+            "DELETE FROM filtered WHERE filter = ? AND pass_id != ? AND last_seen < ?",
+            (filter_name, pass_id, timestamp),
+        ).rowcount
+    return len(rows), removed
+
+
+def filters_for(record):
+    """Return the filters that a participant record from `zoom-manage scan` matches
+
+    Args:
+        record (dict): With `hand` and `phone` booleans, `video` ("on", "off" or "")
+            and `audio` ("muted", "unmuted", "none" or "").
+    """
+    matched = []
+    if record.get("hand"):
+        matched.append("hands")
+    video = record.get("video")
+    if video == "on":
+        matched.append("camera_on")
+    elif video == "off":
+        matched.append("camera_off")
+    if record.get("phone"):
+        matched.append("phone")
+    audio = record.get("audio")
+    if audio == "none":
+        matched.append("no_audio")
+    elif audio in ("muted", "unmuted"):
+        matched.append(audio)
+    return matched
+
+
+def update_scan(database, records, pass_id, timestamp, complete):
+    """Record one batch of a scan pass into every filter in a single transaction.
+
+    Args:
+        database (str): Path to the SQLite database.
+        records (List[dict]): Participant records, see filters_for().
+        pass_id (str): Identifies the scan pass the batch belongs to, unique per pass.
+        timestamp (str): When the pass started, already normalized.
+        complete (bool): True for the last batch of the pass.
+
+    Returns:
+        dict: The number of participants in this batch per filter.
+    """
+    names = {filter_name: [] for filter_name in FILTERS}
+    for record in records:
+        for filter_name in filters_for(record):
+            names[filter_name].append(record["name"])
+    with sqlite3.connect(database) as conn:
+        for filter_name in FILTERS:
+            _record_batch(
+                conn, filter_name, names[filter_name], pass_id, timestamp, complete
+            )
+    return {filter_name: len(names[filter_name]) for filter_name in FILTERS}
+
+
+def get_filtered(database, filter_name):
+    """Return [(name, first_seen, last_seen)] for a filter, in order of first seen"""
+    with sqlite3.connect(database) as conn:
+        return conn.execute(
+            "SELECT name, first_seen, last_seen FROM filtered "
+            "WHERE filter = ? ORDER BY first_seen, rowid",
+            (filter_name,),
+        ).fetchall()
@@ -0,0 +1,290 @@
+"""
+Attendee history across meetings for the Zoom meeting tracker API.
+
+Every /reset archives the meeting database as zoom_meeting-YYYYMMDD-HHMMSS.db. This module
+ingests those archives into one history database, so "has this person attended before, and
+how long did they wait last time" is an indexed lookup instead of opening every backup.
+
+Archives are ingested once: each file is recorded with its size and modification time and
+skipped on later passes unless it changed. Names are folded into attendee identities:
+
+- role suffixes like " (Host, me)" are removed,
+- accents, case, emoji and punctuation are ignored, so "@Mickey Rooney" and
+  "mickey rooney 🌟" are the same person (see search.normalize()),
+- rename mappings (the ZOOM_RENAME_FILE format, see rename/README.md) link a name to the
+  name it was renamed from.
+"""
+
+import glob
+import os
+import sqlite3
+from datetime import datetime
+
+from roster import parse_roles
+from search import normalize
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id INTEGER PRIMARY KEY,
+        file TEXT NOT NULL UNIQUE,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        started TEXT,
+        ended TEXT,
+        attendees INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS identities (
+        key TEXT PRIMARY KEY,
+        attendee_id INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS attendee_names (
+        attendee_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        last_seen TEXT,
+        PRIMARY KEY (attendee_id, name)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS attendance (
+        attendee_id INTEGER NOT NULL,
+        session_id INTEGER NOT NULL,
+        waiting_first TEXT,
+        waiting_last TEXT,
+        joined_first TEXT,
+        joined_last TEXT,
+        host BOOLEAN DEFAULT 0,
+        co_host BOOLEAN DEFAULT 0,
+        PRIMARY KEY (attendee_id, session_id)
+    ) WITHOUT ROWID
+    """,
+)
+
+
+def load_renames(path):
+    """Read a rename mapping file into {identity key of new name: key of old name}
+
+    Lines look like "Old Name->New Name"; empty lines and "#" comments are skipped, and a
+    leading backslash is dropped, as in zoom-manage. A missing path gives no mappings.
+    """
+    renames = {}
+    if not path or not os.path.isfile(path):
+        return renames
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "->" not in line:
+                continue
+            old, new = line.lstrip("\\").split("->", 1)
+            if identity_key(old) and identity_key(new):
+                renames[identity_key(new)] = identity_key(old)
+    return renames
+
+
+def identity_key(name):
+    """Return the key that all spellings of a participant's name share"""
+    return normalize(parse_roles(name)[0])
+
+
+def wait_seconds(waiting_first, waiting_last, joined_first):
+    """Seconds from first seen waiting until admitted (or last seen waiting)"""
+    if not waiting_first:
+        return None
+    end = joined_first or waiting_last
+    waited = datetime.strptime(end, TIMESTAMP_FORMAT) - datetime.strptime(
+        waiting_first, TIMESTAMP_FORMAT
+    )
+    return max(0, int(waited.total_seconds()))
+
+
+def read_archive(path):
+    """Return the (name, status, first_seen, last_seen, host, co_host) rows of an archive"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute(
+            "SELECT name, status, first_seen, last_seen, host, co_host FROM participants"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []  # an archive taken before the first roster update
+    finally:
+        conn.close()
+
+
+class HistoryStore:
+    """History database of attendees across archived meetings"""
+
+    def __init__(self, database, renames=None):
+        self.database = database
+        self.renames = renames or {}
+
+    def init(self):
+        """Create the history tables if they do not exist"""
+        with sqlite3.connect(self.database) as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def resolve(self, name):
+        """Return the identity key of a name, following rename mappings"""
+        key = identity_key(name)
+        return self.renames.get(key, key)
+
+    def ingest(self, paths):
+        """Add archived meeting databases that are new or changed since the last ingest
+
+        Returns:
+            int: The number of archives ingested.
+        """
+        ingested = 0
+        with sqlite3.connect(self.database) as conn:
+            # Backend workers ingest at startup too; take the write lock before checking
+            conn.execute("BEGIN IMMEDIATE")
+            for path in paths:
+                stat = os.stat(path)
+                file = os.path.basename(path)
+                known = conn.execute(
+                    "SELECT session_id, size, mtime FROM sessions WHERE file = ?",
+                    (file,),
+                ).fetchone()
+                if known and known[1:] == (stat.st_size, stat.st_mtime):
+                    continue
+                if known:
+                    conn.execute(
+                        "DELETE FROM attendance WHERE session_id = ?", (known[0],)
+                    )
+                    conn.execute(
+                        "DELETE FROM sessions WHERE session_id = ?", (known[0],)
+                    )
+                self._ingest_rows(conn, file, stat, read_archive(path))
+                ingested += 1
+        return ingested
+
+    def ingest_archives(self, database):
+        """Ingest every archive of `database` (name-YYYYMMDD-HHMMSS.db), oldest first"""
+        base_name = database.rsplit(".", 1)[0]
+        paths = sorted(glob.glob(f"{glob.escape(base_name)}-????????-??????.db"))
+        return self.ingest(paths)
+
+    def _ingest_rows(self, conn, file, stat, rows):
+        """Fold one archive's participant rows into attendees and store the session"""
+        # attendee_id -> [waiting first/last, joined first/last, host, co_host]
+        attendance = {}
+        for name, status, first_seen, last_seen, host, co_host in rows:
+            attendee_id = self._attendee(conn, name, last_seen)
+            record = attendance.setdefault(attendee_id, [None, None, None, None, 0, 0])
+            offset = 0 if status == "waiting" else 2
+            if record[offset] is None or first_seen < record[offset]:
+                record[offset] = first_seen
+            if record[offset + 1] is None or last_seen > record[offset + 1]:
+                record[offset + 1] = last_seen
+            record[4] |= bool(host)
+            record[5] |= bool(co_host)
+        seen = [row[2] for row in rows] + [row[3] for row in rows]
+        cursor = conn.execute(
+            "INSERT INTO sessions (file, size, mtime, started, ended, attendees) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                file,
+                stat.st_size,
+                stat.st_mtime,
+                min(seen, default=None),
+                max(seen, default=None),
+                len(attendance),
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO attendance VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (attendee_id, cursor.lastrowid, *record)
+                for attendee_id, record in attendance.items()
+            ],
+        )
+
+    def _attendee(self, conn, name, last_seen):
+        """Return the attendee id for a name, creating the identity if it is new"""
+        key = self.resolve(name)
+        row = conn.execute(
+            "SELECT attendee_id FROM identities WHERE key = ?", (key,)
+        ).fetchone()
+        if row:
+            attendee_id = row[0]
+        else:
+            (last,) = conn.execute("SELECT MAX(attendee_id) FROM identities").fetchone()
+            attendee_id = (last or 0) + 1
+            conn.execute("INSERT INTO identities VALUES (?, ?)", (key, attendee_id))
+        conn.execute(
+            "INSERT INTO attendee_names VALUES (?, ?, ?) "
+            "ON CONFLICT (attendee_id, name) DO UPDATE SET "
+            "last_seen = MAX(last_seen, excluded.last_seen)",
+            (attendee_id, name, last_seen),
+        )
+        return attendee_id
+
+    def sessions(self):
+        """Return the ingested sessions, oldest first"""
+        with sqlite3.connect(self.database) as conn:
+            rows = conn.execute(
+                "SELECT file, started, ended, attendees FROM sessions "
+                "ORDER BY started, file"
+            ).fetchall()
+        return [
+            {"file": file, "started": started, "ended": ended, "attendees": attendees}
+            for file, started, ended, attendees in rows
+        ]
+
+    def person(self, name):
+        """Return an attendee's names and sessions, most recent first, or None
+
+        Each session has the first and last time seen waiting and joined, the seconds
+        waited before being admitted, and the host and co-host flags.
+        """
+        with sqlite3.connect(self.database) as conn:
+            row = conn.execute(
+                "SELECT attendee_id FROM identities WHERE key = ?",
+                (self.resolve(name),),
+            ).fetchone()
+            if row is None:
+                return None
+            names = conn.execute(
+                "SELECT name FROM attendee_names WHERE attendee_id = ? "
+                "ORDER BY last_seen DESC",
+                row,
+            ).fetchall()
+            attended = conn.execute(
+                "SELECT s.file, s.started, a.waiting_first, a.waiting_last, "
+                "a.joined_first, a.joined_last, a.host, a.co_host "
+                "FROM attendance a JOIN sessions s USING (session_id) "
+                "WHERE a.attendee_id = ? ORDER BY s.started DESC, s.file DESC",
+                row,
+            ).fetchall()
+        return {
+            "names": [name for (name,) in names],
+            "sessions": [
+                {
+                    "file": file,
+                    "started": started,
+                    "waiting": {"first_seen": waiting_first, "last_seen": waiting_last},
+                    "joined": {"first_seen": joined_first, "last_seen": joined_last},
+                    "waited_seconds": wait_seconds(
+                        waiting_first, waiting_last, joined_first
+                    ),
+                    "host": bool(host),
+                    "co_host": bool(co_host),
+                }
+                for (
+                    file,
+                    started,
+                    waiting_first,
+                    waiting_last,
+                    joined_first,
+                    joined_last,
+                    host,
+                    co_host,
+                ) in attended
+            ],
+        }
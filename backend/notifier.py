@@ -0,0 +1,76 @@
+"""
+Cross-process change notification for the Zoom meeting tracker API.
+
+With several backend worker processes, each keeps its own in-memory roster, name index,
+waiting room watchdog and admission policy. SQLite already knows when another connection
+commits: `PRAGMA data_version` changes, and `PRAGMA schema_version` changes when tables
+are dropped or created (a /reset). DataVersionWatcher polls both on its own connection and
+calls its subscribers, so every worker can catch up with what the others wrote without a
+separate message bus.
+"""
+
+import logging
+import sqlite3
+import threading
+
+
+class DataVersionWatcher:
+    """Call subscribers when a SQLite database is changed through another connection"""
+
+    def __init__(self, database, interval=0.1):
+        self.database = database
+        self.interval = interval
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Call `callback(schema_changed)` after each change"""
+        self._subscribers.append(callback)
+
+    def start(self):
+        """Start polling in a background thread"""
+        self._stop.clear()
+        # Read the starting versions now, so no commit after start() goes unnoticed
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(conn, self._versions(conn)),
+            name="data-version-watcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    @staticmethod
+    def _versions(conn):
+        (data_version,) = conn.execute("PRAGMA data_version").fetchone()
+        (schema_version,) = conn.execute("PRAGMA schema_version").fetchone()
+        return data_version, schema_version
+
+    def _run(self, conn, versions):
+        logger = logging.getLogger(__name__)
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    current = self._versions(conn)
+                except sqlite3.Error as e:
+                    logger.warning("Cannot read the database version: %s", e)
+                    continue
+                if current == versions:
+                    continue
+                schema_changed = current[1] != versions[1]
+                versions = current
+                for callback in self._subscribers:
+                    try:
+                        callback(schema_changed)
+                    except Exception:  # one failing cache must not stop the others
+                        logger.exception("Change subscriber failed")
+        finally:
+            conn.close()
@@ -0,0 +1,258 @@
+"""
+On-demand profiling for the Zoom meeting tracker API.
+
+When the dashboard lags during a live program, these tools show where the backend spends
+its time without restarting it under a profiler. All of them are off until an admin
+endpoint switches them on:
+
+- SamplingProfiler samples the stacks of every thread every few milliseconds for a given
+  time and returns them in the collapsed stack format ("thread;outer;inner count" lines)
+  that flamegraph.pl, speedscope and inferno read. It is a wall-clock profiler, so
+  threads waiting on a lock or socket show up in their waiting frames.
+- MemoryTracer starts tracemalloc, takes a snapshot, and later compares a new snapshot
+  with it, by line of source code.
+- SlowRequestMiddleware keeps the slowest recent requests, with the time spent in each
+  timed() block (SQLite operations, JSON encoding) while they were handled. When it is
+  disabled, a request costs one attribute check.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from metrics import BREAKDOWN
+
+
+class SamplingProfiler:
+    """Sample the stacks of all threads in a background thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self.samples = 0
+        self.started = None
+        self.seconds = 0.0
+
+    @property
+    def running(self):
+        """Whether a profile is being taken"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds, interval=0.005):
+        """Sample for `seconds`, every `interval` seconds, replacing the last profile
+
+        Raises:
+            RuntimeError: A profile is already being taken.
+        """
+        with self._lock:
+            if self.running:
+                raise RuntimeError("The profiler is already running")
+            self._stacks = collections.Counter()
+            self.samples = 0
+            self.started = time.time()
+            self.seconds = 0.0
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(time.monotonic() + seconds, interval),
+                name="sampling-profiler",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop sampling and return the profile"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        return self.collapsed()
+
+    def collapsed(self):
+        """Return the current or last profile as collapsed stacks"""
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def _run(self, deadline, interval):
+        own = threading.get_ident()
+        start = time.monotonic()
+        names = {}
+        while time.monotonic() < deadline and not self._stop.wait(interval):
+            frames = sys._current_frames()
+            if frames.keys() - names.keys():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            sample = []
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                        f":{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                sample.append(";".join(reversed(stack)))
+            with self._lock:
+                self._stacks.update(sample)
+                self.samples += 1
+                self.seconds = time.monotonic() - start
+
+
+def _where(statistic):
+    frame = statistic.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+class MemoryTracer:
+    """Take tracemalloc snapshots and compare them"""
+
+    FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self, frames=1):
+        self.frames = frames
+        self._baseline = None
+        self._lock = threading.Lock()
+
+    def snapshot(self, limit=20):
+        """Start tracing if needed, and keep a new snapshot to compare with
+
+        Returns:
+            dict: The traced and peak bytes, and the `limit` lines allocating the most.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+        with self._lock:
+            self._baseline = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"where": _where(s), "size": s.size, "count": s.count}
+                for s in snapshot.statistics("lineno")[:limit]
+            ],
+        }
+
+    def diff(self, limit=20):
+        """Compare a new snapshot with the kept one
+
+        Raises:
+            LookupError: No snapshot was taken since tracing started.
+        """
+        with self._lock:
+            baseline = self._baseline
+        if baseline is None or not tracemalloc.is_tracing():
+            raise LookupError("Take a snapshot first")
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {
+                    "where": _where(s),
+                    "size": s.size,
+                    "size_diff": s.size_diff,
+                    "count": s.count,
+                    "count_diff": s.count_diff,
+                }
+                for s in snapshot.compare_to(baseline, "lineno")[:limit]
+            ],
+        }
+
+    def stop(self):
+        """Stop tracing and drop the kept snapshot"""
+        with self._lock:
+            self._baseline = None
+        tracemalloc.stop()
+
+
+class SlowRequestLog:
+    """Ring buffer of the slowest recent requests"""
+
+    def __init__(self, size=50, threshold=0.1):
+        self.enabled = False
+        self.threshold = threshold
+        self._requests = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        """Keep a request that took at least `threshold` seconds"""
+        if entry["seconds"] >= self.threshold:
+            with self._lock:
+                self._requests.append(entry)
+
+    def requests(self):
+        """Return the kept requests, slowest first"""
+        with self._lock:
+            requests = list(self._requests)
+        return sorted(requests, key=lambda entry: entry["seconds"], reverse=True)
+
+    def clear(self):
+        """Forget the kept requests"""
+        with self._lock:
+            self._requests.clear()
+
+
+class SlowRequestMiddleware:
+    """ASGI middleware feeding a SlowRequestLog while it is enabled
+
+    Streaming responses (server-sent events) are left out, since they are open for as
+    long as the client listens.
+    """
+
+    def __init__(self, app, log):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.log.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        response = {"status": 500, "streaming": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["streaming"] = any(
+                    key == b"content-type" and value.startswith(b"text/event-stream")
+                    for key, value in message.get("headers", ())
+                )
+            await send(message)
+
+        breakdown = {}
+        token = BREAKDOWN.set(breakdown)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            BREAKDOWN.reset(token)
+            if not response["streaming"]:
+                self.log.add(
+                    {
+                        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "route": getattr(scope.get("route"), "path", "unmatched"),
+                        "status": response["status"],
+                        "seconds": elapsed,
+                        "breakdown": dict(breakdown),
+                    }
+                )
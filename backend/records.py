@@ -0,0 +1,177 @@
+"""
+Compact participant records for the in-memory roster.
+
+A multi-day program keeps tens of thousands of participants in memory. Storing each one
+as a dict entry keyed by a (name, status) tuple, holding a list of two timestamp strings
+and two flags, costs several hundred bytes per participant. ParticipantTable stores one
+status column-wise instead: interned names in a list, first and last seen as integer epoch
+seconds in arrays, and the roles in a bytearray, with a dict from name to row number.
+Each row also keeps the roster sequence number of its latest change, so the rows changed
+since a client's last read can be found without keeping a change log.
+Timestamps are formatted to strings only at the API and database edge, through a cache,
+since a roster pass gives thousands of rows the same few seconds.
+
+See tools/bench_roster_memory.py for the bytes per participant.
+"""
+
+import sys
+from array import array
+from datetime import datetime
+from functools import lru_cache
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+HOST = 1
+CO_HOST = 2
+
+
+@lru_cache(maxsize=4096)
+def format_ts(epoch):
+    """Return integer epoch seconds as a local "%Y-%m-%d %H:%M:%S" timestamp"""
+    return datetime.fromtimestamp(epoch).strftime(TIMESTAMP_FORMAT)
+
+
+@lru_cache(maxsize=1024)
+def _hour_epoch(hour):
+    return int(datetime.strptime(hour, "%Y-%m-%d %H").timestamp())
+
+
+def to_epoch(timestamp):
+    """Return a local "%Y-%m-%d %H:%M:%S" timestamp as integer epoch seconds"""
+    # Loading a large roster parses two timestamps per row. Rows share the hour, and
+    # time zone offsets only change on the hour, so only the hour goes through datetime
+    return (
+        _hour_epoch(timestamp[:13]) + int(timestamp[14:16]) * 60 + int(timestamp[17:19])
+    )
+
+
+def pack_roles(host, co_host):
+    """Return the role flags as one small integer"""
+    return (HOST if host else 0) | (CO_HOST if co_host else 0)
+
+
+class ParticipantTable:
+    """Participants with one status, stored column-wise in first-seen order"""
+
+    __slots__ = ("_index", "_names", "_first_seen", "_last_seen", "_roles", "_changed")
+
+    def __init__(self):
+        self._index = {}  # name -> row number
+        self._names = []
+        self._first_seen = array("q")
+        self._last_seen = array("q")
+        self._roles = bytearray()
+        self._changed = array("q")  # sequence number of the latest change
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def get(self, name):
+        """Return (first_seen, last_seen, host, co_host) for a name, or None"""
+        i = self._index.get(name)
+        if i is None:
+            return None
+        roles = self._roles[i]
+        return (
+            self._first_seen[i],
+            self._last_seen[i],
+            bool(roles & HOST),
+            bool(roles & CO_HOST),
+        )
+
+    def put(self, name, first_seen, last_seen, host, co_host, sequence=0):
+        """Insert or replace a row, as read from the database"""
+        i = self._index.get(name)
+        if i is None:
+            self._append(
+                name, first_seen, last_seen, pack_roles(host, co_host), sequence
+            )
+        else:
+            self._first_seen[i] = first_seen
+            self._last_seen[i] = last_seen
+            self._roles[i] = pack_roles(host, co_host)
+            self._changed[i] = sequence
+
+    def touch(self, name, now, host, co_host, sequence=0):
+        """Record a participant seen at `now` with the given roles, as change `sequence`
+
+        Returns:
+            Tuple[int, Optional[Tuple[bool, bool]]]: first_seen, and the previous
+            (host, co_host) if the roles changed.
+        """
+        roles = pack_roles(host, co_host)
+        i = self._index.get(name)
+        if i is None:
+            self._append(name, now, now, roles, sequence)
+            return now, None
+        previous = self._roles[i]
+        # Replayed updates (see spool.py) can be older than the ones already recorded
+        if now > self._last_seen[i]:
+            self._last_seen[i] = now
+        elif now < self._first_seen[i]:
+            self._first_seen[i] = now
+        self._changed[i] = sequence
+        if previous == roles:
+            return self._first_seen[i], None
+        self._roles[i] = roles
+        return self._first_seen[i], (bool(previous & HOST), bool(previous & CO_HOST))
+
+    def rows(self):
+        """Return [(name, first_seen, last_seen)] in first-seen order"""
+        return list(zip(self._names, self._first_seen, self._last_seen))
+
+    def changed_since(self, sequence):
+        """Return [(name, first_seen, last_seen)] of the rows changed after `sequence`"""
+        return [
+            (self._names[i], self._first_seen[i], self._last_seen[i])
+            for i, changed in enumerate(self._changed)
+            if changed > sequence
+        ]
+
+    def columns(self):
+        """Return copies of the (names, first_seen, last_seen, roles, changed) columns"""
+        return (
+            list(self._names),
+            self._first_seen[:],
+            self._last_seen[:],
+            bytearray(self._roles),
+            self._changed[:],
+        )
+
+    @classmethod
+    def from_columns(cls, names, first_seen, last_seen, roles, changed):
+        """Return a table made from columns(), e.g. of a snapshot
+
+        Raises:
+            ValueError: The columns have different lengths, or a name is repeated.
+        """
+        table = cls()
+        table._names = [sys.intern(name) for name in names]
+        table._index = {name: i for i, name in enumerate(table._names)}
+        if len(table._index) != len(names):
+            raise ValueError("Repeated participant names")
+        if not (
+            len(names)
+            == len(first_seen)
+            == len(last_seen)
+            == len(roles)
+            == len(changed)
+        ):
+            raise ValueError("Participant columns have different lengths")
+        table._first_seen = array("q", first_seen)
+        table._last_seen = array("q", last_seen)
+        table._roles = bytearray(roles)
+        table._changed = array("q", changed)
+        return table
+
+    def _append(self, name, first_seen, last_seen, roles, sequence):
+        name = sys.intern(name)
+        self._index[name] = len(self._names)
+        self._names.append(name)
+        self._first_seen.append(first_seen)
+        self._last_seen.append(last_seen)
+        self._roles.append(roles)
+        self._changed.append(sequence)
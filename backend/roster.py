@@ -0,0 +1,517 @@
+"""
+Write-behind roster store for the Zoom meeting tracker API.
+
+Participant updates are applied to an in-memory copy of the `participants` table and
+acknowledged right away. Repeated updates of the same (name, status) are merged, and a
+background thread writes the changes to SQLite in one transaction whenever the flush
+interval passes or enough rows are pending, so a roster pass costs one fsync instead of
+one per participant.
+
+Crash safety: updates acknowledged within the last `flush_interval` seconds (and at most
+`max_pending` rows) can be lost if the process is killed. stop() flushes everything that
+is pending, so a normal shutdown loses nothing.
+
+The roster is kept in one ParticipantTable per status (see records.py), with integer
+timestamps that are formatted only when they are returned or written. Every change gets
+the next sequence number, so clients can ask for the rows changed since their last read
+(changes()), and snapshot()/restore() carry the roster and its sequence over a restart
+(see snapshot.py).
+
+Every flushed row gets the next `written` number of the database, taken inside the
+write transaction, so it only grows in the order rows reach the database. Other backend
+workers use it to read the rows they haven't seen (refresh()); last_seen can't tell
+them, since a row may be flushed after rows that were seen later.
+"""
+
+import logging
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from metrics import REGISTRY, timed
+from records import ParticipantTable, format_ts, to_epoch
+
+FLUSH_SECONDS = REGISTRY.histogram(
+    "zoom_opm_flush_seconds", "Time spent writing pending roster rows to SQLite"
+)
+FLUSH_ROWS = REGISTRY.histogram(
+    "zoom_opm_flush_rows",
+    "Roster rows written per flush",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
+UPSERT_SQL = (
+    "INSERT INTO participants "
+    "(name, status, first_seen, last_seen, host, co_host, written) "
+    "VALUES (?, ?, ?, ?, ?, ?, "
+    "(SELECT coalesce(max(written), 0) + 1 FROM participants)) "
+    "ON CONFLICT (name, status) DO UPDATE SET "
+    "first_seen = min(first_seen, excluded.first_seen), "
+    "last_seen = max(last_seen, excluded.last_seen), "
+    "host = excluded.host, co_host = excluded.co_host, written = excluded.written"
+)
+EVENT_SQL = (
+    "INSERT INTO events (name, timestamp, old_role, new_role) VALUES (?, ?, ?, ?)"
+)
+SELECT_SQL = (
+    "SELECT name, status, first_seen, last_seen, host, co_host FROM participants"
+)
+
+WRITTEN_SQL = "SELECT coalesce(max(written), 0) FROM participants"
+
+
+def init_written(conn):
+    """Add the `written` column and its index to a participants table without them"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(participants)")]
+    if "written" not in columns:
+        try:
+            conn.execute(
+                "ALTER TABLE participants ADD COLUMN written INTEGER NOT NULL DEFAULT 0"
+            )
+        except sqlite3.OperationalError as e:
+            # Another worker added it first
+            if "duplicate column" not in str(e):
+                raise
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS participants_written ON participants (written)"
+    )
+
+
+# Rows last seen this many seconds before a snapshot are checked again when restoring it,
+# in case the clock was stepped back
+RESTORE_OVERLAP = 60
+
+
+def parse_roles(name):
+    """Split a roster name like "Jane Doe (Host, me)" into the name and role flags.
+
+    Returns:
+        Tuple[str, bool, bool]: (name, host, co_host)
+    """
+    match = re.match(r"^(.*?)\s+\(([^)]+)\)$", name)
+    host, co_host = False, False
+
+    if match:
+        name, roles = match.groups()
+        host = "Host" in roles
+        co_host = "co-host" in roles.lower()
+    return name, host, co_host
+
+
+def role_name(host, co_host):
+    """Return the role label used in the events table"""
+    return "Host" if host else "Co-host" if co_host else "Participant"
+
+
+class RosterStore:
+    """In-memory participant roster with grouped write-behind to SQLite"""
+
+    def __init__(self, database, flush_interval=0.5, max_pending=500):
+        self.database = database
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+        self._tables = {}  # status -> ParticipantTable
+        self._pending = {}  # ordered, so new rows are inserted in first-seen order
+        self._events = []
+        self._watermark = 0  # latest `written` number read from the database
+        self._data_version = None  # PRAGMA data_version at the latest read
+        self._generation = 0  # bumped when the whole roster is loaded again
+        self._changes = {}  # status -> number of changes since the last load
+        self._id = None  # new for every load, so versions of changes() don't mix
+        self._sequence = 0  # number of the latest change
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.database, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+
+    def load(self):
+        """Replace the in-memory roster with the contents of the database"""
+        with self._flush_lock:
+            self._load_locked()
+
+    def _read_data_version(self):
+        """Return this store's PRAGMA data_version, which its own flushes don't change"""
+        (version,) = self._connect().execute("PRAGMA data_version").fetchone()
+        return version
+
+    def _load_locked(self):
+        conn = self._connect()
+        init_written(conn)
+        data_version = self._read_data_version()
+        # Read first: rows written while loading are read again by the next refresh()
+        (watermark,) = conn.execute(WRITTEN_SQL).fetchone()
+        rows = conn.execute(f"{SELECT_SQL} ORDER BY rowid").fetchall()
+        tables = {}
+        for name, status, first_seen, last_seen, host, co_host in rows:
+            if status not in tables:
+                tables[status] = ParticipantTable()
+            tables[status].put(
+                name, to_epoch(first_seen), to_epoch(last_seen), host, co_host
+            )
+        with self._lock:
+            self._tables = tables
+            self._generation += 1
+            self._changes = {}
+            self._id = secrets.token_hex(4)
+            self._sequence = 0
+            self._pending.clear()
+            self._events.clear()
+            self._watermark = watermark
+            self._data_version = data_version
+
+    def snapshot(self):
+        """Return the roster's state, for restore() after a restart
+
+        Returns:
+            dict: The "id" and "sequence" of changes(), when it was "taken" (epoch
+            seconds), the ParticipantTable.columns() of each status in "tables", and
+            the (name, status) of the rows not written yet in "pending".
+        """
+        with self._lock:
+            return {
+                "id": self._id,
+                "sequence": self._sequence,
+                "taken": int(time.time()),
+                "tables": {
+                    status: table.columns() for status, table in self._tables.items()
+                },
+                "pending": list(self._pending),
+            }
+
+    def restore(self, state):
+        """Replace the in-memory roster with a snapshot() and the rows written since
+
+        Rows the database has from after the snapshot are merged in, and pending rows of
+        the snapshot that it doesn't have are written at the next flush. Role changes
+        that were not written are not in the snapshot. If the snapshot doesn't match the
+        database (it was reset or replaced since), the database is loaded instead.
+
+        Versions of changes() stay valid only if the snapshot is "final", taken after
+        the last change (on shutdown). Otherwise clients may hold versions from after
+        the snapshot, with changes the restored roster numbers differently or lost, so
+        it gets a new id and clients get every row again.
+
+        Returns:
+            bool: Whether the snapshot was used.
+        """
+        with self._flush_lock:
+            tables = {
+                status: ParticipantTable.from_columns(*columns)
+                for status, columns in state["tables"].items()
+            }
+            pending = dict.fromkeys(tuple(key) for key in state["pending"])
+            sequence = state["sequence"]
+            since = format_ts(state["taken"] - RESTORE_OVERLAP)
+            conn = self._connect()
+            init_written(conn)
+            data_version = self._read_data_version()
+            (watermark,) = conn.execute(WRITTEN_SQL).fetchone()
+            rows = conn.execute(
+                f"{SELECT_SQL} WHERE last_seen >= ? ORDER BY rowid", (since,)
+            ).fetchall()
+            for name, status, first_seen, last_seen, host, co_host in rows:
+                if status not in tables:
+                    tables[status] = ParticipantTable()
+                current = tables[status].get(name)
+                row = (
+                    to_epoch(first_seen),
+                    to_epoch(last_seen),
+                    bool(host),
+                    bool(co_host),
+                )
+                if (name, status) in pending:
+                    if current is not None and row[1] <= current[1]:
+                        continue
+                    del pending[(name, status)]
+                elif current == row:
+                    continue
+                sequence += 1
+                tables[status].put(name, *row, sequence)
+            counts = dict(
+                conn.execute(
+                    "SELECT status, count(*) FROM participants GROUP BY status"
+                ).fetchall()
+            )
+            # Rows that were never written are the only ones the database may lack
+            unwritten = Counter(
+                status
+                for name, status in pending
+                if conn.execute(
+                    "SELECT 1 FROM participants WHERE name = ? AND status = ?",
+                    (name, status),
+                ).fetchone()
+                is None
+            )
+            written = {
+                status: len(table) - unwritten[status]
+                for status, table in tables.items()
+            }
+            if {status: n for status, n in written.items() if n} != counts:
+                logging.getLogger(__name__).warning(
+                    "The roster snapshot does not match the database, loading it"
+                )
+                self._load_locked()
+                return False
+            with self._lock:
+                self._tables = tables
+                self._generation += 1
+                self._changes = {}
+                self._id = state["id"] if state.get("final") else secrets.token_hex(4)
+                self._sequence = sequence
+                self._pending = pending
+                self._events.clear()
+                self._watermark = watermark
+                self._data_version = data_version
+            return True
+
+    def refresh(self):
+        """Merge rows written by other processes (backend workers) since the last read
+
+        Rows this store has not flushed yet are kept, since they are newer. Nothing is
+        read if no other connection committed since the last read, so the change
+        notifications of this store's own flushes cost nothing.
+
+        Returns:
+            List[Tuple[str, str, str, str]]: (name, status, first_seen, last_seen) of the
+            rows that changed.
+        """
+        with self._flush_lock:
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return []
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT name, status, first_seen, last_seen, host, co_host, "
+                    "written FROM participants WHERE written > ? ORDER BY written",
+                    (self._watermark,),
+                )
+                .fetchall()
+            )
+            changed = []
+            with self._lock:
+                for name, status, first_seen, last_seen, host, co_host, _ in rows:
+                    table = self._table(status)
+                    first, last = to_epoch(first_seen), to_epoch(last_seen)
+                    row = (first, last, bool(host), bool(co_host))
+                    if (name, status) in self._pending or table.get(name) == row:
+                        continue
+                    self._sequence += 1
+                    table.put(name, *row, self._sequence)
+                    self._changes[status] = self._changes.get(status, 0) + 1
+                    changed.append((name, status, first_seen, last_seen))
+                self._watermark = max((row[6] for row in rows), default=self._watermark)
+                self._data_version = data_version
+            return changed
+
+    def _table(self, status):
+        table = self._tables.get(status)
+        if table is None:
+            table = self._tables[status] = ParticipantTable()
+        return table
+
+    def start(self, state=None):
+        """Load the roster, or restore() a snapshot `state`, and start the flusher"""
+        if state is None:
+            self.load()
+        else:
+            self.restore(state)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="roster-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write everything that is still pending"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            # Another connection counts data versions from somewhere else
+            self._data_version = None
+
+    def _run(self):
+        logger = logging.getLogger(__name__)
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error("Roster flush failed, will retry: %s", e)
+
+    def upsert(self, name, status, current_time=None):
+        """Update or insert a participant and queue the change for the next flush.
+
+        Args:
+            name (str): The roster name, possibly with a role suffix like "(Host)".
+            status (str): "waiting" or "joined".
+            current_time (str): Timestamp to record, defaults to now.
+
+        Returns:
+            Tuple[str, str, str]: (name, first_seen, last_seen)
+        """
+        name, host, co_host = parse_roles(name)
+        if host and co_host:
+            # The participants table CHECK constraint would reject this row at flush time
+            raise ValueError(f"{name} cannot be both host and co-host")
+        now = to_epoch(current_time) if current_time else int(time.time())
+        with self._lock:
+            self._sequence += 1
+            table = self._table(status)
+            first_seen, previous = table.touch(name, now, host, co_host, self._sequence)
+            last_seen = table.get(name)[1]
+            if previous is not None:
+                self._events.append(
+                    (name, now, role_name(*previous), role_name(host, co_host))
+                )
+            self._pending[(name, status)] = None
+            self._changes[status] = self._changes.get(status, 0) + 1
+            pending = len(self._pending)
+        if pending >= self.max_pending:
+            self._wake.set()
+        return name, format_ts(first_seen), format_ts(last_seen)
+
+    def participants(self, status):
+        """Return [(name, first_seen, last_seen)] for a status, in first-seen order"""
+        with self._lock:
+            table = self._tables.get(status)
+            rows = table.rows() if table is not None else []
+        return [
+            (name, format_ts(first_seen), format_ts(last_seen))
+            for name, first_seen, last_seen in rows
+        ]
+
+    def changes(self, since=None):
+        """Return the rows changed since an earlier call, for clients that keep a copy
+
+        Args:
+            since (str): The version returned by an earlier call, None for all rows.
+
+        Returns:
+            Tuple[str, bool, Dict[str, List[Tuple[str, str, str]]]]: The current
+            version, whether all rows are returned (`since` is None, or from before a
+            reset or restart without a snapshot), and (name, first_seen, last_seen) by
+            status, in first-seen order.
+        """
+        roster_id, _, sequence = (since or "").partition(".")
+        with self._lock:
+            complete = not (
+                roster_id == self._id
+                and sequence.isdigit()
+                and int(sequence) <= self._sequence
+            )
+            version = f"{self._id}.{self._sequence}"
+            changed = {
+                status: table.rows() if complete else table.changed_since(int(sequence))
+                for status, table in self._tables.items()
+            }
+        return (
+            version,
+            complete,
+            {
+                status: [
+                    (name, format_ts(first_seen), format_ts(last_seen))
+                    for name, first_seen, last_seen in rows
+                ]
+                for status, rows in changed.items()
+            },
+        )
+
+    def version(self, status):
+        """Return a value that changes whenever participants(status) does"""
+        with self._lock:
+            return self._generation, self._changes.get(status, 0)
+
+    @property
+    def pending(self):
+        """Number of rows waiting to be written"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Write all pending rows and role change events in one transaction
+
+        Returns:
+            int: The number of participant rows written.
+        """
+        with self._flush_lock:
+            return self._flush_locked()
+
+    def _flush_locked(self):
+        with self._lock:
+            if not self._pending and not self._events:
+                return 0
+            rows = []
+            for name, status in self._pending:
+                first_seen, last_seen, host, co_host = self._tables[status].get(name)
+                rows.append(
+                    (
+                        name,
+                        status,
+                        format_ts(first_seen),
+                        format_ts(last_seen),
+                        host,
+                        co_host,
+                    )
+                )
+            queued = self._events
+            events = [
+                (name, format_ts(timestamp), old_role, new_role)
+                for name, timestamp, old_role, new_role in queued
+            ]
+            self._pending = {}
+            self._events = []
+        start = time.perf_counter()
+        try:
+            with timed(FLUSH_SECONDS), self._connect() as conn:
+                conn.executemany(UPSERT_SQL, rows)
+                conn.executemany(EVENT_SQL, events)
+        except sqlite3.Error:
+            # Put the work back so the next flush retries it
+            with self._lock:
+                self._pending = {
+                    **dict.fromkeys(row[:2] for row in rows),
+                    **self._pending,
+                }
+                self._events[:0] = queued
+            raise
+        FLUSH_ROWS.observe(len(rows))
+        logging.getLogger(__name__).debug(
+            "Flushed %d rows and %d events in %.1fms",
+            len(rows),
+            len(events),
+            (time.perf_counter() - start) * 1000,
+        )
+        return len(rows)
+
+    def reset(self, reset_database):
+        """Flush, then run `reset_database()` with no flush in flight and reload
+
+        Args:
+            reset_database (callable): Backs up and clears the database.
+        """
+        with self._flush_lock:
+            self._flush_locked()
+            # Fold the WAL into the main file so a file copy is a complete backup
+            self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            reset_database()
+            self._load_locked()
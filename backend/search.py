@@ -0,0 +1,157 @@
+"""
+Participant name search for the Zoom meeting tracker API.
+
+Names are normalized before indexing: accents are removed (NFKD, dropping combining
+marks), case is folded, and anything that is not a letter or digit (emoji, punctuation)
+becomes a word break. Each word is indexed by its trigrams, padded so that word starts
+get their own trigrams and short queries still match prefixes.
+
+The index is updated as roster batches arrive, and a search only touches the posting
+lists of the query's trigrams, so it does not scan the roster.
+"""
+
+import heapq
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import chain
+
+
+def normalize(text):
+    """Return `text` folded for matching: no accents, no case, no emoji or punctuation"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    kept = [
+        char if unicodedata.category(char)[0] in "LN" else " "
+        for char in decomposed
+        if not unicodedata.combining(char)
+    ]
+    return " ".join("".join(kept).casefold().split())
+
+
+def trigrams(normalized, complete=True):
+    """Return the set of padded word trigrams of an already normalized string
+
+    Args:
+        normalized (str): Output of normalize().
+        complete (bool): Pad the end of each word too. Queries leave the last word open,
+            so "jo" matches "john".
+    """
+    grams = set()
+    words = normalized.split()
+    for i, word in enumerate(words):
+        end = " " if complete or i < len(words) - 1 else ""
+        padded = f"  {word}{end}"
+        grams.update(padded[j : j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+class NameIndex:
+    """Incrementally maintained trigram index of participant names"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._added = None  # (name, status) added while a rebuild() runs
+        self._postings = defaultdict(set)  # trigram -> ids
+        self._names = []  # id -> name
+        self._normalized = []  # id -> normalized name
+        self._gram_counts = []  # id -> number of trigrams
+        self._statuses = []  # id -> set of statuses
+        self._ids = {}  # name -> id
+
+    def __len__(self):
+        with self._lock:
+            return len(self._names)
+
+    def add(self, name, status):
+        """Index a participant name, or add a status to an indexed one"""
+        with self._lock:
+            if self._added is not None:
+                self._added.append((name, status))
+            self._add_locked(name, status)
+
+    def _add_locked(self, name, status):
+        name_id = self._ids.get(name)
+        if name_id is not None:
+            self._statuses[name_id].add(status)
+            return
+        normalized = normalize(name)
+        grams = trigrams(normalized)
+        name_id = len(self._names)
+        self._ids[name] = name_id
+        self._names.append(name)
+        self._normalized.append(normalized)
+        self._gram_counts.append(len(grams))
+        self._statuses.append({status})
+        for gram in grams:
+            self._postings[gram].add(name_id)
+
+    def rebuild(self, participants):
+        """Replace the index with (name, status) pairs, e.g. after a reset
+
+        The new index is built aside, so searches keep using the old one meanwhile, and
+        swapped in at once. Names add()ed during the rebuild are added to it again.
+        """
+        with self._rebuild_lock:
+            with self._lock:
+                self._added = []
+            fresh = NameIndex()
+            for name, status in participants:
+                fresh._add_locked(name, status)
+            with self._lock:
+                self._postings = fresh._postings
+                self._names = fresh._names
+                self._normalized = fresh._normalized
+                self._gram_counts = fresh._gram_counts
+                self._statuses = fresh._statuses
+                self._ids = fresh._ids
+                for name, status in self._added:
+                    self._add_locked(name, status)
+                self._added = None
+
+    def search(self, query, limit=10, status=None):
+        """Return the best matches for `query`, best first.
+
+        Matches share at least half of the query's trigrams. They are ranked by the
+        fraction of the query's trigrams they contain, with a bonus for containing the
+        whole query and for starting with it, and shorter names win ties.
+
+        Args:
+            query (str): Any part of a name; case, accents and emoji are ignored.
+            limit (int): Most matches to return.
+            status (str): Only return participants with this status.
+
+        Returns:
+            List[Tuple[str, List[str], float]]: (name, statuses, score) tuples.
+        """
+        normalized = normalize(query)
+        grams = trigrams(normalized, complete=False)
+        if not grams:
+            return []
+        with self._lock:
+            # Counter counts the posting lists in C, which matters for common trigrams
+            hits = Counter(
+                chain.from_iterable(self._postings.get(gram, ()) for gram in grams)
+            )
+            total = len(grams)
+            needed = max(1, total // 2)
+            scored = []
+            for name_id, shared in hits.items():
+                if shared < needed:
+                    continue
+                if status is not None and status not in self._statuses[name_id]:
+                    continue
+                score = shared / total
+                # Only names with every trigram can contain the query
+                if shared == total:
+                    candidate = self._normalized[name_id]
+                    if normalized in candidate:
+                        score += 1.0
+                        if candidate.startswith(normalized):
+                            score += 0.5
+                scored.append((score, -self._gram_counts[name_id], name_id))
+            best = heapq.nlargest(limit, scored)
+            return [
+                (self._names[name_id], sorted(self._statuses[name_id]), round(score, 3))
+                for score, _, name_id in best
+            ]
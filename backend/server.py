@@ -22,10 +22,15 @@ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
 
-import re
-import shutil
+import asyncio
+import hmac
+import json
 import sqlite3
 import subprocess
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
 from sys import version as python_version
 from typing import List
@@ -33,14 +38,213 @@ import os
 
 from dotenv import load_dotenv
 
-from fastapi import Body, FastAPI
+from fastapi import Body, Depends, FastAPI, HTTPException, Request
 from fastapi import __version__ as fastapi_version
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from admit_policy import (
+    AdmitPolicy,
+    init_registrations,
+    latest_registrations,
+    load_registrations,
+    parse_admitted,
+    read_registrations,
+    save_registrations,
+)
+from agent import AgentClient, AgentUnavailable
+from assets import AssetStore
+from breakout_planner import (
+    init_breakout,
+    load_rounds,
+    plan_rooms,
+    plan_text,
+    save_round,
+)
+from encoded import EncodedCache
+from events import (
+    EventMaintenance,
+    archive_events,
+    enable_incremental_vacuum,
+    init_events,
+)
+from filtered import (
+    FILTERS,
+    get_filtered,
+    init_filtered,
+    normalize_timestamp,
+    update_filtered,
+    update_scan,
+)
+from history import HistoryStore, load_renames
+from metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, timed
+from notifier import DataVersionWatcher
+from profiling import (
+    MemoryTracer,
+    SamplingProfiler,
+    SlowRequestLog,
+    SlowRequestMiddleware,
+)
+from records import format_ts
+from roster import RosterStore, init_written
+from search import NameIndex
+from snapshot import RosterSnapshots
+from throttle import AdmissionMiddleware, default_lanes
+from watchdog import WaitingWatchdog
+
+DB_SECONDS = REGISTRY.histogram(
+    "zoom_opm_db_seconds", "Time spent in SQLite by operation", ("operation",)
+)
+SERIALIZE_SECONDS = REGISTRY.histogram(
+    "zoom_opm_serialize_seconds", "Time spent encoding JSON responses"
+)
+BATCH_ROWS = REGISTRY.histogram(
+    "zoom_opm_batch_rows",
+    "Participants upserted per list update by status",
+    ("status",),
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+SUBPROCESS_SECONDS = REGISTRY.histogram(
+    "zoom_opm_subprocess_seconds", "Duration of zoom-manage commands", ("command",)
+)
+SUBPROCESS_EXITS = REGISTRY.counter(
+    "zoom_opm_subprocess_exits_total",
+    "zoom-manage commands by exit code",
+    ("command", "exit_code"),
+)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records how long encoding the body takes"""
+
+    def render(self, content):
+        with timed(SERIALIZE_SECONDS):
+            return super().render(content)
 
-app = FastAPI()
 
 DATABASE = "zoom_meeting.db"
+HISTORY_DATABASE = "zoom_history.db"
+SNAPSHOT = "zoom_meeting.snapshot"
 ZOOM_MANAGE = "../zoom-manage"
+FRONTEND = "../frontend"
+
+# A running `zoom-manage agent` serves commands without starting osascript each time
+agent = AgentClient("../logs")
+
+# Participant updates are acknowledged from memory and written to SQLite in groups
+roster = RosterStore(DATABASE)
+# The roster saved every few seconds, so a restarted backend has it back at once
+snapshots = RosterSnapshots(roster, SNAPSHOT)
+# Trigram index of the roster names for /search, updated with every participant update
+name_index = NameIndex()
+# Attendees of earlier meetings, ingested from the database backups made by /reset
+history = HistoryStore(HISTORY_DATABASE)
+# Alerts for participants waiting longer than the ZOOM_WAITING_ALERTS thresholds
+watchdog = WaitingWatchdog()
+# Who /cmd_admit lets in when a ZOOM_REGISTRATION_FILE is set; empty means "Admit All"
+admit_policy = AdmitPolicy()
+# With several workers (ZOOM_BACKEND_WORKERS), tells this one about the others' writes
+changes = DataVersionWatcher(DATABASE)
+# Folds role change bursts into role_changes and returns free pages in the background
+event_maintenance = EventMaintenance(DATABASE)
+# Switched on through the /admin endpoints, for a look inside a running backend
+profiler = SamplingProfiler()
+memory_tracer = MemoryTracer()
+slow_requests = SlowRequestLog()
+# The dashboard and its hashed, precompressed files, served at / and /static
+dashboard = AssetStore(FRONTEND)
+# Concurrency limits per kind of request, and the ZOOM_INGEST_RATE limit on updates
+lanes = default_lanes()
+
+
+def index_roster():
+    """Rebuild the name index from the in-memory roster."""
+    name_index.rebuild(
+        (name, status)
+        for status in ("waiting", "joined")
+        for name, _, _ in roster.participants(status)
+    )
+
+
+def load_saved_registrations():
+    """Switch to the registration list last saved by any worker, if it is new"""
+    list_id = latest_registrations(DATABASE)
+    if list_id is not None and list_id != admit_policy.list_id:
+        admit_policy.load(load_registrations(DATABASE, list_id))
+        admit_policy.list_id = list_id
+
+
+def sync_from_database(schema_changed):
+    """Bring this worker's in-memory state up to date with another worker's writes."""
+    if schema_changed:
+        # Tables were dropped and created again: another worker ran /reset
+        roster.load()
+        index_roster()
+        watchdog.reset()
+    else:
+        for name, status, first_seen, _ in roster.refresh():
+            name_index.add(name, status)
+            if status == "waiting":
+                watchdog.waiting(name, first_seen)
+            else:
+                watchdog.admitted(name)
+    load_saved_registrations()
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    """Start the roster flusher, and flush everything pending on shutdown."""
+    init_db()
+    # Every worker keeps its own roster, so only a single one is snapshotted
+    single_worker = int(os.getenv("ZOOM_BACKEND_WORKERS", "1")) == 1
+    roster.start(snapshots.read() if single_worker else None)
+    # Indexing a large roster takes seconds; it is served meanwhile, /search catches up
+    threading.Thread(target=index_roster, name="index-roster", daemon=True).start()
+    dashboard.load()
+    ingest_rate = os.getenv("ZOOM_INGEST_RATE")
+    if ingest_rate:
+        lanes.update(default_lanes(float(ingest_rate)))
+    rename_file = os.getenv("ZOOM_RENAME_FILE")
+    if rename_file:
+        # Relative to the top level directory, as in zoom-manage
+        history.renames = load_renames(os.path.join("..", rename_file))
+    history.init()
+    history.ingest_archives(DATABASE)
+    registration_file = os.getenv("ZOOM_REGISTRATION_FILE")
+    if registration_file:
+        admit_policy.load(read_registrations(os.path.join("..", registration_file)))
+        # Only lists saved from now on replace the file
+        admit_policy.list_id = latest_registrations(DATABASE)
+    else:
+        load_saved_registrations()
+    thresholds = os.getenv("ZOOM_WAITING_ALERTS")
+    if thresholds:
+        watchdog.thresholds = tuple(sorted(int(t) for t in thresholds.split(",")))
+    # Alerts carry on for the people who were waiting before a restart
+    for name, first_seen in waiting_now():
+        watchdog.waiting(name, first_seen)
+    watchdog.start()
+    event_maintenance.start()
+    if single_worker:
+        snapshots.start()
+    if int(os.getenv("ZOOM_BACKEND_WORKERS", "1")) > 1:
+        changes.subscribe(sync_from_database)
+        changes.start()
+    try:
+        yield
+    finally:
+        changes.stop()
+        event_maintenance.stop()
+        watchdog.stop()
+        roster.stop()
+        if single_worker:
+            snapshots.stop()
+
+
+app = FastAPI(default_response_class=TimedJSONResponse, lifespan=lifespan)
+
+# Inside CORS, so 429 responses can be read by the dashboard
+app.add_middleware(AdmissionMiddleware, lanes=lanes)
 
 # Add CORS middleware
 app.add_middleware(
@@ -50,6 +254,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(SlowRequestMiddleware, log=slow_requests)
 
 
 def init_db():
@@ -60,6 +266,8 @@ def init_db():
     while the `events` table logs changes in participant roles.
     """
     with sqlite3.connect(DATABASE) as conn:
+        # Before any table is created, so a new database never needs a full VACUUM
+        enable_incremental_vacuum(conn)
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS participants (
@@ -69,6 +277,7 @@ def init_db():
                 last_seen TEXT NOT NULL,
                 host BOOLEAN DEFAULT 0,
                 co_host BOOLEAN DEFAULT 0,
+                written INTEGER NOT NULL DEFAULT 0,
                 PRIMARY KEY (name, status),
                 CHECK ((host = 1 AND co_host = 0) OR
                     (host = 0 AND co_host = 1) OR (host = 0 AND co_host = 0)
@@ -87,6 +296,11 @@ def init_db():
             )
         """
         )
+        init_written(conn)
+        init_filtered(conn)
+        init_breakout(conn)
+        init_registrations(conn)
+        init_events(conn)
 
 
 def reset_db():
@@ -102,16 +316,26 @@ def reset_db():
     # Form the new name
     backup_name = f"{base_name}-{current_datetime}.db"
 
-    # Copy the database file to the new name
-    shutil.copy2(DATABASE, backup_name)
+    # Move the role changes out first, so the live database and its backup stay small
+    with timed(DB_SECONDS, "archive_events"):
+        archive_events(DATABASE, f"{base_name}-events-{current_datetime}.jsonl.gz")
 
-    with sqlite3.connect(DATABASE) as conn:
+    # A copy of the file would miss what is still in the WAL, like the DELETE of the
+    # archived events; VACUUM INTO copies what is committed, without the free pages
+    with timed(DB_SECONDS, "backup"), sqlite3.connect(DATABASE) as conn:
+        conn.execute("VACUUM INTO ?", (backup_name,))
+    with timed(DB_SECONDS, "ingest_history"):
+        history.ingest([backup_name])
+
+    with timed(DB_SECONDS, "reset"), sqlite3.connect(DATABASE) as conn:
         conn.execute("DROP TABLE IF EXISTS participants")
+        conn.execute("DROP TABLE IF EXISTS filtered")
+        conn.execute("DROP TABLE IF EXISTS breakout_plans")
     init_db()
 
 
 def get_participants(status):
-    """Retrieve participants from the database based on their status.
+    """Retrieve participants from the in-memory roster based on their status.
 
     Args:
         status (str): The status of the participants to retrieve.
@@ -119,62 +343,116 @@ def get_participants(status):
     Returns:
         List[Tuple[str, str, str]]: A list of tuples containing participant information.
     """
-    with sqlite3.connect(DATABASE) as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT name, first_seen, last_seen FROM participants WHERE status = ?",
-            (status,),
-        )
-        return cur.fetchall()
+    return roster.participants(status)
 
 
-def update_participant(name, status):
-    """Update or insert a participant in the database."""
-    match = re.match(r"^(.*?)\s+\(([^)]+)\)$", name)
-    host, co_host = False, False
+def render_roster(status):
+    """Return the /waiting or /joined response content for a status."""
+    return {
+        name: {"first_seen": first_seen, "last_seen": last_seen}
+        for name, first_seen, last_seen in get_participants(status)
+    }
 
-    if match:
-        name, roles = match.groups()
-        host = "Host" in roles
-        co_host = "co-host" in roles.lower()
 
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with sqlite3.connect(DATABASE) as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT name, host, co_host, first_seen "
-            "FROM participants WHERE name = ? AND status = ?",
-            (name, status),
-        )
-        existing_participant = cur.fetchone()
-        # If the participant already exists, check for a change in the host or co-host status
-        if existing_participant:
-            _, old_host, old_co_host, first_seen = existing_participant
-            if old_host != host or old_co_host != co_host:
-                # Determine the old and new roles
-                old_role = (
-                    "Host" if old_host else "Co-host" if old_co_host else "Participant"
-                )
-                new_role = "Host" if host else "Co-host" if co_host else "Participant"
-                # Log the role change event
-                cur.execute(
-                    "INSERT INTO events (name, timestamp, old_role, new_role) VALUES (?, ?, ?, ?)",
-                    (name, current_time, old_role, new_role),
-                )
-            cur.execute(
-                "UPDATE participants SET last_seen = ?, host = ?, "
-                "co_host = ? WHERE name = ? AND status = ?",
-                (current_time, host, co_host, name, status),
+# Every dashboard tab polls the roster, so it is encoded and compressed once per change
+roster_responses = EncodedCache(render_roster)
+
+
+def waiting_now():
+    """Return (name, first_seen) of the participants in the waiting room now
+
+    They were seen waiting within the watchdog's `stale_after` seconds, and not in the
+    meeting since. Longest waiting first.
+    """
+    recent = format_ts(int(time.time() - watchdog.stale_after))
+    joined = {name: last_seen for name, _, last_seen in roster.participants("joined")}
+    waiting = [
+        (first_seen, name)
+        for name, first_seen, last_seen in roster.participants("waiting")
+        if last_seen >= recent and joined.get(name, "") < last_seen
+    ]
+    return [(name, first_seen) for first_seen, name in sorted(waiting)]
+
+
+def update_participant(name, status, timestamp=None):
+    """Update or insert a participant, seen at `timestamp` (default now). The change is
+    written to the database by the roster flusher within `roster.flush_interval` seconds.
+    """
+    result = roster.upsert(name, status, timestamp)
+    name_index.add(result[0], status)
+    if status == "waiting":
+        watchdog.waiting(result[0], result[1])
+    else:
+        watchdog.admitted(result[0])
+    return result
+
+
+def run_zoom_manage(command, *args):
+    """Run a `zoom-manage` command, recording its duration and exit code.
+
+    The command is sent to `zoom-manage agent` if one is running, otherwise a new
+    zoom-manage process is started.
+
+    Args:
+        command (str): The zoom-manage subcommand, e.g. "roster".
+        *args (str): Its arguments.
+
+    Returns:
+        subprocess.CompletedProcess: The finished process with captured output.
+
+    Raises:
+        subprocess.CalledProcessError: If the command failed.
+        TimeoutError: If the agent is busy or did not reply in time.
+    """
+    exit_code = "error"
+    start = time.perf_counter()
+    try:
+        try:
+            status, message = agent.run(command, *args)
+            result = subprocess.CompletedProcess(
+                [ZOOM_MANAGE, command, *args], status, message.encode(), b""
             )
-        else:
-            first_seen = current_time
-            cur.execute(
-                "INSERT INTO participants (name, status, first_seen, "
-                "last_seen, host, co_host) VALUES (?, ?, ?, ?, ?, ?)",
-                (name, status, current_time, current_time, host, co_host),
+            result.check_returncode()
+        except AgentUnavailable:
+            result = subprocess.run(
+                [ZOOM_MANAGE, command, *args], capture_output=True, check=True
             )
-        conn.commit()
-        return (name, first_seen, current_time)
+        exit_code = result.returncode
+        return result
+    except subprocess.CalledProcessError as e:
+        exit_code = e.returncode
+        raise
+    except TimeoutError:
+        exit_code = "timeout"
+        raise
+    finally:
+        SUBPROCESS_SECONDS.observe(time.perf_counter() - start, command)
+        SUBPROCESS_EXITS.inc(command, exit_code)
+
+
+def run_zoom_manage_reply(command):
+    """Run a `zoom-manage` command for an endpoint, answering 504 if the agent times out"""
+    try:
+        return run_zoom_manage(command)
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e)) from e
+
+
+@app.get("/", include_in_schema=False)
+def get_dashboard(request: Request):
+    """Serve the Zoom Meeting Tracker dashboard."""
+    if dashboard.index is None:
+        raise HTTPException(status_code=404, detail=f"No dashboard in {FRONTEND}")
+    return dashboard.index.response(request.headers)
+
+
+@app.get("/static/{name}", include_in_schema=False)
+def get_static_file(name: str, request: Request):
+    """Serve a dashboard file by its content-hashed name."""
+    asset = dashboard.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail=f"No such file: {name}")
+    return asset.response(request.headers)
 
 
 @app.get("/health")
@@ -189,81 +467,455 @@ async def read_health():
 
 
 @app.get("/waiting")
-def get_waiting_room():
+def get_waiting_room(request: Request):
     """Retrieve participants in the waiting room."""
-    participants = get_participants("waiting")
-    return {
-        name: {"first_seen": first_seen, "last_seen": last_seen}
-        for name, first_seen, last_seen in participants
-    }
+    encoded = roster_responses.get("waiting", roster.version("waiting"))
+    return encoded.response(request.headers)
+
+
+def seen_at(timestamp):
+    """Return the `timestamp` query parameter of a roster update, normalized, or None"""
+    if timestamp is None:
+        return None
+    try:
+        return normalize_timestamp(timestamp)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
 
 
 @app.put("/waiting")
-def update_waiting_room(name: str = Body(..., embed=True)):
+def update_waiting_room(name: str = Body(..., embed=True), timestamp: str = None):
     """Update or insert a participant in the waiting room."""
-    name, first_seen, last_seen = update_participant(name, "waiting")
+    name, first_seen, last_seen = update_participant(
+        name, "waiting", seen_at(timestamp)
+    )
     return {name: {"first_seen": first_seen, "last_seen": last_seen}}
 
 
 @app.put("/waiting_list")
-def update_waiting_list(names: List[str] = Body(...)):
-    """Update or insert multiple participants in the waiting room."""
+def update_waiting_list(names: List[str] = Body(...), timestamp: str = None):
+    """Update or insert multiple participants in the waiting room.
+
+    `timestamp` is when they were seen, if not now (e.g. replayed by the spool).
+    """
+    BATCH_ROWS.observe(len(names), "waiting")
+    timestamp = seen_at(timestamp)
     for name in names:
-        update_participant(name, "waiting")
+        update_participant(name, "waiting", timestamp)
     return {"message": f"Updated {len(names)} participants."}
 
 
 @app.get("/joined")
-def get_joined_meeting():
+def get_joined_meeting(request: Request):
     """Retrieve participants who have joined the meeting."""
-    participants = get_participants("joined")
-    return {
-        name: {"first_seen": first_seen, "last_seen": last_seen}
-        for name, first_seen, last_seen in participants
-    }
+    encoded = roster_responses.get("joined", roster.version("joined"))
+    return encoded.response(request.headers)
 
 
 @app.put("/joined")
-def update_joined_meeting(name: str = Body(..., embed=True)):
+def update_joined_meeting(name: str = Body(..., embed=True), timestamp: str = None):
     """Update or insert a participant who has joined the meeting."""
-    name, first_seen, last_seen = update_participant(name, "joined")
+    name, first_seen, last_seen = update_participant(name, "joined", seen_at(timestamp))
     return {name: {"first_seen": first_seen, "last_seen": last_seen}}
 
 
 @app.put("/joined_list")
-def update_joined_list(names: List[str] = Body(...)):
-    """Update or insert multiple participants who have joined the meeting."""
+def update_joined_list(names: List[str] = Body(...), timestamp: str = None):
+    """Update or insert multiple participants who have joined the meeting.
+
+    `timestamp` is when they were seen, if not now (e.g. replayed by the spool).
+    """
+    BATCH_ROWS.observe(len(names), "joined")
+    timestamp = seen_at(timestamp)
     for name in names:
-        update_participant(name, "joined")
+        update_participant(name, "joined", timestamp)
     return {"message": f"Updated {len(names)} participants."}
 
 
+@app.get("/changes")
+def get_roster_changes(since: str = None):
+    """Retrieve the participants changed since an earlier response's `version`.
+
+    Without `since`, or with a version from before a reset, every participant is
+    returned and `complete` is true. A restart keeps versions valid (see snapshot.py).
+    """
+    version, complete, changed = roster.changes(since)
+    return {
+        "version": version,
+        "complete": complete,
+        **{
+            status: {
+                name: {"first_seen": first_seen, "last_seen": last_seen}
+                for name, first_seen, last_seen in changed.get(status, [])
+            }
+            for status in ("waiting", "joined")
+        },
+    }
+
+
+@app.get("/search")
+def search_participants(q: str, limit: int = 10, status: str = None):
+    """Find participants by any part of their name, ignoring case, accents and emoji.
+
+    Matches are ranked best first, and `status` ("waiting" or "joined") narrows them.
+    """
+    matches = name_index.search(q, limit=limit, status=status)
+    return {
+        "query": q,
+        "matches": [
+            {"name": name, "status": statuses, "score": score}
+            for name, statuses, score in matches
+        ],
+    }
+
+
+@app.put("/filtered/{filter_name}")
+def update_filtered_roster(
+    filter_name: str,
+    names: List[str] = Body(...),
+    pass_id: str = Body(None),
+    timestamp: str = Body(None),
+    complete: bool = Body(True),
+):
+    """Record a batch of participants matching a filter (hands, camera_on, ...).
+
+    Batches of the same pass share a `pass_id`, and `timestamp` is when the pass
+    started. When the batch marked `complete` arrives, participants last seen by an
+    earlier pass are removed from the filter. A batch without a `pass_id` is a pass
+    of its own.
+    """
+    if filter_name not in FILTERS:
+        raise HTTPException(status_code=404, detail=f"Unknown filter: {filter_name}")
+    try:
+        timestamp = normalize_timestamp(timestamp)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    BATCH_ROWS.observe(len(names), filter_name)
+    with timed(DB_SECONDS, "update_filtered"):
+        updated, removed = update_filtered(
+            DATABASE,
+            filter_name,
+            names,
+            pass_id or uuid.uuid4().hex,
+            timestamp,
+            complete,
+        )
+    return {"message": f"Updated {updated} participants, removed {removed}."}
+
+
+@app.get("/filtered/{filter_name}")
+def get_filtered_roster(filter_name: str):
+    """Retrieve participants matching a filter, in order of first seen."""
+    if filter_name not in FILTERS:
+        raise HTTPException(status_code=404, detail=f"Unknown filter: {filter_name}")
+    with timed(DB_SECONDS, "get_filtered"):
+        participants = get_filtered(DATABASE, filter_name)
+    return {
+        name: {"first_seen": first_seen, "last_seen": last_seen}
+        for name, first_seen, last_seen in participants
+    }
+
+
+@app.put("/scan")
+def update_scan_pass(
+    participants: List[dict] = Body(...),
+    pass_id: str = Body(None),
+    timestamp: str = Body(None),
+    complete: bool = Body(True),
+):
+    """Record a batch of participant records from a single `zoom-manage scan` pass.
+
+    Each record updates the roster (`status` is "waiting" or "joined"), as seen at
+    `timestamp`, and every filtered roster it matches (hand, video, audio and phone
+    state).
+    """
+    for record in participants:
+        if not record.get("name") or record.get("status") not in ("waiting", "joined"):
+            raise HTTPException(status_code=422, detail=f"Invalid record: {record}")
+    try:
+        timestamp = normalize_timestamp(timestamp)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    BATCH_ROWS.observe(len(participants), "scan")
+    for record in participants:
+        update_participant(record["name"], record["status"], timestamp)
+    with timed(DB_SECONDS, "update_scan"):
+        counts = update_scan(
+            DATABASE, participants, pass_id or uuid.uuid4().hex, timestamp, complete
+        )
+    return {"message": f"Updated {len(participants)} participants.", "filters": counts}
+
+
+@app.get("/hands")
+def get_hands_raised():
+    """Retrieve participants with a raised hand, in order of first seen."""
+    return get_filtered_roster("hands")
+
+
+@app.post("/breakout/plan")
+def create_breakout_plan(
+    rooms: List[str] = Body(None),
+    room_count: int = Body(None),
+    capacity: int = Body(None),
+    groups: List[List[str]] = Body([]),
+    avoid_repeats: bool = Body(True),
+):
+    """Assign the joined participants to breakout rooms and store the plan as a new round.
+
+    Staff ("@" and "#" names) are spread across the rooms, `groups` stay together, and
+    participants who shared a room in an earlier round are kept apart where possible.
+    """
+    if not rooms:
+        if not room_count or room_count < 1:
+            raise HTTPException(status_code=422, detail="Give rooms or room_count")
+        rooms = [f"Room {i}" for i in range(1, room_count + 1)]
+    names = [name for name, _, _ in get_participants("joined")]
+    with timed(DB_SECONDS, "load_breakout"):
+        history = [list(earlier.values()) for earlier in load_rounds(DATABASE).values()]
+    try:
+        plan, repeats = plan_rooms(
+            names, rooms, capacity, groups, history if avoid_repeats else ()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    with timed(DB_SECONDS, "save_breakout"):
+        number = save_round(DATABASE, plan)
+    return {"round": number, "rooms": plan, "repeat_pairs": repeats}
+
+
+@app.get("/breakout/plan")
+def get_breakout_plan(round: int = None):
+    """Return a stored plan (the latest by default) as text for `zoom-manage breakout assign`."""
+    with timed(DB_SECONDS, "load_breakout"):
+        rounds = load_rounds(DATABASE)
+    if not rounds:
+        raise HTTPException(status_code=404, detail="No breakout plan yet")
+    number = round if round is not None else max(rounds)
+    if number not in rounds:
+        raise HTTPException(status_code=404, detail=f"No breakout round {number}")
+    return PlainTextResponse(plan_text(rounds[number]))
+
+
+@app.get("/history")
+def get_history_sessions():
+    """List the archived meetings in the attendee history, oldest first."""
+    with timed(DB_SECONDS, "history"):
+        return history.sessions()
+
+
+@app.get("/history/{name}")
+def get_person_history(name: str):
+    """Return the meetings a participant attended, most recent first, with how long they
+    waited in each. Role suffixes, case, accents, emoji and renames are ignored."""
+    with timed(DB_SECONDS, "history"):
+        person = history.person(name)
+    if person is None:
+        raise HTTPException(status_code=404, detail=f"No history for {name}")
+    return person
+
+
+@app.get("/alerts")
+def get_waiting_alerts():
+    """Return the participants waiting longer than the first alert threshold."""
+    return {"thresholds": watchdog.thresholds, "overdue": watchdog.overdue()}
+
+
+@app.get("/alerts/stream")
+async def stream_waiting_alerts(request: Request):
+    """Push waiting room alerts as server-sent events.
+
+    The current alerts are sent first. Then each event is an "overdue" alert as someone
+    passes a threshold, or "cleared" when they are admitted or leave the waiting room.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    unsubscribe = watchdog.subscribe(
+        lambda event: loop.call_soon_threadsafe(queue.put_nowait, event)
+    )
+
+    async def events():
+        try:
+            for alert in watchdog.overdue():
+                yield f"data: {json.dumps(alert)}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), 15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            unsubscribe()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.post("/reset")
 def reset_meeting():
     """Reset the database by dropping existing tables and reinitializing the schema."""
-    reset_db()
+    roster.reset(reset_db)
+    index_roster()
+    watchdog.reset()
     return {"message": "Database reset successfully."}
 
 
 @app.post("/cmd_roster")
 def execute_roster():
     """Execute the `zoom-manage roster` command to get the current roster."""
-    result = subprocess.run([ZOOM_MANAGE, "roster"], capture_output=True, check=True)
+    result = run_zoom_manage_reply("roster")
     return result
 
 
 @app.post("/cmd_hands")
 def execute_hands():
     """Execute the `zoom-manage hands` command to get participant hands."""
-    result = subprocess.run([ZOOM_MANAGE, "hands"], capture_output=True, check=True)
+    result = run_zoom_manage_reply("hands")
     return result
 
 
 @app.post("/cmd_admit")
 def execute_admit():
-    """Execute the `zoom-manage admit` command to admit participants from the waiting room."""
-    result = subprocess.run([ZOOM_MANAGE, "admit"], capture_output=True, check=True)
-    return result
+    """Admit participants from the waiting room.
+
+    Without a registration list this runs `zoom-manage admit` ("Admit All"). With one,
+    only staff and registered names are admitted, in batches of targeted
+    `zoom-manage admit <names>` commands, and everyone else is held. `admitted` has the
+    names Zoom actually admitted; a batch that fails is reported with its error, and
+    the other batches still run.
+    """
+    if not len(admit_policy):
+        return run_zoom_manage_reply("admit")
+    batches, decisions = admit_policy.plan([name for name, _ in waiting_now()])
+    # Even with nobody to hold, "Admit All" could let in someone who arrived since
+    # the last roster update, so only the checked names are admitted
+    results = []
+    for batch in batches:
+        try:
+            result = run_zoom_manage("admit", *batch)
+        except (subprocess.CalledProcessError, TimeoutError, OSError) as e:
+            results.append({"names": batch, "admitted": [], "error": str(e)})
+            continue
+        reply = (result.stdout + result.stderr).decode(errors="replace")
+        results.append(
+            {"names": batch, "admitted": parse_admitted(reply), "error": None}
+        )
+    return {
+        "admitted": [name for result in results for name in result["admitted"]],
+        "batches": results,
+        "held": [decision for decision in decisions if not decision["admit"]],
+    }
+
+
+@app.get("/admit/policy")
+def preview_admit_policy():
+    """Show what /cmd_admit would do with everyone now in the waiting room."""
+    _, decisions = admit_policy.plan([name for name, _ in waiting_now()])
+    return {"registrations": len(admit_policy), "decisions": decisions}
+
+
+@app.put("/admit/registrations")
+def update_registrations(names: List[str] = Body(...)):
+    """Replace the registration list used by /cmd_admit.
+
+    The list is saved, so it is kept after a restart and used by every worker.
+    """
+    with timed(DB_SECONDS, "save_registrations"):
+        list_id = save_registrations(DATABASE, names)
+    admit_policy.load(names)
+    admit_policy.list_id = list_id
+    return {"message": f"Loaded {len(admit_policy)} registrations."}
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Expose request, database and subprocess metrics in Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def require_admin(request: Request):
+    """Only let requests with the ZOOM_ADMIN_TOKEN bearer token through.
+
+    Without ZOOM_ADMIN_TOKEN, the /admin endpoints are disabled.
+    """
+    token = os.getenv("ZOOM_ADMIN_TOKEN")
+    given = request.headers.get("authorization", "")
+    if not token or not hmac.compare_digest(given.encode(), f"Bearer {token}".encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.post("/admin/profile/start", dependencies=[Depends(require_admin)])
+def start_profile(seconds: float = 30, interval_ms: float = 5):
+    """Start sampling the stacks of every thread for `seconds`."""
+    if not 0 < seconds <= 600 or not 1 <= interval_ms <= 1000:
+        raise HTTPException(
+            status_code=422, detail="Give 0-600 seconds and a 1-1000ms interval"
+        )
+    try:
+        profiler.start(seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return {"message": f"Profiling for {seconds:g} seconds."}
+
+
+@app.post("/admin/profile/stop", dependencies=[Depends(require_admin)])
+def stop_profile():
+    """Stop the profiler and return the profile as collapsed stacks."""
+    return PlainTextResponse(profiler.stop())
+
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+def get_profile():
+    """Return the current or last profile as collapsed stacks."""
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "X-Profile-Running": str(profiler.running).lower(),
+            "X-Profile-Samples": str(profiler.samples),
+        },
+    )
+
+
+@app.post("/admin/memory/snapshot", dependencies=[Depends(require_admin)])
+def snapshot_memory(limit: int = 20):
+    """Start tracing allocations if needed and keep a snapshot to compare with."""
+    return memory_tracer.snapshot(limit)
+
+
+@app.get("/admin/memory/diff", dependencies=[Depends(require_admin)])
+def diff_memory(limit: int = 20):
+    """Compare the allocations now with the last snapshot."""
+    try:
+        return memory_tracer.diff(limit)
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+
+@app.delete("/admin/memory", dependencies=[Depends(require_admin)])
+def stop_memory_tracing():
+    """Stop tracing allocations."""
+    memory_tracer.stop()
+    return {"message": "Memory tracing stopped."}
+
+
+@app.get("/admin/slow", dependencies=[Depends(require_admin)])
+def get_slow_requests():
+    """Return the slowest recent requests with their time breakdown."""
+    return {
+        "enabled": slow_requests.enabled,
+        "threshold_ms": slow_requests.threshold * 1000,
+        "requests": slow_requests.requests(),
+    }
+
+
+@app.put("/admin/slow", dependencies=[Depends(require_admin)])
+def configure_slow_requests(enabled: bool, threshold_ms: float = None):
+    """Switch slow request capture on or off, and set its threshold."""
+    if threshold_ms is not None:
+        slow_requests.threshold = threshold_ms / 1000
+    if enabled and not slow_requests.enabled:
+        slow_requests.clear()
+    slow_requests.enabled = enabled
+    return get_slow_requests()
 
 
 @app.get("/env")
@@ -271,6 +923,7 @@ def get_environment_variables():
     """Retrieve environment variables for the FastAPI application."""
     # Convert the os.environ dict to a regular dict for FastAPI to handle it properly
     env_vars = dict(os.environ)
+    env_vars.pop("ZOOM_ADMIN_TOKEN", None)
     return env_vars
 
 
@@ -279,4 +932,10 @@ if __name__ == "__main__":
     load_dotenv()  # Load the .env file if it exists
     import uvicorn
 
-    uvicorn.run(app, host="localhost", port=5000)
+    workers = int(os.getenv("ZOOM_BACKEND_WORKERS", "1"))
+    if workers > 1:
+        # Every worker process imports this module and keeps its own in-memory state,
+        # kept in step through the database (see notifier.py)
+        uvicorn.run("server:app", host="localhost", port=5000, workers=workers)
+    else:
+        uvicorn.run(app, host="localhost", port=5000)
@@ -0,0 +1,212 @@
+"""
+Roster snapshots for the Zoom meeting tracker API.
+
+The roster lives in memory and SQLite only gets it in groups (see roster.py). When the
+backend is restarted in the middle of a program, loading a large roster back from SQLite
+parses every row again, the updates not written yet are lost, and the version clients
+use for delta sync (/changes) starts over, so every dashboard downloads everything again.
+
+RosterSnapshots writes the roster's columns, its change sequence and the rows not written
+yet to a compressed file every few seconds when the roster changed, and once more on
+shutdown. At startup the file is restored into the roster before the server accepts
+requests, and the rows written to the database after the snapshot are merged in. A
+snapshot that is damaged, or doesn't match the database, is ignored and the roster is
+loaded from the database as before.
+
+Only the snapshot written on shutdown is marked final, and only a final snapshot keeps
+the versions clients hold for /changes valid (see RosterStore.restore). It is removed
+once read, so a crash after the restart can't make it look final again.
+
+File format: MAGIC, then zlib compressed: the length of a JSON header (4 bytes, big
+endian), the header, and for each status in the header its names (UTF-8, separated by NUL
+bytes) and its first_seen, last_seen, roles and changed columns as raw array bytes.
+"""
+
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+
+from metrics import REGISTRY, timed
+
+MAGIC = b"ZOPM roster snapshot 1\n"
+
+SNAPSHOT_SECONDS = REGISTRY.histogram(
+    "zoom_opm_snapshot_seconds",
+    "Time spent writing and reading roster snapshots",
+    ("step",),
+)
+SNAPSHOT_BYTES = REGISTRY.gauge(
+    "zoom_opm_snapshot_bytes", "Size of the latest roster snapshot"
+)
+
+
+def encode_snapshot(state):
+    """Return a RosterStore.snapshot() state as the bytes of a snapshot file"""
+    header = {
+        "id": state["id"],
+        "sequence": state["sequence"],
+        "taken": state["taken"],
+        "final": state.get("final", False),
+        "pending": state["pending"],
+        "byteorder": sys.byteorder,
+        "tables": {},
+    }
+    chunks = []
+    for status, (names, first_seen, last_seen, roles, changed) in state[
+        "tables"
+    ].items():
+        encoded_names = "\0".join(names).encode()
+        header["tables"][status] = [len(names), len(encoded_names)]
+        chunks += [
+            encoded_names,
+            first_seen.tobytes(),
+            last_seen.tobytes(),
+            bytes(roles),
+            changed.tobytes(),
+        ]
+    encoded_header = json.dumps(header).encode()
+    payload = b"".join(
+        [struct.pack(">I", len(encoded_header)), encoded_header, *chunks]
+    )
+    return MAGIC + zlib.compress(payload, 1)
+
+
+def decode_snapshot(data):
+    """Return the RosterStore.snapshot() state of the bytes of a snapshot file
+
+    Raises:
+        ValueError: The data is not a complete snapshot of this format.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a roster snapshot")
+    try:
+        payload = memoryview(zlib.decompress(data[len(MAGIC) :]))
+        (length,) = struct.unpack(">I", payload[:4])
+        header = json.loads(bytes(payload[4 : 4 + length]))
+    except (zlib.error, struct.error) as e:
+        raise ValueError(f"Damaged roster snapshot: {e}") from e
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError("Roster snapshot from a machine with another byte order")
+    offset = 4 + length
+
+    def take(size):
+        nonlocal offset
+        if offset + size > len(payload):
+            raise ValueError("Truncated roster snapshot")
+        chunk = payload[offset : offset + size]
+        offset += size
+        return chunk
+
+    def column(rows):
+        values = array("q")
+        values.frombytes(take(rows * values.itemsize))
+        return values
+
+    tables = {}
+    for status, (rows, names_size) in header["tables"].items():
+        names = bytes(take(names_size)).decode().split("\0") if rows else []
+        tables[status] = (
+            names,
+            column(rows),
+            column(rows),
+            bytearray(take(rows)),
+            column(rows),
+        )
+    if offset != len(payload):
+        raise ValueError("Unexpected data at the end of the roster snapshot")
+    return {
+        "id": header["id"],
+        "sequence": header["sequence"],
+        "taken": header["taken"],
+        "final": header.get("final", False),
+        "tables": tables,
+        "pending": [tuple(key) for key in header["pending"]],
+    }
+
+
+class RosterSnapshots:
+    """Background thread that snapshots a roster every `interval` seconds if it changed"""
+
+    def __init__(self, roster, path, interval=5.0):
+        self.roster = roster
+        self.path = path
+        self.interval = interval
+        self._written = None  # (id, sequence, pending rows) of the latest snapshot
+        self._stop = threading.Event()
+        self._thread = None
+
+    def read(self):
+        """Return the state of the snapshot file for roster.start(), or None
+
+        A final snapshot is removed, since it stops being final once the roster changes.
+        """
+        try:
+            with timed(SNAPSHOT_SECONDS, "read"):
+                with open(self.path, "rb") as f:
+                    state = decode_snapshot(f.read())
+                if state["final"]:
+                    os.remove(self.path)
+                return state
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.getLogger(__name__).warning(
+                "Ignoring the roster snapshot %s: %s", self.path, e
+            )
+            return None
+
+    def write(self, final=False):
+        """Write a snapshot, unless the roster is the same as in the latest one
+
+        Args:
+            final (bool): The roster won't change any more (shutdown).
+
+        Returns:
+            bool: Whether a snapshot was written.
+        """
+        state = self.roster.snapshot()
+        written = (state["id"], state["sequence"], len(state["pending"]))
+        if written == self._written and not final:
+            return False
+        state["final"] = final
+        with timed(SNAPSHOT_SECONDS, "write"):
+            data = encode_snapshot(state)
+            # Replace the file in one step, so a crash leaves the old or the new one
+            partial = f"{self.path}.partial"
+            with open(partial, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(partial, self.path)
+        SNAPSHOT_BYTES.set(value=len(data))
+        self._written = written
+        return True
+
+    def start(self):
+        """Start the snapshot thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="roster-snapshots", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the snapshot thread and write a final snapshot, after roster.stop()"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.write(final=True)
+
+    def _run(self):
+        logger = logging.getLogger(__name__)
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning("Roster snapshot failed, will retry: %s", e)
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+
+"""
+Durable spool between `zoom-manage` and the Zoom meeting tracker API.
+
+zoom-manage sends its roster and filter batches here instead of to the backend (set
+ZOOM_MANAGE_SPOOL=http://localhost:5001). Every PUT or POST is appended to a journal file
+and fsynced before it is acknowledged with 202, so a scrape never waits on the backend.
+A background thread forwards the journal to the backend in order:
+
+- Roster updates (`/waiting`, `/joined` and the list endpoints) are sent with the time
+  they were received here as their `timestamp` query parameter, so a participant seen
+  while the backend was down keeps the time of that scrape rather than the time of the
+  replay. Consecutive `/waiting_list` or `/joined_list` batches received within
+  `merge_window` seconds of each other are merged into one request of up to `max_batch`
+  names, sent with the time of the latest one; batches further apart are sent apart.
+  Pass batches (filters, scan) are sent as they came, since their `complete` flag
+  matters. They carry the time the pass started as the `timestamp` in their body, and a
+  `/scan` batch without one gets the time it was received here.
+- Connection errors and 5xx responses are retried with exponential backoff, and 429
+  (the backend's ingest limit, see throttle.py) after its Retry-After time. Any other
+  4xx response will not succeed on retry, so that entry is dropped and logged.
+- The position of the first unforwarded entry is kept in `<journal>.offset`, so a
+  restarted spool resumes where it left off. The journal is truncated once it is fully
+  forwarded.
+- When `max_pending` entries are waiting, new requests get 503 with Retry-After.
+
+`GET /spool/status` and `GET /metrics` report the lag.
+
+Usage:
+    python3 backend/spool.py [--port 5001] [--backend http://localhost:5000]
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics import CONTENT_TYPE, REGISTRY
+
+LIST_ENDPOINTS = ("/waiting_list", "/joined_list")
+ROSTER_ENDPOINTS = ("/waiting", "/joined") + LIST_ENDPOINTS
+# Pass batches take their timestamp in the body
+PASS_ENDPOINTS = ("/scan",)
+
+PENDING = REGISTRY.gauge("zoom_opm_spool_pending", "Requests waiting to be forwarded")
+LAG_SECONDS = REGISTRY.gauge(
+    "zoom_opm_spool_lag_seconds", "Age of the oldest request waiting to be forwarded"
+)
+FORWARDED = REGISTRY.counter(
+    "zoom_opm_spool_forwarded_total", "Spooled requests by outcome", ("outcome",)
+)
+
+
+class SpoolFull(Exception):
+    """The spool has max_pending requests waiting"""
+
+
+def seen_at(entry):
+    """Return the time a journal entry was received, in the backend's format"""
+    return datetime.fromtimestamp(entry["time"]).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def stamped(entry):
+    """Return the path to forward a journal entry to, with its time if it is a roster
+    update"""
+    path = entry["path"]
+    if path not in ROSTER_ENDPOINTS:
+        return path
+    return f"{path}?{urllib.parse.urlencode({'timestamp': seen_at(entry)})}"
+
+
+def stamped_body(entry):
+    """Return the body to forward a journal entry with, with its time if it is a pass
+    batch without a timestamp"""
+    if entry["path"] not in PASS_ENDPOINTS:
+        return entry["body"]
+    try:
+        body = json.loads(entry["body"])
+    except ValueError:
+        return entry["body"]  # Let the backend reject it
+    if not isinstance(body, dict) or body.get("timestamp"):
+        return entry["body"]
+    return json.dumps({**body, "timestamp": seen_at(entry)})
+
+
+class Spool:
+    """Journal of requests for the backend, forwarded by a background thread"""
+
+    def __init__(
+        self,
+        journal,
+        backend,
+        max_pending=10000,
+        max_batch=500,
+        merge_window=2.0,
+        timeout=5,
+        max_backoff=30,
+    ):
+        self.journal = journal
+        self.offset_path = journal + ".offset"
+        self.backend = backend.rstrip("/")
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.merge_window = merge_window
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._queue = deque()  # (end offset, entry)
+        self._offset = 0
+        self._file = None
+        self.last_error = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.offset_path) as f:
+                self._offset = int(f.read().strip() or 0)
+        except FileNotFoundError:
+            self._offset = 0
+        if os.path.exists(self.journal):
+            if self._offset > os.path.getsize(self.journal):
+                # The journal was truncated before the offset was saved
+                self._offset = 0
+            with open(self.journal, "rb") as f:
+                f.seek(self._offset)
+                position = self._offset
+                for line in f:
+                    position += len(line)
+                    if not line.endswith(b"\n"):
+                        break  # A torn write from a crash was never acknowledged
+                    self._queue.append((position, json.loads(line)))
+        self._file = open(self.journal, "ab")
+        self._update_gauges()
+
+    def append(self, method, path, body):
+        """Write a request to the journal and queue it for forwarding.
+
+        Raises:
+            SpoolFull: If max_pending requests are already waiting.
+        """
+        entry = {"time": time.time(), "method": method, "path": path, "body": body}
+        line = (json.dumps(entry) + "\n").encode()
+        with self._lock:
+            if len(self._queue) >= self.max_pending:
+                raise SpoolFull(f"{len(self._queue)} requests are waiting")
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._queue.append((self._file.tell(), entry))
+            self._update_gauges()
+        self._wake.set()
+
+    def status(self):
+        """Return the number of waiting requests, the lag and the last error"""
+        with self._lock:
+            oldest = self._queue[0][1]["time"] if self._queue else None
+            return {
+                "pending": len(self._queue),
+                "lag_seconds": round(time.time() - oldest, 3) if oldest else 0,
+                "backend": self.backend,
+                "last_error": self.last_error,
+            }
+
+    def _update_gauges(self):
+        PENDING.set(value=len(self._queue))
+        oldest = self._queue[0][1]["time"] if self._queue else None
+        LAG_SECONDS.set(value=time.time() - oldest if oldest else 0)
+
+    def _next_request(self):
+        """Return (entries used, method, path, body) for the next request to send"""
+        with self._lock:
+            if not self._queue:
+                return 0, None, None, None
+            _, first = self._queue[0]
+            if first["path"] not in LIST_ENDPOINTS:
+                return 1, first["method"], stamped(first), stamped_body(first)
+            names = {}
+            used = 0
+            last = first
+            for _, entry in self._queue:
+                if (
+                    entry["path"] != first["path"]
+                    or entry["time"] - first["time"] > self.merge_window
+                ):
+                    break
+                try:
+                    batch = json.loads(entry["body"])
+                except ValueError:
+                    batch = None
+                if not isinstance(batch, list):
+                    if not used:
+                        # Let the backend reject it, rather than holding up the queue
+                        return 1, first["method"], stamped(first), first["body"]
+                    break
+                if names and len(names) + len(batch) > self.max_batch:
+                    break
+                names.update(dict.fromkeys(batch))
+                used += 1
+                last = entry
+            return used, first["method"], stamped(last), json.dumps(list(names))
+
+    def forward_once(self):
+        """Send the next request to the backend.
+
+        Returns:
+            int: The number of journal entries it covered, 0 if there was nothing to send.
+
+        Raises:
+            OSError: If the backend could not be reached or answered with a 5xx or 429
+                status.
+        """
+        used, method, path, body = self._next_request()
+        if not used:
+            return 0
+        request = urllib.request.Request(
+            self.backend + path,
+            data=body.encode(),
+            method=method,
+            headers={"Content-Type": "application/json"},
+        )
+        outcome = "sent"
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except urllib.error.HTTPError as e:
+            if e.code >= 500 or e.code == 429:
+                raise
+            outcome = "dropped"
+            logging.getLogger(__name__).error(
+                "Dropping %s %s after %s: %s", method, path, e.code, body[:200]
+            )
+        self._advance(used)
+        FORWARDED.inc(outcome, amount=used)
+        return used
+
+    def _advance(self, used):
+        with self._lock:
+            for _ in range(used):
+                self._offset, _ = self._queue.popleft()
+            if not self._queue:
+                # Everything is forwarded, so start a new journal
+                self._file.truncate(0)
+                self._offset = 0
+            tmp = self.offset_path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(str(self._offset))
+            os.replace(tmp, self.offset_path)
+            self._update_gauges()
+
+    def start(self):
+        """Start forwarding in a background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="spool-forwarder", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop forwarding; entries not yet forwarded stay in the journal"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._file.close()
+
+    def _run(self):
+        logger = logging.getLogger(__name__)
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                sent = self.forward_once()
+            except OSError as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                retry_after = getattr(e, "headers", None) and e.headers.get(
+                    "Retry-After"
+                )
+                if retry_after and retry_after.isdigit():
+                    # Over the ingest limit: the backend says when to come back
+                    logger.info("Backend busy, retrying in %ss", retry_after)
+                    self._stop.wait(int(retry_after))
+                    continue
+                logger.warning("Backend unavailable, retrying in %.1fs: %s", backoff, e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = 0.5
+            if sent:
+                self.last_error = None
+            else:
+                self._wake.wait(1)
+                self._wake.clear()
+                with self._lock:
+                    self._update_gauges()
+
+
+class SpoolHandler(BaseHTTPRequestHandler):
+    """Acknowledge PUT and POST requests once they are in the journal"""
+
+    spool = None  # set by serve()
+
+    def _reply(self, status, body, content_type="application/json", headers=()):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _spool(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode()
+        try:
+            self.spool.append(self.command, self.path, body)
+        except SpoolFull as e:
+            self._reply(
+                503, json.dumps({"detail": str(e)}), headers=[("Retry-After", "5")]
+            )
+            return
+        self._reply(202, json.dumps({"message": "Queued."}))
+
+    do_PUT = _spool
+    do_POST = _spool
+
+    def do_GET(self):
+        if self.path == "/spool/status":
+            self._reply(200, json.dumps(self.spool.status()))
+        elif self.path == "/metrics":
+            with self.spool._lock:
+                self.spool._update_gauges()
+            self._reply(200, REGISTRY.render(), CONTENT_TYPE)
+        else:
+            self._reply(404, json.dumps({"detail": "Not Found"}))
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format, *args)
+
+
+def serve(spool, host="localhost", port=5001):
+    """Return an HTTP server that spools requests for `spool`"""
+    handler = type("Handler", (SpoolHandler,), {"spool": spool})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--port", type=int, default=5001, help="Port to listen on")
+    parser.add_argument(
+        "--backend", default="http://localhost:5000", help="Backend server URL"
+    )
+    parser.add_argument(
+        "--journal", default="spool.jsonl", help="Journal file for waiting requests"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    spool = Spool(args.journal, args.backend)
+    spool.start()
+    server = serve(spool, port=args.port)
+    logging.info(
+        "Spooling on http://localhost:%d for %s (%d pending)",
+        args.port,
+        args.backend,
+        spool.status()["pending"],
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        spool.stop()
+
+
+if __name__ == "__main__":
+    main()
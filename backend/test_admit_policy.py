@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the waiting room admission policy in admit_policy.py.
+"""
+
+import time
+import unittest
+
+from admit_policy import AdmitPolicy, parse_admitted
+
+
+class TestAdmitPolicy(unittest.TestCase):
+    """Staff and registered names are admitted, everyone else is held."""
+
+    def setUp(self):
+        self.policy = AdmitPolicy(["Jane Doe", "John Smith", "José Müller"])
+
+    def test_registered(self):
+        """Case, accents, emoji and word order do not matter."""
+        self.assertEqual(
+            self.policy.decide("JANE DOE"), (True, "registered", "Jane Doe")
+        )
+        self.assertEqual(
+            self.policy.decide("Jose Muller 🌟"), (True, "registered", "José Müller")
+        )
+        self.assertEqual(
+            self.policy.decide("Doe, Jane"), (True, "registered", "Jane Doe")
+        )
+
+    def test_staff_and_fuzzy(self):
+        """Staff are admitted, close spellings too, and unknown names are held."""
+        self.assertEqual(self.policy.decide("#Kayvan"), (True, "staff", None))
+        admit, reason, match = self.policy.decide("Jon Smith")
+        self.assertTrue(admit)
+        self.assertTrue(reason.startswith("similar"))
+        self.assertEqual(match, "John Smith")
+        self.assertFalse(self.policy.decide("John")[0])
+        self.assertEqual(
+            self.policy.decide("Random Visitor"), (False, "not registered", None)
+        )
+
+    def test_plan_batches(self):
+        """Admitted names are split into batches in arrival order."""
+        batches, decisions = self.policy.plan(
+            ["Jane Doe", "Stranger", "@Interpreter", "John Smith"], batch_size=2
+        )
+        self.assertEqual(batches, [["Jane Doe", "@Interpreter"], ["John Smith"]])
+        self.assertEqual([d["name"] for d in decisions if not d["admit"]], ["Stranger"])
+
+    def test_large_list(self):
+        """Deciding a waiting room surge against a large list stays fast."""
+        self.policy.load([f"Attendee {i} Example" for i in range(20000)])
+        start = time.perf_counter()
+        batches, _ = self.policy.plan([f"attendee {i} example" for i in range(1000)])
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(sum(len(batch) for batch in batches), 1000)
+
+
+class TestParseAdmitted(unittest.TestCase):
+    """The names admitted are read from the command's reply."""
+
+    def test_reply(self):
+        """Only the names after the count line are returned."""
+        reply = "Pushed 2 names\n2 of 3 admitted\tJane Doe\tJohn Smith\n"
+        self.assertEqual(parse_admitted(reply), ["Jane Doe", "John Smith"])
+        self.assertEqual(parse_admitted("0 of 2 admitted"), [])
+        self.assertEqual(parse_admitted("Nobody is waiting"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
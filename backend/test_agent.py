@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the zoom-manage agent client in agent.py.
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from agent import AgentClient, AgentUnavailable
+
+
+class FakeAgent(threading.Thread):
+    """Answers requests on the named pipes the way `zoom-manage agent` does."""
+
+    def __init__(self, directory, replies):
+        super().__init__(daemon=True)
+        self.directory = directory
+        self.replies = replies
+        self.requests = []
+
+    def run(self):
+        for reply in self.replies:
+            request = []
+            # Like the agent, skip empty reads (the last writer closed after the reply)
+            while len(request) < 2:
+                with open(os.path.join(self.directory, "agent.in")) as f:
+                    request = f.readline().rstrip("\n").split("\t")
+            self.requests.append(request[1:])
+            with open(os.path.join(self.directory, "agent.out"), "w") as f:
+                f.write(reply.replace("{id}", request[0]) + "\n")
+
+
+class TestAgentClient(unittest.TestCase):
+    """Commands go over the named pipes while an agent is running."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+        self.client = AgentClient(self.directory, timeout=5, poll_interval=0.01)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def start_agent(self, replies):
+        """Create the pipes and pid file and start a fake agent."""
+        os.mkfifo(os.path.join(self.directory, "agent.in"))
+        os.mkfifo(os.path.join(self.directory, "agent.out"))
+        with open(os.path.join(self.directory, "agent.pid"), "w") as f:
+            f.write(f"{os.getpid()}\n")
+        fake = FakeAgent(self.directory, replies)
+        fake.start()
+        return fake
+
+    def test_unavailable_without_agent(self):
+        """Without a live agent the caller is told to fall back."""
+        with self.assertRaises(AgentUnavailable):
+            self.client.run("roster")
+        with open(os.path.join(self.directory, "agent.pid"), "w") as f:
+            f.write("not a pid\n")
+        self.assertFalse(self.client.running())
+
+    def test_run(self):
+        """The command and its arguments are sent, and the status returned."""
+        fake = self.start_agent(["{id}\t0\tok", "{id}\t1\tError: no meeting"])
+        self.assertEqual(self.client.run("roster"), (0, "ok"))
+        self.assertEqual(
+            self.client.run("rename", "Old Name", "New Name"),
+            (1, "Error: no meeting"),
+        )
+        fake.join(5)
+        self.assertEqual(
+            fake.requests, [["roster"], ["rename", "Old Name", "New Name"]]
+        )
+
+    def test_stale_reply_skipped(self):
+        """A reply left over from an earlier request is ignored."""
+        self.start_agent(["0-0\t0\tlate\n{id}\t0\tok"])
+        self.assertEqual(self.client.run("hands"), (0, "ok"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the dashboard asset store in assets.py.
+"""
+
+import gzip
+import os
+import tempfile
+import unittest
+
+from assets import AssetStore, accepted_encodings, cdn_urls, vendor_name
+
+VUE = "https://cdn.jsdelivr.net/npm/vue@2.6.14/dist/vue.js"
+AXIOS = "https://cdn.jsdelivr.net/npm/axios@1.5.1/dist/axios.min.js"
+
+INDEX = f"""<!doctype html>
+<html><head>
+<script src="{VUE}"></script>
+<!-- <script src="https://cdn.jsdelivr.net/npm/vue@3.3.4/dist/vue.js"></script> -->
+<script src="{AXIOS}"></script>
+</head><body><img src="./logo.png"></body></html>
+"""
+
+
+class TestAssetStore(unittest.TestCase):
+    """Vendored files replace CDN URLs and are served hashed and compressed."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.write("index.html", INDEX.encode())
+        self.write("logo.png", b"\x89PNG" + bytes(100))
+        os.mkdir(os.path.join(self.tmp.name, "vendor"))
+        self.write(os.path.join("vendor", vendor_name(VUE)), b"var Vue = 1;\n" * 500)
+        self.store = AssetStore(self.tmp.name)
+        self.store.load()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, body):
+        with open(os.path.join(self.tmp.name, name), "wb") as f:
+            f.write(body)
+
+    def page(self):
+        return self.store.index.response({}).body.decode()
+
+    def static_name(self, prefix):
+        page = self.page()
+        start = page.index(f"/static/{prefix}") + len("/static/")
+        return page[start : page.index('"', start)]
+
+    def test_urls(self):
+        """CDN URLs are found, commented-out ones are not."""
+        self.assertEqual(cdn_urls(INDEX), [VUE, AXIOS])
+        self.assertEqual(vendor_name(VUE), "vue@2.6.14-vue.js")
+
+    def test_page(self):
+        """Vendored libraries and local files point at hashed names, others stay."""
+        page = self.page()
+        self.assertNotIn(VUE, page)
+        self.assertIn(AXIOS, page)
+        self.assertEqual(self.store.vendored, [VUE])
+        self.assertRegex(
+            self.static_name("vue"), r"^vue@2\.6\.14-vue\.[0-9a-f]{10}\.js$"
+        )
+        self.assertRegex(self.static_name("logo"), r"^logo\.[0-9a-f]{10}\.png$")
+        self.assertEqual(self.store.index.cache_control, "no-cache")
+
+    def test_compressed_and_cached(self):
+        """Text files are sent compressed when accepted, with a long cache lifetime."""
+        asset = self.store.get(self.static_name("vue"))
+        response = asset.response({"accept-encoding": "gzip, deflate"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.body), b"var Vue = 1;\n" * 500)
+        self.assertIn("immutable", response.headers["cache-control"])
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        plain = asset.response({})
+        self.assertNotIn("content-encoding", plain.headers)
+        self.assertNotEqual(plain.headers["etag"], response.headers["etag"])
+        # Images are not compressed again
+        logo = self.store.get(self.static_name("logo")).response(
+            {"accept-encoding": "gzip"}
+        )
+        self.assertNotIn("content-encoding", logo.headers)
+
+    def test_not_modified(self):
+        """A request with the current ETag gets an empty 304."""
+        asset = self.store.get(self.static_name("vue"))
+        etag = asset.response({"accept-encoding": "gzip"}).headers["etag"]
+        response = asset.response(
+            {"accept-encoding": "gzip", "if-none-match": f'W/"x", {etag}'}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.body, b"")
+
+    def test_accepted_encodings(self):
+        """Codings with q=0 are not acceptable."""
+        self.assertEqual(accepted_encodings("br;q=0, gzip;q=0.5"), {"gzip"})
+        self.assertEqual(accepted_encodings(""), {""})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the breakout room planner in breakout_planner.py.
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from breakout_planner import (
+    init_breakout,
+    load_rounds,
+    plan_rooms,
+    plan_text,
+    save_round,
+)
+
+
+class TestPlanRooms(unittest.TestCase):
+    """Rooms are balanced, staff spread out, groups kept and repeats avoided."""
+
+    def test_balanced(self):
+        """Participants are split as evenly as the rooms allow."""
+        names = [f"Person {i}" for i in range(10)]
+        plan, repeats = plan_rooms(names, ["A", "B", "C"])
+        self.assertEqual(sorted(len(room) for room in plan.values()), [3, 3, 4])
+        self.assertEqual(sorted(sum(plan.values(), [])), sorted(names))
+        self.assertEqual(repeats, 0)
+
+    def test_staff_spread(self):
+        """Each room gets one of the "@" or "#" staff before anyone gets two."""
+        names = [f"Person {i}" for i in range(9)] + ["#Staff 1", "@Staff 2", "#Staff 3"]
+        plan, _ = plan_rooms(names, ["A", "B", "C"])
+        for room in plan.values():
+            self.assertEqual(sum(name[0] in "#@" for name in room), 1)
+
+    def test_groups_kept_together(self):
+        """A keep-together group lands in one room, and absent members are ignored."""
+        names = [f"Person {i}" for i in range(8)]
+        plan, _ = plan_rooms(
+            names, ["A", "B"], groups=[["Person 1", "Person 6", "Not Here"]]
+        )
+        rooms = [room for room in plan.values() if "Person 1" in room]
+        self.assertIn("Person 6", rooms[0])
+        self.assertNotIn("Not Here", sum(plan.values(), []))
+
+    def test_repeats_avoided(self):
+        """People who shared a room in an earlier round are split up."""
+        names = ["Amy", "Bob", "Cat", "Dan"]
+        history = [[["Amy", "Bob"], ["Cat", "Dan"]]]
+        plan, repeats = plan_rooms(names, ["A", "B"], history=history)
+        self.assertEqual(repeats, 0)
+        for room in plan.values():
+            self.assertFalse({"Amy", "Bob"} <= set(room))
+            self.assertFalse({"Cat", "Dan"} <= set(room))
+
+    def test_does_not_fit(self):
+        """Too little capacity, or a group larger than a room, is an error."""
+        with self.assertRaises(ValueError):
+            plan_rooms(["Amy", "Bob", "Cat"], ["A"], capacity=2)
+        with self.assertRaises(ValueError):
+            plan_rooms(
+                ["Amy", "Bob", "Cat"], ["A", "B"], groups=[["Amy", "Bob", "Cat"]]
+            )
+
+    def test_large_roster(self):
+        """Thousands of participants with history are planned quickly."""
+        names = [f"Person {i}" for i in range(5000)]
+        rooms = [f"Room {i}" for i in range(200)]
+        first, _ = plan_rooms(names, rooms)
+        start = time.perf_counter()
+        plan, _ = plan_rooms(names, rooms, history=[list(first.values())])
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(max(len(room) for room in plan.values()), 25)
+
+
+class TestStoredRounds(unittest.TestCase):
+    """Plans are stored per round and formatted for zoom-manage."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, "zoom_meeting.db")
+        with sqlite3.connect(self.database) as conn:
+            init_breakout(conn)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rounds(self):
+        """Each saved plan gets the next round number."""
+        self.assertEqual(save_round(self.database, {"A": ["Amy"], "B": ["Bob"]}), 1)
+        self.assertEqual(save_round(self.database, {"A": ["Bob"], "B": ["Amy"]}), 2)
+        self.assertEqual(load_rounds(self.database)[2], {"A": ["Bob"], "B": ["Amy"]})
+
+    def test_plan_text(self):
+        """Lines starting with "#" are escaped like in the breakout files."""
+        text = plan_text({"Room 1": ["Amy", "#Staff"], "# Huddle": ["Bob"]})
+        self.assertEqual(text, "Room 1->Amy\nRoom 1->#Staff\n\\# Huddle->Bob\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
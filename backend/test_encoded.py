@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the pre-encoded JSON responses in encoded.py.
+"""
+
+import gzip
+import json
+import unittest
+
+from encoded import EncodedCache, encode_json
+
+
+class TestEncodedCache(unittest.TestCase):
+    """Responses are encoded once per version and served compressed."""
+
+    def setUp(self):
+        self.rendered = []
+        self.content = {f"Participant {i}": {"first_seen": "x"} for i in range(100)}
+        self.cache = EncodedCache(self.render)
+
+    def render(self, key):
+        self.rendered.append(key)
+        return self.content
+
+    def test_encode_json(self):
+        """Output is compact UTF-8, like FastAPI's JSONResponse."""
+        self.assertEqual(encode_json({"José": [1, None]}), '{"José":[1,null]}'.encode())
+
+    def test_encoded_once_per_version(self):
+        """The same version is served from the cache, a new one is encoded again."""
+        first = self.cache.get("joined", 1)
+        self.assertIs(self.cache.get("joined", 1), first)
+        self.assertEqual(self.rendered, ["joined"])
+        self.content = {}
+        self.assertEqual(self.cache.get("joined", 2).body, b"{}")
+        self.cache.get("waiting", 2)
+        self.assertEqual(self.rendered, ["joined", "joined", "waiting"])
+
+    def test_negotiation(self):
+        """Compressed bytes are sent to clients that accept them, with an ETag."""
+        encoded = self.cache.get("joined", 1)
+        response = encoded.response({"accept-encoding": "gzip"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.body)), self.content)
+        self.assertEqual(response.headers["cache-control"], "no-cache")
+        plain = encoded.response({})
+        self.assertEqual(json.loads(plain.body), self.content)
+        self.assertEqual(plain.media_type, "application/json")
+        cached = encoded.response({"if-none-match": plain.headers["etag"]})
+        self.assertEqual(cached.status_code, 304)
+
+
+if __name__ == "__main__":
+    unittest.main()
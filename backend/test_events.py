@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the role change event lifecycle in events.py.
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from events import (
+    archive_events,
+    compact_events,
+    enable_incremental_vacuum,
+    incremental_vacuum,
+    init_events,
+)
+
+EVENTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    old_role TEXT,
+    new_role TEXT
+)
+"""
+
+NOW = datetime(2024, 5, 1, 12, 0, 0)
+
+
+class TestEvents(unittest.TestCase):
+    """Role flip-flops are compacted, archived and their pages released."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, "zoom_meeting.db")
+        with sqlite3.connect(self.database) as conn:
+            enable_incremental_vacuum(conn)
+            conn.execute(EVENTS_SCHEMA)
+            init_events(conn)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def add(self, name, time, old_role, new_role):
+        with sqlite3.connect(self.database) as conn:
+            conn.execute(
+                "INSERT INTO events (name, timestamp, old_role, new_role) "
+                "VALUES (?, ?, ?, ?)",
+                (name, f"2024-05-01 {time}", old_role, new_role),
+            )
+
+    def query(self, sql):
+        with sqlite3.connect(self.database) as conn:
+            return conn.execute(sql).fetchall()
+
+    def test_compact_bursts(self):
+        """Changes less than a window apart become one row with the net change."""
+        self.add("Jane", "10:00:00", "attendee", "co-host")
+        self.add("Jane", "10:00:20", "co-host", "attendee")
+        self.add("Jane", "10:00:50", "attendee", "co-host")
+        self.add("Jane", "10:30:00", "co-host", "host")
+        self.add("John", "10:00:10", "attendee", "host")
+        self.add("John", "11:58:00", "host", "attendee")  # not settled yet
+        self.assertEqual(compact_events(self.database, 60, 300, now=NOW), 5)
+        self.assertEqual(
+            self.query(
+                "SELECT name, substr(first_seen, 12), substr(last_seen, 12), "
+                "old_role, new_role, changes FROM role_changes ORDER BY name, first_seen"
+            ),
+            [
+                ("Jane", "10:00:00", "10:00:50", "attendee", "co-host", 3),
+                ("Jane", "10:30:00", "10:30:00", "co-host", "host", 1),
+                ("John", "10:00:10", "10:00:10", "attendee", "host", 1),
+            ],
+        )
+        self.assertEqual(self.query("SELECT name FROM events"), [("John",)])
+
+    def test_compact_continues_burst(self):
+        """A burst split by an earlier compaction is continued, not duplicated."""
+        self.add("Jane", "10:00:00", "attendee", "co-host")
+        compact_events(self.database, 60, 300, now=datetime(2024, 5, 1, 10, 5, 30))
+        self.add("Jane", "10:00:40", "co-host", "attendee")
+        compact_events(self.database, 60, 300, now=NOW)
+        self.assertEqual(
+            self.query("SELECT old_role, new_role, changes FROM role_changes"),
+            [("attendee", "attendee", 2)],
+        )
+
+    def test_archive(self):
+        """Archived role changes and events are moved to a compressed file."""
+        self.add("Jane", "10:00:00", "attendee", "co-host")
+        compact_events(self.database, 60, 300, now=NOW)
+        self.add("John", "11:59:00", "attendee", "host")
+        path = os.path.join(self.tmp.name, "events.jsonl.gz")
+        self.assertEqual(archive_events(self.database, path), 2)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r["type"] for r in records], ["role_change", "event"])
+        self.assertEqual(records[1]["name"], "John")
+        self.assertEqual(self.query("SELECT * FROM events"), [])
+        self.assertEqual(self.query("SELECT * FROM role_changes"), [])
+        # Nothing left, no empty file
+        os.remove(path)
+        self.assertEqual(archive_events(self.database, path), 0)
+        self.assertFalse(os.path.exists(path))
+
+    def test_incremental_vacuum(self):
+        """Pages freed by deleting events are returned to the file system."""
+        for i in range(2000):
+            self.add(f"Participant {i}", "10:00:00", "attendee", "co-host" * 20)
+        self.query("DELETE FROM events")
+        size = os.path.getsize(self.database)
+        self.assertGreater(self.query("PRAGMA freelist_count")[0][0], 0)
+        self.assertEqual(incremental_vacuum(self.database, pages=100000), 0)
+        self.assertLess(os.path.getsize(self.database), size)
+
+    def test_enable_on_existing_database(self):
+        """An existing database is switched to incremental vacuum once."""
+        path = os.path.join(self.tmp.name, "old.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(EVENTS_SCHEMA)
+        with sqlite3.connect(path) as conn:
+            enable_incremental_vacuum(conn)
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone(), (2,))
+
+
+if __name__ == "__main__":
+    unittest.main()
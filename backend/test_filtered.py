@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the filtered rosters in filtered.py.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from filtered import (
+    filters_for,
+    get_filtered,
+    init_filtered,
+    normalize_timestamp,
+    update_filtered,
+    update_scan,
+)
+
+
+class TestTimestamps(unittest.TestCase):
+    """Both the database and the zoom-manage date formats are accepted."""
+
+    def test_formats(self):
+        """MM/DD/YYYY timestamps are converted to the database format."""
+        self.assertEqual(
+            normalize_timestamp("03/05/2024 09:08:07"), "2024-03-05 09:08:07"
+        )
+        self.assertEqual(
+            normalize_timestamp("2024-03-05 09:08:07"), "2024-03-05 09:08:07"
+        )
+        with self.assertRaises(ValueError):
+            normalize_timestamp("yesterday")
+
+
+class TestFilteredRoster(unittest.TestCase):
+    """Batches keep the current set per filter in order of first seen."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, "zoom_meeting.db")
+        with sqlite3.connect(self.database) as conn:
+            init_filtered(conn)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def names(self, filter_name="hands"):
+        """Return the names for a filter in order."""
+        return [row[0] for row in get_filtered(self.database, filter_name)]
+
+    def test_order_of_first_seen(self):
+        """Participants keep their first_seen across passes."""
+        update_filtered(
+            self.database, "hands", ["Zed", "Amy"], "p1", "2024-01-01 10:00:00", True
+        )
+        update_filtered(
+            self.database,
+            "hands",
+            ["Bob", "Zed", "Amy"],
+            "p2",
+            "2024-01-01 10:01:00",
+            True,
+        )
+        self.assertEqual(self.names(), ["Zed", "Amy", "Bob"])
+        rows = get_filtered(self.database, "hands")
+        self.assertEqual(rows[0], ("Zed", "2024-01-01 10:00:00", "2024-01-01 10:01:00"))
+
+    def test_complete_pass_removes_missing(self):
+        """A complete pass drops participants it did not see."""
+        update_filtered(
+            self.database, "hands", ["Zed", "Amy"], "p1", "2024-01-01 10:00:00", True
+        )
+        _, removed = update_filtered(
+            self.database, "hands", ["Amy"], "p2", "2024-01-01 10:01:00", True
+        )
+        self.assertEqual(removed, 1)
+        self.assertEqual(self.names(), ["Amy"])
+
+    def test_batches_of_one_pass(self):
+        """Participants are only removed once the last batch arrives."""
+        update_filtered(
+            self.database, "hands", ["Zed", "Amy"], "p1", "2024-01-01 10:00:00", True
+        )
+        update_filtered(
+            self.database, "hands", ["Amy"], "p2", "2024-01-01 10:01:00", False
+        )
+        self.assertEqual(self.names(), ["Zed", "Amy"])
+        update_filtered(self.database, "hands", [], "p2", "2024-01-01 10:01:00", True)
+        self.assertEqual(self.names(), ["Amy"])
+
+    def test_overlapping_passes(self):
+        """A complete pass keeps what a pass started at the same time or later saw."""
+        update_filtered(
+            self.database, "hands", ["Old"], "p0", "2024-01-01 09:59:00", True
+        )
+        update_filtered(
+            self.database, "hands", ["Amy"], "p1", "2024-01-01 10:00:00", False
+        )
+        update_filtered(
+            self.database, "hands", ["Bob"], "p2", "2024-01-01 10:00:00", True
+        )
+        self.assertEqual(self.names(), ["Amy", "Bob"])
+        # A late batch of an earlier pass doesn't hand its rows back to that pass
+        update_filtered(
+            self.database, "hands", ["Bob"], "p3", "2024-01-01 10:01:00", False
+        )
+        update_filtered(
+            self.database, "hands", ["Bob"], "p1", "2024-01-01 10:00:00", True
+        )
+        self.assertEqual(self.names(), ["Amy", "Bob"])
+        update_filtered(self.database, "hands", [], "p3", "2024-01-01 10:01:00", True)
+        self.assertEqual(
+            get_filtered(self.database, "hands"),
+            [("Bob", "2024-01-01 10:00:00", "2024-01-01 10:01:00")],
+        )
+
+    def test_filters_independent_and_roles_stripped(self):
+        """Filters do not affect each other, and role suffixes are removed."""
+        update_filtered(
+            self.database,
+            "camera_on",
+            ["Jane Doe (Host, me)"],
+            "p1",
+            "2024-01-01 10:00:00",
+            True,
+        )
+        update_filtered(self.database, "hands", [], "p1", "2024-01-01 10:00:00", True)
+        self.assertEqual(self.names("camera_on"), ["Jane Doe"])
+        self.assertEqual(self.names("hands"), [])
+
+
+class TestScan(unittest.TestCase):
+    """Scan records are split into the filtered rosters."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, "zoom_meeting.db")
+        with sqlite3.connect(self.database) as conn:
+            init_filtered(conn)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_filters_for(self):
+        """Each record field maps to the filter command of the same meaning."""
+        self.assertEqual(
+            filters_for({"hand": True, "video": "on", "audio": "muted"}),
+            ["hands", "camera_on", "muted"],
+        )
+        self.assertEqual(
+            filters_for({"hand": False, "phone": True, "video": "", "audio": "none"}),
+            ["phone", "no_audio"],
+        )
+        self.assertEqual(filters_for({"video": "off"}), ["camera_off"])
+
+    def test_update_scan(self):
+        """A complete scan pass sets every filter, including empty ones."""
+        update_filtered(
+            self.database, "phone", ["Old Caller"], "p0", "2024-01-01 09:00:00", True
+        )
+        counts = update_scan(
+            self.database,
+            [
+                {"name": "Amy", "hand": True, "video": "on", "audio": "unmuted"},
+                {"name": "Bob (Host)", "video": "off", "audio": "muted"},
+            ],
+            "p1",
+            "2024-01-01 10:00:00",
+            True,
+        )
+        self.assertEqual(counts["hands"], 1)
+        self.assertEqual(counts["phone"], 0)
+        names = {
+            name: [row[0] for row in get_filtered(self.database, name)]
+            for name in ("hands", "camera_on", "camera_off", "muted", "phone")
+        }
+        self.assertEqual(
+            names,
+            {
+                "hands": ["Amy"],
+                "camera_on": ["Amy"],
+                "camera_off": ["Bob"],
+                "muted": ["Bob"],
+                "phone": [],
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the attendee history in history.py.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from history import HistoryStore, identity_key, load_renames
+
+
+def row(name, status, first_seen, last_seen, co_host=0):
+    """Return an archived participants row; times are "DD HH:MM:SS" in March 2024"""
+    return (name, status, f"2024-03-{first_seen}", f"2024-03-{last_seen}", 0, co_host)
+
+
+class TestIdentity(unittest.TestCase):
+    """Spellings of one participant's name share an identity."""
+
+    def test_identity_key(self):
+        """Roles, staff prefixes, case, accents and emoji are ignored."""
+        self.assertEqual(identity_key("José Müller (Host, me)"), "jose muller")
+        self.assertEqual(identity_key("@Jose MULLER 🌟"), "jose muller")
+
+    def test_load_renames(self):
+        """Mapping lines link the new name to the old one; comments are skipped."""
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("# staff\nBob Smith->#Robert Smith\n\n\\# Lead->Leader\n")
+        try:
+            self.assertEqual(
+                load_renames(f.name), {"robert smith": "bob smith", "leader": "lead"}
+            )
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(load_renames(None), {})
+
+
+class TestHistoryStore(unittest.TestCase):
+    """Archives are ingested once and answer per-person queries."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.meeting = os.path.join(self.tmp.name, "zoom_meeting.db")
+        self.history = HistoryStore(
+            os.path.join(self.tmp.name, "zoom_history.db"),
+            renames={"robert smith": "bob smith"},
+        )
+        self.history.init()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def archive(self, stamp, rows):
+        """Write an archive like reset_db() does and return its path"""
+        path = os.path.join(self.tmp.name, f"zoom_meeting-{stamp}.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "CREATE TABLE participants (name TEXT, status TEXT, first_seen TEXT, "
+                "last_seen TEXT, host BOOLEAN, co_host BOOLEAN)"
+            )
+            conn.executemany("INSERT INTO participants VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.close()
+        return path
+
+    def test_person_across_sessions(self):
+        """Variants of a name are one attendee, with the wait of each session."""
+        self.archive(
+            "20240301-120000",
+            [
+                row("Bob Smith", "waiting", "01 09:00:00", "01 09:01:30"),
+                row("Bob Smith", "joined", "01 09:02:00", "01 11:00:00"),
+            ],
+        )
+        self.archive(
+            "20240308-120000",
+            [
+                row("#Robert Smith", "joined", "08 09:00:00", "08 11:00:00", co_host=1),
+                row("Amy Lee", "waiting", "08 09:00:00", "08 09:10:00"),
+            ],
+        )
+        self.assertEqual(self.history.ingest_archives(self.meeting), 2)
+        person = self.history.person("bob smith")
+        self.assertEqual(person["names"], ["#Robert Smith", "Bob Smith"])
+        self.assertEqual(
+            [s["file"] for s in person["sessions"]],
+            ["zoom_meeting-20240308-120000.db", "zoom_meeting-20240301-120000.db"],
+        )
+        self.assertTrue(person["sessions"][0]["co_host"])
+        self.assertIsNone(person["sessions"][0]["waited_seconds"])
+        self.assertEqual(person["sessions"][1]["waited_seconds"], 120)
+        # Never admitted: waited until last seen in the waiting room
+        amy = self.history.person("AMY LEE")
+        self.assertEqual(amy["sessions"][0]["waited_seconds"], 600)
+        self.assertIsNone(self.history.person("Nobody"))
+
+    def test_incremental(self):
+        """Archives already ingested are skipped; new ones are added."""
+        self.archive(
+            "20240301-120000",
+            [row("Amy Lee", "joined", "01 09:00:00", "01 10:00:00")],
+        )
+        self.assertEqual(self.history.ingest_archives(self.meeting), 1)
+        self.assertEqual(self.history.ingest_archives(self.meeting), 0)
+        self.archive(
+            "20240308-120000",
+            [row("Amy Lee", "joined", "08 09:00:00", "08 10:00:00")],
+        )
+        self.assertEqual(self.history.ingest_archives(self.meeting), 1)
+        self.assertEqual(len(self.history.sessions()), 2)
+        self.assertEqual(len(self.history.person("Amy Lee")["sessions"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the in-process metrics in metrics.py.
+"""
+
+import asyncio
+import unittest
+
+from metrics import MetricsMiddleware, Registry, timed
+
+
+class TestInstruments(unittest.TestCase):
+    """Counters, gauges and histograms render in the text exposition format."""
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_and_gauge(self):
+        """Counters add up per label set, gauges go both ways."""
+        counter = self.registry.counter("jobs_total", "Jobs", ("kind",))
+        gauge = self.registry.gauge("busy", "Busy workers")
+        counter.inc("a")
+        counter.inc("a", amount=2)
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        self.assertEqual(counter.value("a"), 3)
+        text = self.registry.render()
+        self.assertIn("# TYPE jobs_total counter", text)
+        self.assertIn('jobs_total{kind="a"} 3', text)
+        self.assertIn("busy 1", text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket counts include every smaller bucket, plus +Inf, sum and count."""
+        histogram = self.registry.histogram("size", "Sizes", buckets=(1, 10))
+        for value in (0.5, 5, 50):
+            histogram.observe(value)
+        text = self.registry.render()
+        self.assertIn('size_bucket{le="1"} 1', text)
+        self.assertIn('size_bucket{le="10"} 2', text)
+        self.assertIn('size_bucket{le="+Inf"} 3', text)
+        self.assertIn("size_sum 55.5", text)
+        self.assertIn("size_count 3", text)
+
+    def test_label_values_escaped(self):
+        """Quotes and backslashes in label values are escaped."""
+        counter = self.registry.counter("names_total", "Names", ("name",))
+        counter.inc('say "hi"\\')
+        self.assertIn('names_total{name="say \\"hi\\"\\\\"} 1', self.registry.render())
+
+    def test_wrong_label_count(self):
+        """Recording with the wrong number of labels is an error."""
+        counter = self.registry.counter("x_total", "X", ("a", "b"))
+        with self.assertRaises(ValueError):
+            counter.inc("only-one")
+
+    def test_duplicate_name(self):
+        """A metric name can only be registered once."""
+        self.registry.counter("dup_total", "Dup")
+        with self.assertRaises(ValueError):
+            self.registry.gauge("dup_total", "Dup")
+
+    def test_timed_records_on_error(self):
+        """timed() observes the block even if it raises."""
+        histogram = self.registry.histogram("op_seconds", "Ops", ("op",))
+        with self.assertRaises(RuntimeError):
+            with timed(histogram, "fail"):
+                raise RuntimeError()
+        self.assertEqual(histogram.count("fail"), 1)
+
+
+class TestMiddleware(unittest.TestCase):
+    """The ASGI middleware labels requests by route template and status."""
+
+    def test_request_recorded(self):
+        """A request is counted with its route template, status and latency."""
+
+        class Route:
+            path = "/items/{item_id}"
+
+        async def app(scope, receive, send):
+            scope["route"] = Route()
+            await send({"type": "http.response.start", "status": 204})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def noop_send(message):
+            pass
+
+        registry = Registry()
+        middleware = MetricsMiddleware(app, registry)
+        scope = {"type": "http", "method": "GET", "path": "/items/7"}
+        asyncio.run(middleware(scope, None, noop_send))
+        self.assertEqual(middleware.requests.value("GET", "/items/{item_id}", 204), 1)
+        self.assertEqual(middleware.latency.count("GET", "/items/{item_id}"), 1)
+        self.assertEqual(middleware.in_flight.value(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
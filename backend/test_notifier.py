@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the cross-process change notification in notifier.py.
+"""
+
+import os
+import queue
+import sqlite3
+import tempfile
+import unittest
+
+from notifier import DataVersionWatcher
+
+
+class TestDataVersionWatcher(unittest.TestCase):
+    """Commits from other connections are reported, with schema changes flagged."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, "zoom_meeting.db")
+        with sqlite3.connect(self.database) as conn:
+            conn.execute("CREATE TABLE participants (name TEXT)")
+        self.changes = queue.Queue()
+        self.watcher = DataVersionWatcher(self.database, interval=0.01)
+        self.watcher.subscribe(self.changes.put)
+        self.watcher.start()
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.tmp.cleanup()
+
+    def write(self, sql):
+        """Commit a statement on a separate connection, like another worker would."""
+        with sqlite3.connect(self.database) as conn:
+            conn.execute(sql)
+        conn.close()
+
+    def test_data_and_schema_changes(self):
+        """An insert is a data change, dropping a table a schema change."""
+        self.write("INSERT INTO participants VALUES ('Amy')")
+        self.assertIs(self.changes.get(timeout=2), False)
+        self.write("DROP TABLE participants")
+        self.assertIs(self.changes.get(timeout=2), True)
+        self.assertTrue(self.changes.empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
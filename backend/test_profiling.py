@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the on-demand profiling tools in profiling.py.
+"""
+
+import asyncio
+import threading
+import time
+import tracemalloc
+import unittest
+
+from metrics import Registry, timed
+from profiling import (
+    MemoryTracer,
+    SamplingProfiler,
+    SlowRequestLog,
+    SlowRequestMiddleware,
+)
+
+
+def spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    """Stacks of busy threads show up in the collapsed profile."""
+
+    def test_profile(self):
+        """A spinning thread is sampled with its thread name and function."""
+        stop = threading.Event()
+        worker = threading.Thread(target=spin, args=(stop,), name="spinner")
+        worker.start()
+        profiler = SamplingProfiler()
+        try:
+            profiler.start(5, interval=0.001)
+            with self.assertRaises(RuntimeError):
+                profiler.start(5)
+            time.sleep(0.2)
+            profile = profiler.stop()
+        finally:
+            stop.set()
+            worker.join()
+        self.assertFalse(profiler.running)
+        self.assertGreater(profiler.samples, 0)
+        # The thread may also be sampled while starting or finishing, outside spin()
+        counts = [
+            int(line.rsplit(" ", 1)[1])
+            for line in profile.splitlines()
+            if line.startswith("spinner;") and "spin (test_profiling.py:" in line
+        ]
+        self.assertGreater(sum(counts), 0)
+
+    def test_deadline(self):
+        """Sampling stops by itself after the given time."""
+        profiler = SamplingProfiler()
+        profiler.start(0.05, interval=0.001)
+        time.sleep(0.3)
+        self.assertFalse(profiler.running)
+
+
+class TestMemoryTracer(unittest.TestCase):
+    """Snapshots are compared by line."""
+
+    def tearDown(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def test_diff(self):
+        """Memory allocated after the snapshot shows up in the diff."""
+        tracer = MemoryTracer()
+        with self.assertRaises(LookupError):
+            tracer.diff()
+        tracer.snapshot()
+        kept = [bytearray(1000) for _ in range(1000)]
+        diff = tracer.diff(limit=5)
+        self.assertTrue(
+            any(
+                "test_profiling.py:" in entry["where"] and entry["size_diff"] >= 1000000
+                for entry in diff["top"]
+            )
+        )
+        del kept
+        tracer.stop()
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+class TestSlowRequests(unittest.TestCase):
+    """Slow requests are kept with their timed() breakdown."""
+
+    def call(self, middleware, path):
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            pass
+
+        scope = {"type": "http", "method": "GET", "path": path}
+        asyncio.run(middleware(scope, receive, send))
+
+    def test_capture(self):
+        """Only requests over the threshold are kept, with the time per timed() block."""
+        histogram = Registry().histogram("db_seconds", "", ("operation",))
+
+        async def app(scope, receive, send):
+            with timed(histogram, "read"):
+                time.sleep(0.02 if scope["path"] == "/slow" else 0)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        log = SlowRequestLog(threshold=0.01)
+        middleware = SlowRequestMiddleware(app, log)
+        self.call(middleware, "/slow")
+        self.assertEqual(log.requests(), [])  # disabled
+        log.enabled = True
+        self.call(middleware, "/slow")
+        self.call(middleware, "/fast")
+        (entry,) = log.requests()
+        self.assertEqual((entry["path"], entry["status"]), ("/slow", 200))
+        self.assertGreaterEqual(entry["breakdown"]["db_seconds:read"], 0.02)
+
+    def test_streams_skipped(self):
+        """Server-sent event streams are not slow requests."""
+
+        async def app(scope, receive, send):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream")],
+                }
+            )
+
+        log = SlowRequestLog(threshold=0)
+        log.enabled = True
+        self.call(SlowRequestMiddleware(app, log), "/alerts/stream")
+        self.assertEqual(log.requests(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
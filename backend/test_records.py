@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the compact participant records in records.py.
+"""
+
+import sys
+import unittest
+
+from records import ParticipantTable, format_ts, to_epoch
+
+
+class TestTimestamps(unittest.TestCase):
+    """Epoch seconds round-trip through the API timestamp format."""
+
+    def test_round_trip(self):
+        """A formatted timestamp parses back to the same second."""
+        epoch = to_epoch("2024-05-01 10:00:00")
+        self.assertEqual(format_ts(epoch), "2024-05-01 10:00:00")
+        self.assertEqual(to_epoch(format_ts(epoch + 61)), epoch + 61)
+
+
+class TestParticipantTable(unittest.TestCase):
+    """Rows keep first-seen order, timestamps and role changes."""
+
+    def test_touch(self):
+        """New names are appended, known names keep their first_seen."""
+        table = ParticipantTable()
+        self.assertEqual(table.touch("Jane", 100, False, False), (100, None))
+        self.assertEqual(table.touch("John", 101, True, False), (101, None))
+        self.assertEqual(table.touch("Jane", 105, False, False), (100, None))
+        self.assertEqual(table.rows(), [("Jane", 100, 105), ("John", 101, 101)])
+        self.assertEqual(len(table), 2)
+        self.assertIn("John", table)
+
+    def test_touch_out_of_order(self):
+        """An older sighting can move first_seen back, never last_seen."""
+        table = ParticipantTable()
+        table.touch("Jane", 100, False, False)
+        table.touch("Jane", 110, False, False)
+        self.assertEqual(table.touch("Jane", 105, False, False), (100, None))
+        self.assertEqual(table.touch("Jane", 90, False, False), (90, None))
+        self.assertEqual(table.rows(), [("Jane", 90, 110)])
+
+    def test_role_change(self):
+        """A role change returns the previous roles."""
+        table = ParticipantTable()
+        table.touch("Jane", 100, True, False)
+        self.assertEqual(table.touch("Jane", 110, False, True), (100, (True, False)))
+        self.assertEqual(table.get("Jane"), (100, 110, False, True))
+        self.assertIsNone(table.get("John"))
+
+    def test_put_and_intern(self):
+        """Rows read from the database replace the stored ones, names are interned."""
+        table = ParticipantTable()
+        name = "".join(["Ja", "ne"])
+        table.put(name, 100, 100, 0, 1)
+        table.put("Jane", 90, 120, 1, 0)
+        self.assertEqual(table.get("Jane"), (90, 120, True, False))
+        self.assertIs(table.rows()[0][0], sys.intern("Jane"))
+
+    def test_changed_since(self):
+        """Rows keep the sequence number of their latest change."""
+        table = ParticipantTable()
+        table.touch("Jane", 100, False, False, 1)
+        table.touch("John", 101, False, False, 2)
+        table.touch("Jane", 105, False, False, 3)
+        self.assertEqual(table.changed_since(2), [("Jane", 100, 105)])
+        self.assertEqual(table.changed_since(0), table.rows())
+
+    def test_columns(self):
+        """A table made from another's columns has the same rows."""
+        table = ParticipantTable()
+        table.touch("Jane", 100, True, False, 1)
+        table.touch("John", 101, False, True, 2)
+        copy = ParticipantTable.from_columns(*table.columns())
+        self.assertEqual(copy.rows(), table.rows())
+        self.assertEqual(copy.get("John"), (101, 101, False, True))
+        self.assertEqual(copy.changed_since(1), [("John", 101, 101)])
+        names, *columns = table.columns()
+        with self.assertRaises(ValueError):
+            ParticipantTable.from_columns(["Jane", "Jane"], *columns)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the write-behind roster store in roster.py.
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from roster import RosterStore, parse_roles
+
+SCHEMA = """
+CREATE TABLE participants (
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    host BOOLEAN DEFAULT 0,
+    co_host BOOLEAN DEFAULT 0,
+    PRIMARY KEY (name, status)
+);
+CREATE TABLE events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    old_role TEXT,
+    new_role TEXT
+);
+"""
+
+
+class TestParseRoles(unittest.TestCase):
+    """Role suffixes are split off roster names."""
+
+    def test_roles(self):
+        """Host and co-host suffixes set the matching flag."""
+        self.assertEqual(parse_roles("Jane Doe"), ("Jane Doe", False, False))
+        self.assertEqual(parse_roles("Jane Doe (Host, me)"), ("Jane Doe", True, False))
+        self.assertEqual(parse_roles("John Roe (Co-host)"), ("John Roe", False, True))
+
+
+class TestRosterStore(unittest.TestCase):
+    """Updates are served from memory and flushed to SQLite in one transaction."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, "zoom_meeting.db")
+        with sqlite3.connect(self.database) as conn:
+            conn.executescript(SCHEMA)
+        self.store = RosterStore(self.database, flush_interval=60)
+        self.store.load()
+
+    def tearDown(self):
+        self.store.stop()
+        self.tmp.cleanup()
+
+    def query(self, sql):
+        """Run a query on a separate connection, like another process would."""
+        with sqlite3.connect(self.database) as conn:
+            return conn.execute(sql).fetchall()
+
+    def test_acknowledged_from_memory(self):
+        """Upserts are visible immediately and reach the database on flush."""
+        self.store.upsert("Jane Doe", "waiting", "2024-01-01 10:00:00")
+        self.assertEqual(
+            self.store.participants("waiting"),
+            [("Jane Doe", "2024-01-01 10:00:00", "2024-01-01 10:00:00")],
+        )
+        self.assertEqual(self.query("SELECT COUNT(*) FROM participants"), [(0,)])
+        self.assertEqual(self.store.flush(), 1)
+        self.assertEqual(self.query("SELECT name FROM participants"), [("Jane Doe",)])
+
+    def test_repeated_upserts_merged(self):
+        """Several updates of one participant become a single row write."""
+        self.store.upsert("Jane Doe", "joined", "2024-01-01 10:00:00")
+        self.store.upsert("Jane Doe", "joined", "2024-01-01 10:00:05")
+        self.store.upsert("Jane Doe", "joined", "2024-01-01 10:00:10")
+        self.assertEqual(self.store.pending, 1)
+        self.assertEqual(self.store.flush(), 1)
+        self.assertEqual(
+            self.query("SELECT first_seen, last_seen FROM participants"),
+            [("2024-01-01 10:00:00", "2024-01-01 10:00:10")],
+        )
+
+    def test_role_change_event(self):
+        """A role change is logged to the events table."""
+        self.store.upsert("Jane Doe", "joined", "2024-01-01 10:00:00")
+        self.store.upsert("Jane Doe (Co-host)", "joined", "2024-01-01 10:00:05")
+        self.store.flush()
+        self.assertEqual(
+            self.query("SELECT name, old_role, new_role FROM events"),
+            [("Jane Doe", "Participant", "Co-host")],
+        )
+
+    def test_stop_flushes_and_load_restores_order(self):
+        """stop() writes pending rows, and a new store reloads them in order."""
+        for name in ["Zed", "Amy", "Bob"]:
+            self.store.upsert(name, "joined")
+        self.store.stop()
+        restored = RosterStore(self.database)
+        restored.load()
+        names = [row[0] for row in restored.participants("joined")]
+        restored.stop()
+        self.assertEqual(names, ["Zed", "Amy", "Bob"])
+
+    def test_size_trigger_wakes_flusher(self):
+        """Reaching max_pending rows flushes without waiting for the interval."""
+        self.store.max_pending = 3
+        self.store.start()
+        for i in range(3):
+            self.store.upsert(f"Person {i}", "waiting")
+        count = None
+        for _ in range(100):
+            count = self.query("SELECT COUNT(*) FROM participants")[0][0]
+            if count == 3:
+                break
+            time.sleep(0.02)
+        self.assertEqual(count, 3)
+
+    def test_refresh_merges_other_workers(self):
+        """refresh() picks up rows another store wrote, keeping unflushed local ones."""
+        other = RosterStore(self.database)
+        other.load()
+        other.upsert("Amy", "waiting", "2024-01-01 10:00:00")
+        other.upsert("Bob", "joined", "2024-01-01 10:00:00")
+        other.flush()
+        self.store.upsert("Bob", "joined", "2024-01-01 10:00:05")
+        self.assertEqual(
+            self.store.refresh(),
+            [("Amy", "waiting", "2024-01-01 10:00:00", "2024-01-01 10:00:00")],
+        )
+        self.assertEqual(
+            self.store.participants("joined"),
+            [("Bob", "2024-01-01 10:00:05", "2024-01-01 10:00:05")],
+        )
+        self.assertEqual(self.store.refresh(), [])
+        other.upsert("Amy", "waiting", "2024-01-01 10:00:10")
+        other.stop()
+        self.assertEqual(
+            self.store.refresh(),
+            [("Amy", "waiting", "2024-01-01 10:00:00", "2024-01-01 10:00:10")],
+        )
+
+    def test_refresh_late_flush(self):
+        """A row flushed after rows seen later than it is still picked up."""
+        late, early = RosterStore(self.database), RosterStore(self.database)
+        late.load()
+        early.load()
+        late.upsert("Bob", "joined", "2024-01-01 10:00:00")
+        early.upsert("Carol", "joined", "2024-01-01 10:00:01")
+        early.flush()
+        self.assertEqual(len(self.store.refresh()), 1)
+        late.flush()
+        self.assertEqual(
+            self.store.refresh(),
+            [("Bob", "joined", "2024-01-01 10:00:00", "2024-01-01 10:00:00")],
+        )
+        late.stop()
+        early.stop()
+
+    def test_refresh_skips_own_flushes(self):
+        """refresh() doesn't read the roster again after this store's own flush."""
+        self.store.upsert("Amy", "waiting", "2024-01-01 10:00:00")
+        self.store.flush()
+        statements = []
+        self.store._connect().set_trace_callback(statements.append)
+        self.assertEqual(self.store.refresh(), [])
+        self.assertEqual(statements, ["PRAGMA data_version"])
+
+    def test_version(self):
+        """The version of a status changes with its participants, and on load()."""
+        waiting, joined = self.store.version("waiting"), self.store.version("joined")
+        self.store.upsert("Jane Doe", "waiting")
+        self.assertNotEqual(self.store.version("waiting"), waiting)
+        self.assertEqual(self.store.version("joined"), joined)
+        waiting = self.store.version("waiting")
+        self.store.load()
+        self.assertNotEqual(self.store.version("waiting"), waiting)
+
+    def test_changes(self):
+        """changes() returns only the rows changed since a version, or all of them."""
+        self.store.upsert("Amy", "waiting")
+        version, complete, rows = self.store.changes()
+        self.assertTrue(complete)
+        self.assertEqual([row[0] for row in rows["waiting"]], ["Amy"])
+        self.store.upsert("Bob", "joined")
+        version, complete, rows = self.store.changes(version)
+        self.assertFalse(complete)
+        self.assertEqual(rows["waiting"], [])
+        self.assertEqual([row[0] for row in rows["joined"]], ["Bob"])
+        self.assertEqual(self.store.changes(version)[2]["joined"], [])
+        # Versions from before a load, or unknown ones, get everything
+        self.store.load()
+        self.assertTrue(self.store.changes(version)[1])
+        self.assertTrue(self.store.changes("nonsense")[1])
+
+    def test_restore(self):
+        """A snapshot comes back with the rows written since."""
+        self.store.upsert("Amy", "joined")
+        self.store.flush()
+        self.store.upsert("Bob", "joined")
+        state = self.store.snapshot()
+        other = RosterStore(self.database)
+        other.load()
+        other.upsert("Cat", "waiting")
+        other.stop()
+        restored = RosterStore(self.database)
+        self.assertTrue(restored.restore(state))
+        self.assertEqual(restored.pending, 1)  # Bob was never written
+        self.assertEqual(
+            [row[0] for row in restored.participants("joined")], ["Amy", "Bob"]
+        )
+        self.assertEqual([row[0] for row in restored.participants("waiting")], ["Cat"])
+        restored.stop()
+        self.assertEqual(self.query("SELECT COUNT(*) FROM participants"), [(3,)])
+
+    def test_restore_version_after_snapshot(self):
+        """A version handed out after a periodic snapshot gets every row again."""
+        self.store.upsert("Amy", "joined")
+        state = self.store.snapshot()
+        self.store.upsert("Bob", "joined")
+        self.store.upsert("Cat", "joined")
+        version = self.store.changes()[0]
+        self.store.flush()
+        restored = RosterStore(self.database)
+        self.assertTrue(restored.restore(state))
+        _, complete, rows = restored.changes(version)
+        self.assertTrue(complete)
+        self.assertEqual([row[0] for row in rows["joined"]], ["Amy", "Bob", "Cat"])
+        restored.stop()
+
+    def test_restore_final(self):
+        """A snapshot taken on shutdown keeps the versions clients hold."""
+        self.store.upsert("Amy", "joined")
+        version = self.store.changes()[0]
+        self.store.stop()
+        state = {**self.store.snapshot(), "final": True}
+        restored = RosterStore(self.database)
+        self.assertTrue(restored.restore(state))
+        self.assertEqual(restored.changes(version)[1:], (False, {"joined": []}))
+        restored.upsert("Bob", "joined")
+        _, complete, rows = restored.changes(version)
+        self.assertFalse(complete)
+        self.assertEqual([row[0] for row in rows["joined"]], ["Bob"])
+        restored.stop()
+
+    def test_restore_mismatch(self):
+        """A snapshot of a database that was reset since is not used."""
+        self.store.upsert("Amy", "joined")
+        self.store.flush()
+        state = self.store.snapshot()
+        with sqlite3.connect(self.database) as conn:
+            conn.execute("DELETE FROM participants")
+        restored = RosterStore(self.database)
+        self.assertFalse(restored.restore(state))
+        self.assertEqual(restored.participants("joined"), [])
+        restored.stop()
+
+    def test_reset(self):
+        """reset() flushes, runs the reset callback and reloads the roster."""
+        self.store.upsert("Jane Doe", "waiting")
+        seen = []
+
+        def reset_database():
+            seen.extend(self.query("SELECT name FROM participants"))
+            with sqlite3.connect(self.database) as conn:
+                conn.execute("DELETE FROM participants")
+
+        self.store.reset(reset_database)
+        self.assertEqual(seen, [("Jane Doe",)])
+        self.assertEqual(self.store.participants("waiting"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
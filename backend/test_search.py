@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the participant name search in search.py.
+"""
+
+import time
+import unittest
+
+from search import NameIndex, normalize, trigrams
+
+
+class TestNormalize(unittest.TestCase):
+    """Names are folded before they are indexed or searched."""
+
+    def test_normalize(self):
+        """Accents, case, emoji and punctuation are ignored."""
+        self.assertEqual(normalize("José Müller"), "jose muller")
+        self.assertEqual(normalize("🌟 ANNA-Lena 🌟"), "anna lena")
+        self.assertEqual(normalize("#Staff @Interp"), "staff interp")
+
+    def test_trigrams(self):
+        """Word starts are padded, and an open query word has no end padding."""
+        self.assertEqual(trigrams("jo"), {"  j", " jo", "jo "})
+        self.assertEqual(trigrams("jo", complete=False), {"  j", " jo"})
+
+
+class TestNameIndex(unittest.TestCase):
+    """Searches rank the indexed names without scanning them all."""
+
+    def setUp(self):
+        self.index = NameIndex()
+        for name, status in [
+            ("José Müller", "joined"),
+            ("Joseph Smith", "joined"),
+            ("Anna-Lena Schmidt 🌟", "waiting"),
+            ("Mary Josephine", "joined"),
+        ]:
+            self.index.add(name, status)
+
+    def names(self, query, **kwargs):
+        """Return just the names of the matches."""
+        return [name for name, _, _ in self.index.search(query, **kwargs)]
+
+    def test_accent_insensitive(self):
+        """A plain query finds accented names."""
+        self.assertEqual(self.names("muller"), ["José Müller"])
+        self.assertEqual(self.names("SCHMIDT"), ["Anna-Lena Schmidt 🌟"])
+
+    def test_prefix_ranked_first(self):
+        """Names starting with the query come before other matches."""
+        names = self.names("jos")
+        self.assertEqual(names[:2], ["José Müller", "Joseph Smith"])
+        self.assertIn("Mary Josephine", names)
+
+    def test_status_filter_and_statuses(self):
+        """A participant seen in both states is reported with both."""
+        self.index.add("Anna-Lena Schmidt 🌟", "joined")
+        self.assertEqual(self.index.search("anna")[0][1], ["joined", "waiting"])
+        self.assertEqual(self.names("jos", status="waiting"), [])
+
+    def test_no_match(self):
+        """Unrelated or empty queries match nothing."""
+        self.assertEqual(self.names("xyz"), [])
+        self.assertEqual(self.names("🌟"), [])
+
+    def test_rebuild_keeps_concurrent_adds(self):
+        """Searches use the old index during a rebuild, and adds made meanwhile stay."""
+
+        def participants():
+            # The old index still answers while the new one is built
+            self.assertEqual(self.names("muller"), ["José Müller"])
+            self.index.add("Zoe Quinn", "waiting")
+            yield "Ada Lovelace", "joined"
+
+        self.index.rebuild(participants())
+        self.assertEqual(self.names("muller"), [])
+        self.assertEqual(self.names("ada"), ["Ada Lovelace"])
+        self.assertEqual(self.names("zoe"), ["Zoe Quinn"])
+        self.assertEqual(len(self.index), 2)
+
+    def test_large_roster(self):
+        """Searching thousands of names takes milliseconds."""
+        for i in range(5000):
+            self.index.add(f"Participant {i} Example", "joined")
+        start = time.perf_counter()
+        names = self.names("participant 4242")
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual(names[0], "Participant 4242 Example")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the roster snapshots in snapshot.py.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from roster import RosterStore
+from snapshot import RosterSnapshots, decode_snapshot, encode_snapshot
+from test_roster import SCHEMA
+
+
+class TestRosterSnapshots(unittest.TestCase):
+    """Snapshots round-trip the roster, and damaged ones are ignored."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, "zoom_meeting.db")
+        with sqlite3.connect(self.database) as conn:
+            conn.executescript(SCHEMA)
+        self.store = RosterStore(self.database, flush_interval=60)
+        self.store.load()
+        self.path = os.path.join(self.tmp.name, "zoom_meeting.snapshot")
+        self.snapshots = RosterSnapshots(self.store, self.path)
+
+    def tearDown(self):
+        self.store.stop()
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """A decoded snapshot has the same roster, version and pending rows."""
+        self.store.upsert("Zoë (Host)", "joined")
+        self.store.upsert("Amy", "waiting")
+        state = self.store.snapshot()
+        decoded = decode_snapshot(encode_snapshot(state))
+        self.assertEqual(decoded, {**state, "final": False})
+
+    def test_damaged(self):
+        """Truncated or foreign files raise ValueError, and read() ignores them."""
+        self.store.upsert("Amy", "waiting")
+        data = encode_snapshot(self.store.snapshot())
+        for damaged in (data[:-5], b"SQLite format 3\0", data[:30] + bytes(10)):
+            with self.assertRaises(ValueError):
+                decode_snapshot(damaged)
+        with open(self.path, "wb") as f:
+            f.write(data[:-5])
+        with self.assertLogs("snapshot", "WARNING"):
+            self.assertIsNone(self.snapshots.read())
+
+    def test_write_and_start(self):
+        """A snapshot is only written when the roster changed, and restores on start."""
+        self.assertIsNone(self.snapshots.read())
+        self.store.upsert("Amy", "waiting")
+        self.assertTrue(self.snapshots.write())
+        self.assertFalse(self.snapshots.write())
+        self.assertFalse(self.snapshots.read()["final"])
+        version = self.store.changes()[0]
+        self.store.stop()
+        self.snapshots.stop()
+        restored = RosterStore(self.database)
+        restored.start(self.snapshots.read())
+        self.assertEqual(restored.changes(version)[:2], (version, False))
+        self.assertEqual(restored.participants("waiting")[0][0], "Amy")
+        restored.stop()
+        # A final snapshot is only used once
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the roster spool in spool.py.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from spool import Spool, SpoolFull
+
+
+class FakeBackend(BaseHTTPRequestHandler):
+    """Records requests and answers with the next status in `statuses`."""
+
+    received = []
+    queries = []
+    statuses = []
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status == 200:
+            url = urlsplit(self.path)
+            self.received.append((url.path, json.loads(body)))
+            self.queries.append(parse_qs(url.query))
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestSpool(unittest.TestCase):
+    """Requests are journaled, merged and forwarded in order."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = os.path.join(self.tmp.name, "spool.jsonl")
+        FakeBackend.received = []
+        FakeBackend.queries = []
+        FakeBackend.statuses = []
+        self.backend = ThreadingHTTPServer(("localhost", 0), FakeBackend)
+        threading.Thread(target=self.backend.serve_forever, daemon=True).start()
+        self.url = f"http://localhost:{self.backend.server_address[1]}"
+        self.spool = Spool(self.journal, self.url, max_pending=5, max_batch=3)
+
+    def tearDown(self):
+        self.spool.stop()
+        self.backend.shutdown()
+        self.backend.server_close()
+        self.tmp.cleanup()
+
+    def test_list_batches_merged(self):
+        """Consecutive list batches become one request of up to max_batch names."""
+        self.spool.append("PUT", "/joined_list", '["Amy", "Bob"]')
+        self.spool.append("PUT", "/joined_list", '["Bob"]')
+        self.spool.append("PUT", "/joined_list", '["Cat", "Dan"]')
+        self.spool.append("PUT", "/waiting_list", '["Eve"]')
+        while self.spool.forward_once():
+            pass
+        self.assertEqual(
+            FakeBackend.received,
+            [
+                ("/joined_list", ["Amy", "Bob"]),
+                ("/joined_list", ["Cat", "Dan"]),
+                ("/waiting_list", ["Eve"]),
+            ],
+        )
+        self.assertEqual(os.path.getsize(self.journal), 0)
+
+    def test_scrape_time_kept(self):
+        """Roster updates carry the time they were spooled, and only batches received
+        close together are merged."""
+        start = time.time()
+        with mock.patch("spool.time.time") as now:
+            for offset, names in ((0, '["Amy"]'), (1, '["Bob"]'), (60, '["Cat"]')):
+                now.return_value = start + offset
+                self.spool.append("PUT", "/joined_list", names)
+            self.spool.append("PUT", "/filtered/hands", '{"names": ["Amy"]}')
+        while self.spool.forward_once():
+            pass
+        self.assertEqual(
+            FakeBackend.received,
+            [
+                ("/joined_list", ["Amy", "Bob"]),
+                ("/joined_list", ["Cat"]),
+                ("/filtered/hands", {"names": ["Amy"]}),
+            ],
+        )
+
+        def seen(offset):
+            moment = datetime.fromtimestamp(start + offset)
+            return [moment.strftime("%Y-%m-%d %H:%M:%S")]
+
+        self.assertEqual(
+            FakeBackend.queries,
+            [{"timestamp": seen(1)}, {"timestamp": seen(60)}, {}],
+        )
+
+    def test_scan_time_kept(self):
+        """A scan batch without a timestamp gets the time it was spooled."""
+        start = time.time()
+        with mock.patch("spool.time.time", return_value=start):
+            self.spool.append("PUT", "/scan", '{"participants": []}')
+        self.spool.append(
+            "PUT", "/scan", '{"participants": [], "timestamp": "03/05/2024 09:00:00"}'
+        )
+        while self.spool.forward_once():
+            pass
+        seen = datetime.fromtimestamp(start).strftime("%Y-%m-%d %H:%M:%S")
+        self.assertEqual(
+            FakeBackend.received,
+            [
+                ("/scan", {"participants": [], "timestamp": seen}),
+                ("/scan", {"participants": [], "timestamp": "03/05/2024 09:00:00"}),
+            ],
+        )
+
+    def test_retry_and_drop(self):
+        """A 5xx or 429 is retried and another 4xx is dropped, keeping the order."""
+        FakeBackend.statuses = [503, 429, 422]
+        self.spool.append("PUT", "/filtered/hands", '{"names": ["Amy"]}')
+        self.spool.append("PUT", "/filtered/hands", '{"names": ["Bob"]}')
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                self.spool.forward_once()
+        self.assertEqual(self.spool.status()["pending"], 2)
+        self.assertEqual(self.spool.forward_once(), 1)  # dropped with 422
+        self.assertEqual(self.spool.forward_once(), 1)
+        self.assertEqual(
+            FakeBackend.received, [("/filtered/hands", {"names": ["Bob"]})]
+        )
+
+    def test_backpressure(self):
+        """New requests are refused once max_pending are waiting."""
+        for _ in range(5):
+            self.spool.append("PUT", "/scan", "{}")
+        with self.assertRaises(SpoolFull):
+            self.spool.append("PUT", "/scan", "{}")
+
+    def test_restart_resumes(self):
+        """A new spool on the same journal forwards only what was not sent."""
+        self.spool.append("PUT", "/filtered/hands", '{"n": 1}')
+        self.spool.append("PUT", "/filtered/hands", '{"n": 2}')
+        self.spool.forward_once()
+        self.spool.stop()
+        self.spool = Spool(self.journal, self.url)
+        self.assertEqual(self.spool.status()["pending"], 1)
+        self.spool.forward_once()
+        self.assertEqual(
+            FakeBackend.received,
+            [("/filtered/hands", {"n": 1}), ("/filtered/hands", {"n": 2})],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
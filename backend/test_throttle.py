@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the admission control in throttle.py.
+"""
+
+import asyncio
+import unittest
+
+from throttle import AdmissionMiddleware, Lane, Rejected, TokenBucket, lane_for
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Bursts are allowed up to the bucket size, then the rate applies."""
+
+    def test_rate(self):
+        """An empty bucket says how long until the next token."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, clock=clock)
+        self.assertEqual([bucket.take() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.take(), 0.5)
+        clock.now = 0.5
+        self.assertEqual(bucket.take(), 0.0)
+        clock.now = 100
+        self.assertEqual([bucket.take() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertGreater(bucket.take(), 0)
+
+
+class TestLanes(unittest.TestCase):
+    """Requests are sorted into lanes that limit how many run at once."""
+
+    def test_lane_for(self):
+        """Commands, reads and updates each have their lane."""
+        self.assertEqual(lane_for("POST", "/cmd_admit"), "command")
+        self.assertEqual(lane_for("POST", "/reset"), "command")
+        self.assertEqual(lane_for("GET", "/joined"), "read")
+        self.assertIsNone(lane_for("GET", "/alerts/stream"))
+        self.assertEqual(lane_for("PUT", "/joined_list"), "ingest")
+        self.assertEqual(lane_for("PUT", "/filtered/hands"), "ingest")
+        self.assertIsNone(lane_for("PUT", "/admit/registrations"))
+
+    def test_queue(self):
+        """Requests over the limit wait their turn, or are rejected."""
+
+        async def scenario():
+            lane = Lane("test", limit=1, max_queue=1, max_wait=0.5)
+            await lane.acquire()
+            waiter = asyncio.ensure_future(lane.acquire())
+            await asyncio.sleep(0)
+            with self.assertRaises(Rejected) as full:
+                await lane.acquire()
+            self.assertEqual(full.exception.reason, "queue full")
+            lane.release()
+            await waiter  # got the released slot
+            self.assertEqual(lane.in_flight, 1)
+            with self.assertRaises(Rejected) as slow:
+                await lane.acquire()
+            self.assertEqual(slow.exception.reason, "timeout")
+            lane.release()
+            self.assertEqual(lane.in_flight, 0)
+
+        asyncio.run(scenario())
+
+    def test_middleware_429(self):
+        """A request over the ingest rate gets 429 with Retry-After."""
+        clock = FakeClock()
+        lanes = {"ingest": Lane("ingest", 4, bucket=TokenBucket(1, 1, clock=clock))}
+        handled = []
+
+        async def app(scope, receive, send):
+            handled.append(scope["path"])
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        async def call(method, path):
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {"type": "http", "method": method, "path": path}
+            await AdmissionMiddleware(app, lanes)(scope, None, send)
+            return sent[0]
+
+        async def scenario():
+            self.assertEqual((await call("PUT", "/joined_list"))["status"], 200)
+            rejected = await call("PUT", "/joined_list")
+            self.assertEqual(rejected["status"], 429)
+            self.assertIn((b"retry-after", b"1"), rejected["headers"])
+            self.assertEqual((await call("GET", "/joined"))["status"], 200)
+
+        asyncio.run(scenario())
+        self.assertEqual(handled, ["/joined_list", "/joined"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the waiting room watchdog in watchdog.py.
+"""
+
+import time
+import unittest
+from datetime import datetime
+
+from watchdog import TIMESTAMP_FORMAT, WaitingWatchdog
+
+START = datetime(2024, 3, 5, 9, 0, 0)
+
+
+class TestWaitingWatchdog(unittest.TestCase):
+    """Alerts fire at each threshold and clear when someone leaves the waiting room."""
+
+    def setUp(self):
+        self.now = START.timestamp()
+        self.watchdog = WaitingWatchdog(
+            thresholds=(60, 180), stale_after=30, clock=lambda: self.now
+        )
+        self.events = []
+        self.watchdog.subscribe(self.events.append)
+
+    def seen(self, name, offset=0):
+        """Report `name` waiting, first seen `offset` seconds after START"""
+        first_seen = datetime.fromtimestamp(START.timestamp() + offset)
+        self.watchdog.waiting(name, first_seen.strftime(TIMESTAMP_FORMAT))
+
+    def advance(self, seconds, still_waiting=()):
+        """Move the clock, refreshing `still_waiting` every 10 seconds like roster passes"""
+        for _ in range(seconds // 10):
+            self.now += 10
+            for name in still_waiting:
+                self.seen(name)
+            self.watchdog.check()
+
+    def test_thresholds(self):
+        """One alert per threshold, with the next deadline returned by check()."""
+        self.seen("Amy")
+        self.assertEqual(self.watchdog.check(), 60)
+        self.advance(60, ["Amy"])
+        self.assertEqual(
+            [(e["name"], e["threshold"], e["waited"]) for e in self.events],
+            [("Amy", 60, 60)],
+        )
+        self.advance(120, ["Amy"])
+        self.advance(60, ["Amy"])
+        self.assertEqual([e["threshold"] for e in self.events], [60, 180])
+        self.assertEqual(self.watchdog.overdue()[0]["waited"], 240)
+
+    def test_admitted_clears(self):
+        """Being admitted clears the alert and stops further ones."""
+        self.seen("Amy")
+        self.seen("Bob", offset=30)
+        self.advance(60, ["Amy", "Bob"])
+        self.watchdog.admitted("Amy")
+        self.assertEqual(self.events[-1], {"type": "cleared", "name": "Amy"})
+        self.advance(200, ["Bob"])
+        self.assertEqual(
+            [(e["type"], e["name"]) for e in self.events],
+            [
+                ("overdue", "Amy"),
+                ("cleared", "Amy"),
+                ("overdue", "Bob"),
+                ("overdue", "Bob"),
+            ],
+        )
+
+    def test_left_and_reentered(self):
+        """Someone no longer listed is dropped, and a re-entry starts a new wait."""
+        self.seen("Amy")
+        self.advance(60, ["Amy"])
+        self.advance(200)  # left the waiting room
+        self.assertEqual(self.events[-1], {"type": "cleared", "name": "Amy"})
+        self.assertEqual(self.watchdog.overdue(), [])
+        self.seen("Amy")  # the roster still has the old first_seen
+        self.assertEqual(self.watchdog.check(), 60)
+        self.assertEqual(self.watchdog.overdue(), [])
+
+    def test_surge(self):
+        """A thousand entrants at once cost one heap push each."""
+        self.now += 100
+        start = time.perf_counter()
+        for i in range(1000):
+            self.seen(f"Participant {i}", offset=i % 60)
+        self.now += 20
+        self.watchdog.check()
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(len(self.watchdog.overdue()), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
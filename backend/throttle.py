@@ -0,0 +1,204 @@
+"""
+Admission control for the Zoom meeting tracker API.
+
+A runaway auto-update loop, or several zoom-manage instances, can send roster updates
+faster than the backend handles them. Without limits, those requests take every worker
+thread and the dashboard's reads and the OPM's /cmd_admit wait behind them. Requests are
+sorted into lanes instead:
+
+- command: the dashboard buttons (POST /cmd_*, /reset).
+- read: GET requests, except the long-lived /alerts/stream.
+- ingest: roster, filter and scan updates (PUT).
+
+Each lane handles at most `limit` requests at once, so a flood in one lane leaves the
+others their own capacity. Requests over the limit wait in the lane's queue, first come
+first served, for up to `max_wait` seconds. The ingest lane also has a token bucket: it
+takes `rate` requests per second on average, with bursts of up to `burst`. A request that
+is over the rate, finds the queue full or waits too long gets 429 with Retry-After, and
+the spool (spool.py) sends it again after that time.
+
+Everything runs on the event loop, so the lanes need no locks.
+"""
+
+import asyncio
+import collections
+import json
+import math
+import time
+
+from metrics import REGISTRY
+
+QUEUE_WAIT = REGISTRY.histogram(
+    "zoom_opm_admission_wait_seconds",
+    "Time requests waited for a free slot in their lane",
+    ("lane",),
+)
+QUEUED = REGISTRY.gauge(
+    "zoom_opm_admission_queued", "Requests waiting for a free slot", ("lane",)
+)
+REJECTED = REGISTRY.counter(
+    "zoom_opm_admission_rejected_total",
+    "Requests answered with 429, by lane and reason",
+    ("lane", "reason"),
+)
+
+INGEST_PATHS = ("/waiting", "/joined", "/filtered/", "/scan")
+
+
+class Rejected(Exception):
+    """The request cannot be admitted now"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Allow `rate` events per second on average, with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = burst
+        self._updated = clock()
+
+    def take(self):
+        """Take a token if there is one
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until there is one.
+        """
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class Lane:
+    """A kind of request, with at most `limit` of them handled at once"""
+
+    def __init__(self, name, limit, max_queue=100, max_wait=5.0, bucket=None):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.bucket = bucket
+        self.in_flight = 0
+        self._waiters = collections.deque()
+
+    async def acquire(self):
+        """Wait for a free slot
+
+        Raises:
+            Rejected: The request is over the rate, or the queue is full or too slow.
+        """
+        if self.bucket is not None:
+            wait = self.bucket.take()
+            if wait:
+                raise Rejected("rate", wait)
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            QUEUE_WAIT.observe(0.0, self.name)
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Rejected("queue full", 1.0)
+        granted = asyncio.get_running_loop().create_future()
+        self._waiters.append(granted)
+        QUEUED.set(self.name, value=len(self._waiters))
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if granted.done():
+                # The slot was handed over just as the wait ended
+                if isinstance(e, asyncio.CancelledError):
+                    self.release()
+                    raise
+                return
+            granted.cancel()
+            self._waiters.remove(granted)
+            QUEUED.set(self.name, value=len(self._waiters))
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise Rejected("timeout", 1.0) from None
+        finally:
+            QUEUE_WAIT.observe(time.perf_counter() - start, self.name)
+
+    def release(self):
+        """Free a slot, handing it to the longest waiting request if there is one"""
+        while self._waiters:
+            granted = self._waiters.popleft()
+            QUEUED.set(self.name, value=len(self._waiters))
+            if not granted.done():
+                granted.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+def default_lanes(ingest_rate=50.0):
+    """Return the command, read and ingest lanes
+
+    Args:
+        ingest_rate (float): Ingest requests per second, 0 for no rate limit.
+    """
+    bucket = TokenBucket(ingest_rate, 4 * ingest_rate) if ingest_rate > 0 else None
+    return {
+        "command": Lane("command", limit=4, max_queue=20, max_wait=30.0),
+        "read": Lane("read", limit=16),
+        "ingest": Lane("ingest", limit=4, bucket=bucket),
+    }
+
+
+def lane_for(method, path):
+    """Return the name of the lane for a request, or None for no admission control"""
+    if method == "POST" and (path.startswith("/cmd_") or path == "/reset"):
+        return "command"
+    if method == "GET" and path != "/alerts/stream":
+        return "read"
+    if method == "PUT" and path.startswith(INGEST_PATHS):
+        return "ingest"
+    return None
+
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting requests through their lanes"""
+
+    def __init__(self, app, lanes):
+        self.app = app
+        self.lanes = lanes
+
+    async def __call__(self, scope, receive, send):
+        lane = None
+        if scope["type"] == "http":
+            lane = self.lanes.get(lane_for(scope["method"], scope["path"]))
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await lane.acquire()
+        except Rejected as e:
+            REJECTED.inc(lane.name, e.reason)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 429,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"retry-after", str(math.ceil(e.retry_after)).encode()),
+                    ],
+                }
+            )
+            body = {"detail": f"Too many {lane.name} requests ({e.reason})"}
+            await send(
+                {"type": "http.response.body", "body": json.dumps(body).encode()}
+            )
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release()
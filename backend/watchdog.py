@@ -0,0 +1,211 @@
+"""
+Waiting room watchdog for the Zoom meeting tracker API.
+
+Participants in the waiting room are kept in a min-heap keyed by the time they pass their
+next alert threshold (first seen waiting + N seconds). A background thread sleeps until the
+earliest deadline, so an alert fires as soon as someone has waited too long, and each
+roster update costs at most one O(log n) heap push instead of a rescan of the table.
+
+Entries are removed lazily: being admitted (seen in the joined list) or not being seen in
+the waiting room for `stale_after` seconds (they left) only updates a dict, and the heap
+entry is dropped when it reaches the top. Alerts and clears are passed to subscribers, e.g.
+the /alerts/stream server-sent events of the dashboard.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime
+
+from metrics import REGISTRY
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+OVERDUE = REGISTRY.gauge(
+    "zoom_opm_waiting_overdue", "Participants waiting longer than the first threshold"
+)
+ALERTS = REGISTRY.counter(
+    "zoom_opm_waiting_alerts_total", "Waiting room alerts by threshold", ("threshold",)
+)
+
+
+class WaitingWatchdog:
+    """Fire alerts when participants wait longer than each of `thresholds` seconds"""
+
+    def __init__(self, thresholds=(120, 300), stale_after=90, clock=time.time):
+        self.thresholds = tuple(sorted(thresholds))
+        self.stale_after = stale_after
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._heap = []  # (deadline, name, threshold index, entry generation)
+        self._waiting = {}  # name -> [first_seen, last_update, generation]
+        self._overdue = {}  # name -> latest alert
+        self._gone = set()  # admitted or left; a new waiting entry starts now
+        self._generation = 0
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Call `callback(event)` for every alert and clear; returns an unsubscribe"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def waiting(self, name, first_seen):
+        """Record a participant seen in the waiting room
+
+        Args:
+            name (str): The participant name, without role suffix.
+            first_seen (str): When the roster first saw them waiting ("%Y-%m-%d %H:%M:%S").
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._waiting.get(name)
+            if entry is not None:
+                entry[1] = now
+                return
+            if name in self._gone:
+                # The roster keeps the first time ever seen waiting; this is a re-entry
+                self._gone.discard(name)
+                started = now
+            else:
+                started = datetime.strptime(first_seen, TIMESTAMP_FORMAT).timestamp()
+            self._generation += 1
+            self._waiting[name] = [started, now, self._generation]
+            deadline = started + self.thresholds[0]
+            heapq.heappush(self._heap, (deadline, name, 0, self._generation))
+            earliest = self._heap[0][3] == self._generation
+        if earliest:
+            self._wake.set()
+
+    def admitted(self, name):
+        """Record a participant seen in the meeting, clearing any alert"""
+        with self._lock:
+            if self._waiting.pop(name, None) is None:
+                return
+            self._gone.add(name)
+            events = self._clear_locked(name)
+        self._publish(events)
+
+    def current(self):
+        """Return the names still in the waiting room, longest waiting first"""
+        with self._lock:
+            return sorted(self._waiting, key=lambda name: self._waiting[name][0])
+
+    def overdue(self):
+        """Return the current alerts, longest waiting first"""
+        now = self.clock()
+        with self._lock:
+            alerts = [
+                {**alert, "waited": int(now - self._waiting[name][0])}
+                for name, alert in self._overdue.items()
+                if name in self._waiting
+            ]
+        return sorted(alerts, key=lambda alert: -alert["waited"])
+
+    def reset(self):
+        """Forget everyone, e.g. after the database is reset"""
+        with self._lock:
+            events = [
+                event
+                for name in list(self._overdue)
+                for event in self._clear_locked(name)
+            ]
+            self._heap.clear()
+            self._waiting.clear()
+            self._gone.clear()
+        self._publish(events)
+
+    def check(self):
+        """Fire the alerts that are due and return the seconds until the next deadline"""
+        now = self.clock()
+        events = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, name, level, generation = heapq.heappop(self._heap)
+                entry = self._waiting.get(name)
+                if entry is None or entry[2] != generation:
+                    continue  # admitted or re-entered since this was pushed
+                if now - entry[1] > self.stale_after:
+                    del self._waiting[name]  # no longer in the waiting room
+                    self._gone.add(name)
+                    events.extend(self._clear_locked(name))
+                    continue
+                if level == len(self.thresholds):
+                    # Past every threshold; only check now and then that they are there
+                    heapq.heappush(
+                        self._heap, (now + self.stale_after, name, level, generation)
+                    )
+                    continue
+                threshold = self.thresholds[level]
+                alert = {
+                    "type": "overdue",
+                    "name": name,
+                    "first_seen": datetime.fromtimestamp(entry[0]).strftime(
+                        TIMESTAMP_FORMAT
+                    ),
+                    "threshold": threshold,
+                    "waited": int(now - entry[0]),
+                }
+                self._overdue[name] = alert
+                events.append(alert)
+                ALERTS.inc(str(threshold))
+                if level + 1 < len(self.thresholds):
+                    deadline = entry[0] + self.thresholds[level + 1]
+                else:
+                    deadline = now + self.stale_after
+                heapq.heappush(self._heap, (deadline, name, level + 1, generation))
+            OVERDUE.set(value=len(self._overdue))
+            wait = self._heap[0][0] - now if self._heap else None
+        self._publish(events)
+        return wait
+
+    def _clear_locked(self, name):
+        if self._overdue.pop(name, None) is None:
+            return []
+        OVERDUE.set(value=len(self._overdue))
+        return [{"type": "cleared", "name": name}]
+
+    def _publish(self, events):
+        if not events:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for event in events:
+            for callback in subscribers:
+                callback(event)
+
+    def start(self):
+        """Start the thread that fires alerts when they are due"""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="waiting-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the alert thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        logger = logging.getLogger(__name__)
+        while not self._stop.is_set():
+            try:
+                wait = self.check()
+            except Exception:  # keep watching; one bad entry must not stop alerts
+                logger.exception("Waiting room check failed")
+                wait = 1
+            self._wake.wait(wait)
+            self._wake.clear()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+"""Measure the cost of encoding roster responses, and their size on the wire
+A roster of N participants is built the way the backend returns it from /joined, then
+encoded three ways:
+
+- fastapi: what every poll cost before, jsonable_encoder() and JSONResponse.render().
+- miss: what the first read after a roster change costs now, encoding the JSON once
+  and compressing it (backend/encoded.py).
+- hit: what every other read costs, finding the cached bytes and building the response.
+
+The report has the time per read and the bytes sent for each content coding.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from rich.logging import RichHandler
+
+from telemetry import describe
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND)
+
+from encoded import EncodedCache, EncodedResponse, encode_json, orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+
+def roster(participants):
+    """Return a /joined response body for `participants` people"""
+    return {
+        f"Participant {i} Example": {
+            "first_seen": f"2024-03-05 09:{i // 60 % 60:02d}:{i % 60:02d}",
+            "last_seen": "2024-03-05 11:59:58",
+        }
+        for i in range(participants)
+    }
+
+
+def timings(function, repeat):
+    """Return the seconds each of `repeat` calls of `function` took"""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def bench(participants, repeat):
+    """Measure the three ways of answering a roster read"""
+    content = roster(participants)
+    headers = {"accept-encoding": "gzip, deflate, br"}
+    version = [0]
+
+    def miss():
+        version[0] += 1
+        cache.get("joined", version[0]).response(headers)
+
+    cache = EncodedCache(lambda status: content)
+    cache.get("joined", 0)
+    encoded = EncodedResponse(encode_json(content))
+    return {
+        "participants": participants,
+        "json_encoder": "orjson" if orjson is not None else "json",
+        "fastapi": describe(
+            timings(lambda: JSONResponse(jsonable_encoder(content)), repeat)
+        ),
+        "miss": describe(timings(miss, repeat)),
+        "hit": describe(
+            timings(lambda: cache.get("joined", version[0]).response(headers), repeat)
+        ),
+        "bytes": {
+            "identity": len(encoded.body),
+            **{coding: len(body) for coding, body in encoded.encoded.items()},
+        },
+    }
+
+
+def main():
+    """Benchmark roster response encoding and print the comparison"""
+    logging.basicConfig(
+        level="INFO",
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True)],
+    )
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="Measure roster response encoding cost and size"
+    )
+    parser.add_argument(
+        "--participants",
+        type=int,
+        default=2000,
+        help="Participants in the roster (default: 2000)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=200, help="Reads per measurement (default: 200)"
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    result = bench(args.participants, args.repeat)
+    logger.info(
+        "%d participants, %s encoder", result["participants"], result["json_encoder"]
+    )
+    for name in ("fastapi", "miss", "hit"):
+        latency = result[name]
+        logger.info(
+            "%-8s p50 %.3fms  p99 %.3fms per read",
+            name,
+            (latency["p50"] or 0) * 1000,
+            (latency["p99"] or 0) * 1000,
+        )
+    for coding, size in result["bytes"].items():
+        logger.info("%-8s %d bytes", coding, size)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+"""Measure how long the backend takes to get its roster back after a restart
+For each roster size, a temporary database is filled with participants (see
+bench_roster_memory.py), and the roster is brought back into memory two ways:
+
+- load: RosterStore.load(), reading and parsing every row from SQLite, as a restart did
+  before.
+- restore: reading the roster snapshot file and RosterStore.restore(), which checks it
+  against the database (backend/snapshot.py).
+
+The report also has the time to write a snapshot and its size, and the time to rebuild the
+search index, which a restarted backend does in the background.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from rich.logging import RichHandler
+
+from bench_roster_memory import fill
+from telemetry import describe
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND)
+
+from roster import RosterStore  # noqa: E402
+from search import NameIndex  # noqa: E402
+from snapshot import RosterSnapshots  # noqa: E402
+
+
+def timings(function, repeat):
+    """Return the seconds each of `repeat` calls of `function` took"""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def bench(participants, repeat):
+    """Measure loading, snapshotting and restoring a roster of `participants`"""
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "zoom_meeting.db")
+        fill(database, participants)
+        store = RosterStore(database)
+        path = os.path.join(directory, "zoom_meeting.snapshot")
+        snapshots = RosterSnapshots(store, path)
+
+        def write():
+            # A new one writes even though nothing changed
+            RosterSnapshots(store, path).write()
+
+        def restore():
+            restored = RosterStore(database)
+            if not restored.restore(snapshots.read()):
+                raise RuntimeError("The snapshot was not used")
+            restored.stop()
+
+        def index():
+            NameIndex().rebuild(
+                (name, status)
+                for status in ("waiting", "joined")
+                for name, _, _ in store.participants(status)
+            )
+
+        # Loading first, since a snapshot is taken of the loaded roster
+        loaded = describe(timings(store.load, repeat))
+        result = {
+            "participants": participants,
+            "load": loaded,
+            "write": describe(timings(write, repeat)),
+            "restore": describe(timings(restore, repeat)),
+            "index": describe(timings(index, 1)),
+            "snapshot_bytes": os.path.getsize(path),
+        }
+        store.stop()
+    return result
+
+
+def main():
+    """Benchmark roster restarts for each size and print the comparison"""
+    logging.basicConfig(
+        level="INFO",
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True)],
+    )
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="Measure how long the backend takes to get its roster back"
+    )
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000,100000",
+        help="Comma-separated roster sizes (default: 1000,10000,100000)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per measurement (default: 3)"
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        result = bench(size, args.repeat)
+        results.append(result)
+        logger.info(
+            "%d participants: load %.0fms, restore %.0fms, snapshot %.0fms and "
+            "%d bytes, index %.0fms in the background",
+            size,
+            result["load"]["p50"] * 1000,
+            result["restore"]["p50"] * 1000,
+            result["write"]["p50"] * 1000,
+            result["snapshot_bytes"],
+            result["index"]["p50"] * 1000,
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
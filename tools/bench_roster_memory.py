@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+"""Measure the memory the backend's in-memory roster uses per participant
+For each roster size, a temporary database is filled with participants spread over a
+multi-day program, then loaded two ways while tracemalloc traces allocations:
+
+- dict: the previous layout, a dict from (name, status) to a list of the first and last
+  seen timestamp strings and the host and co-host flags.
+- table: RosterStore.load(), which keeps one column-wise ParticipantTable per status
+  (interned names, integer timestamps, see backend/records.py).
+
+The report has the bytes per participant that stay allocated after loading.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from rich.logging import RichHandler
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND)
+
+from roster import RosterStore  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE participants (
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    host BOOLEAN DEFAULT 0,
+    co_host BOOLEAN DEFAULT 0,
+    PRIMARY KEY (name, status)
+)
+"""
+
+
+def fill(database, participants):
+    """Write `participants` rows, one every 2 seconds, some waiting and some hosts"""
+    start = int(time.time()) - 3 * 24 * 3600
+
+    def stamp(epoch):
+        return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
+
+    with sqlite3.connect(database) as conn:
+        conn.execute(SCHEMA)
+        conn.executemany(
+            "INSERT INTO participants VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    f"Participant {i} Example",
+                    "waiting" if i % 5 == 0 else "joined",
+                    stamp(start + 2 * i),
+                    stamp(start + 2 * i + 600),
+                    i % 100 == 0,
+                    i % 100 == 1,
+                )
+                for i in range(participants)
+            ),
+        )
+
+
+def measure(build):
+    """Return the bytes still allocated after `build()`, keeping its result alive"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return retained
+
+
+def load_dict(conn):
+    """Load the roster into the previous dict of lists layout"""
+    return {
+        (name, status): [first_seen, last_seen, bool(host), bool(co_host)]
+        for name, status, first_seen, last_seen, host, co_host in conn.execute(
+            "SELECT name, status, first_seen, last_seen, host, co_host "
+            "FROM participants ORDER BY rowid"
+        )
+    }
+
+
+def bench(participants):
+    """Measure both layouts for one roster size and return the summary"""
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "zoom_meeting.db")
+        fill(database, participants)
+        with sqlite3.connect(database) as conn:
+            dict_bytes = measure(lambda: load_dict(conn))
+        store = RosterStore(database)
+        store._connect()  # the connection is not part of the roster
+        table_bytes = measure(lambda: store.load() or store)
+        store.stop()
+    return {
+        "participants": participants,
+        "dict_bytes_per_participant": dict_bytes / participants,
+        "table_bytes_per_participant": table_bytes / participants,
+        "saving": 1 - table_bytes / dict_bytes,
+    }
+
+
+def main():
+    """Measure each roster size and print the comparison"""
+    logging.basicConfig(
+        level="INFO",
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True)],
+    )
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="Measure the backend roster's memory per participant"
+    )
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000,100000",
+        help="Comma-separated roster sizes (default: 1000,10000,100000)",
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for participants in (int(n) for n in args.sizes.split(",")):
+        result = bench(participants)
+        results.append(result)
+        logger.info(
+            "%7d participants: dict %.0f bytes, table %.0f bytes each (%.0f%% less)",
+            participants,
+            result["dict_bytes_per_participant"],
+            result["table_bytes_per_participant"],
+            result["saving"] * 100,
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
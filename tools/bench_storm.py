@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+
+"""Measure dashboard reads while roster updates flood the backend
+For each ingest rate limit, a fresh backend is started in a temporary directory (see
+bench_workers.py) with ZOOM_INGEST_RATE set. Writer processes send /joined_list updates as
+fast as they can, like a runaway auto-update loop, while reader processes poll /joined like
+dashboard tabs. The report has the read latency, how many updates were accepted or answered
+with 429, and the time requests waited for their lane (zoom_opm_admission_wait_seconds).
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+
+from rich.logging import RichHandler
+
+from bench_workers import free_port, read_loop, request, start_backend
+from telemetry import describe
+
+WAIT_SUM = re.compile(
+    r'^zoom_opm_admission_wait_seconds_(sum|count)\{lane="(\w+)"\} (\S+)$'
+)
+
+
+def write_loop(args):
+    """Writer process: send roster updates until `stop_at`, return {status: count}"""
+    port, names, stop_at = args
+    connection = http.client.HTTPConnection("localhost", port, timeout=30)
+    statuses = {}
+    batch = [f"Participant {n}" for n in range(names)]
+    while time.time() < stop_at:
+        status, _ = request(connection, "PUT", "/joined_list", batch)
+        statuses[status] = statuses.get(status, 0) + 1
+    connection.close()
+    return statuses
+
+
+def lane_waits(port):
+    """Return {lane: mean seconds waited} from the backend's metrics"""
+    connection = http.client.HTTPConnection("localhost", port, timeout=30)
+    connection.request("GET", "/metrics")
+    text = connection.getresponse().read().decode()
+    connection.close()
+    totals = {}
+    for line in text.splitlines():
+        match = WAIT_SUM.match(line)
+        if match:
+            kind, lane, value = match.groups()
+            totals.setdefault(lane, {})[kind] = float(value)
+    return {
+        lane: values.get("sum", 0) / values["count"]
+        for lane, values in totals.items()
+        if values.get("count")
+    }
+
+
+def bench(rate, writers, readers, names, seconds):
+    """Run one storm and return its summary"""
+    os.environ["ZOOM_INGEST_RATE"] = str(rate)
+    with tempfile.TemporaryDirectory() as directory:
+        directory = os.path.join(directory, "backend")
+        os.mkdir(directory)
+        port = free_port()
+        process = start_backend(directory, port, 1)
+        try:
+            stop_at = time.time() + seconds
+            with multiprocessing.Pool(writers + readers) as pool:
+                writes = pool.map_async(write_loop, [(port, names, stop_at)] * writers)
+                reads = pool.map_async(
+                    read_loop, [(port, "/joined", stop_at)] * readers
+                )
+                writes, reads = writes.get(), reads.get()
+            waits = lane_waits(port)
+        finally:
+            process.terminate()
+            process.wait(30)
+    statuses = {}
+    for result in writes:
+        for status, count in result.items():
+            statuses[status] = statuses.get(status, 0) + count
+    latencies = [latency for _, values, _ in reads for latency in values]
+    return {
+        "ingest_rate": rate,
+        "reads_per_second": len(latencies) / seconds,
+        "read_latency": describe(latencies),
+        "writes": {str(status): count for status, count in sorted(statuses.items())},
+        "mean_wait_seconds": waits,
+    }
+
+
+def main():
+    """Flood the backend with updates for each ingest rate and print the comparison"""
+    logging.basicConfig(
+        level="INFO",
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True)],
+    )
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="Measure backend reads during a flood of roster updates"
+    )
+    parser.add_argument(
+        "--rates",
+        default="0,50",
+        help="Comma-separated ZOOM_INGEST_RATE values, 0 for no limit (default: 0,50)",
+    )
+    parser.add_argument(
+        "--writers", type=int, default=8, help="Writer processes (default: 8)"
+    )
+    parser.add_argument(
+        "--readers", type=int, default=2, help="Reader processes (default: 2)"
+    )
+    parser.add_argument(
+        "--names",
+        type=int,
+        default=200,
+        help="Participants per update (default: 200)",
+    )
+    parser.add_argument(
+        "--seconds", type=float, default=10, help="Seconds per run (default: 10)"
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for rate in (float(r) for r in args.rates.split(",")):
+        result = bench(rate, args.writers, args.readers, args.names, args.seconds)
+        results.append(result)
+        latency = result["read_latency"]
+        logger.info(
+            "ingest rate %s: reads p50 %.1fms p99 %.1fms (%.0f/s), writes %s, "
+            "mean lane wait %s",
+            f"{rate:g}/s" if rate else "unlimited",
+            (latency["p50"] or 0) * 1000,
+            (latency["p99"] or 0) * 1000,
+            result["reads_per_second"],
+            result["writes"],
+            {
+                lane: f"{wait * 1000:.1f}ms"
+                for lane, wait in result["mean_wait_seconds"].items()
+            },
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+"""Measure backend read throughput with one or more worker processes
+For each worker count, a fresh backend is started in a temporary directory (uvicorn with
+--workers N and ZOOM_BACKEND_WORKERS=N, so the workers keep their in-memory rosters in step
+through the database). The roster is filled through the API, and client processes then read
+an endpoint over keep-alive connections for a fixed time. The report has requests per second
+and latency per worker count, and checks that every worker served the complete roster,
+whichever worker received the updates.
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from rich.logging import RichHandler
+
+from telemetry import describe
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+
+def free_port():
+    """Return a TCP port nothing is listening on"""
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def request(connection, method, path, body=None):
+    """Send one request and return (status, decoded JSON body)"""
+    data = json.dumps(body).encode() if body is not None else None
+    headers = {"Content-Type": "application/json"} if data else {}
+    connection.request(method, path, body=data, headers=headers)
+    response = connection.getresponse()
+    payload = response.read()
+    return response.status, json.loads(payload) if payload else None
+
+
+def start_backend(directory, port, workers):
+    """Start the backend in `directory` and wait until it answers /health"""
+    env = dict(os.environ, ZOOM_BACKEND_WORKERS=str(workers))
+    env["PYTHONPATH"] = os.path.abspath(BACKEND)
+    # Filling the roster must not hit the ingest limit; bench_storm.py sets its own
+    env.setdefault("ZOOM_INGEST_RATE", "0")
+    log = open(os.path.join(directory, "server.log"), "w")
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "server:app",
+            "--host",
+            "localhost",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=directory,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The backend exited, see {log.name}")
+        try:
+            connection = http.client.HTTPConnection("localhost", port, timeout=5)
+            if request(connection, "GET", "/health")[0] == 200:
+                connection.close()
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("The backend did not start within 30 seconds")
+
+
+def read_loop(args):
+    """Client process: read `path` until `stop_at` and return (count, latencies, sizes)"""
+    port, path, stop_at = args
+    connection = http.client.HTTPConnection("localhost", port, timeout=30)
+    latencies = []
+    sizes = set()
+    while time.time() < stop_at:
+        start = time.perf_counter()
+        status, body = request(connection, "GET", path)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            sizes.add(-status)
+        elif isinstance(body, dict):
+            sizes.add(len(body))
+    connection.close()
+    return len(latencies), latencies, sizes
+
+
+def bench(workers, names, clients, seconds, path, settle):
+    """Run one benchmark and return its summary"""
+    logger = logging.getLogger(__name__)
+    with tempfile.TemporaryDirectory() as directory:
+        os.mkdir(os.path.join(directory, "backend"))
+        directory = os.path.join(directory, "backend")
+        port = free_port()
+        process = start_backend(directory, port, workers)
+        try:
+            # Fill the roster through whichever workers accept the connections
+            for i in range(0, names, 50):
+                connection = http.client.HTTPConnection("localhost", port, timeout=30)
+                batch = [f"Participant {n}" for n in range(i, min(i + 50, names))]
+                request(connection, "PUT", "/joined_list", batch)
+                connection.close()
+            time.sleep(settle)
+            logger.info(
+                "%d workers: reading %s with %d clients", workers, path, clients
+            )
+            stop_at = time.time() + seconds
+            with multiprocessing.Pool(clients) as pool:
+                results = pool.map(read_loop, [(port, path, stop_at)] * clients)
+        finally:
+            process.terminate()
+            process.wait(30)
+    latencies = [latency for _, values, _ in results for latency in values]
+    sizes = set().union(*(result[2] for result in results))
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / seconds,
+        "latency": describe(latencies),
+        "consistent": sizes == {names},
+        "sizes": sorted(sizes),
+    }
+
+
+def main():
+    """Benchmark the backend for each worker count and print the comparison"""
+    logging.basicConfig(
+        level="INFO",
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True)],
+    )
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="Measure backend read throughput by number of worker processes"
+    )
+    parser.add_argument(
+        "--workers",
+        default="1,2,4",
+        help="Comma-separated worker counts to compare (default: 1,2,4)",
+    )
+    parser.add_argument(
+        "--clients",
+        type=int,
+        default=8,
+        help="Client processes reading at once (default: 8)",
+    )
+    parser.add_argument(
+        "--seconds", type=float, default=10, help="Seconds per run (default: 10)"
+    )
+    parser.add_argument(
+        "--names",
+        type=int,
+        default=500,
+        help="Participants in the roster (default: 500)",
+    )
+    parser.add_argument(
+        "--path", default="/joined", help="Endpoint to read (default: /joined)"
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=1.0,
+        help="Seconds for the workers to catch up after filling the roster (default: 1)",
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for workers in (int(w) for w in args.workers.split(",")):
+        results.append(
+            bench(
+                workers, args.names, args.clients, args.seconds, args.path, args.settle
+            )
+        )
+    baseline = results[0]["requests_per_second"] or 1
+    logger.info("%d CPUs", os.cpu_count())
+    for result in results:
+        latency = result["latency"]
+        logger.info(
+            "%d workers: %.0f requests/s (x%.2f)  p50 %.1fms  p99 %.1fms  %s",
+            result["workers"],
+            result["requests_per_second"],
+            result["requests_per_second"] / baseline,
+            (latency["p50"] or 0) * 1000,
+            (latency["p99"] or 0) * 1000,
+            "consistent" if result["consistent"] else f"INCONSISTENT {result['sizes']}",
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    raise SystemExit(0 if all(result["consistent"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
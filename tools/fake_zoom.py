@@ -0,0 +1,424 @@
+#!/usr/bin/env python
+
+"""Local stand-in for the Zoom web client, used for offline stress testing
+This script serves just enough of the Zoom join flow for stress_test.py to run against it:
+the regular /j/<id>?pwd=... landing page, the direct /wc/<id>/join web app page with the
+name input and Mute button, and an iframe holding the Join button. Page latency and
+failure injection are configurable so join-throughput runs are reproducible.
+"""
+
+import argparse
+import html
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+from rich.logging import RichHandler
+
+LANDING_PATH = re.compile(r"^/j/(\d+)$")
+JOIN_PATH = re.compile(r"^/wc/(\d+)/join$")
+PREVIEW_PATH = re.compile(r"^/wc/(\d+)/preview$")
+
+LANDING_PAGE = """<!doctype html>
+<html><head><title>Launch Meeting - Zoom</title></head>
+<body>
+<h2>Click Open zoom.us on the dialog shown by your browser</h2>
+<button type="button">Launch Meeting</button>
+<p>Don't have Zoom Client installed?
+<a href="/wc/{meeting_id}/join?pwd={pwd}">Join from Your Browser</a></p>
+</body></html>
+"""
+
+JOIN_PAGE = """<!doctype html>
+<html><head><title>Zoom</title></head>
+<body>
+<h1>Enter Meeting Info</h1>
+<div id="preview">
+<button type="button" id="mute" aria-label="Mute" onclick="toggleMute()">Mute</button>
+</div>
+<label for="name">Your Name</label>
+<input id="name" type="text" placeholder="Your Name" value="{uname}">
+{join_area}
+<script>
+function toggleMute() {{
+    var btn = document.getElementById("mute");
+    var label = btn.textContent === "Mute" ? "Unmute" : "Mute";
+    btn.textContent = label;
+    btn.setAttribute("aria-label", label);
+}}
+</script>
+</body></html>
+"""
+
+PREVIEW_PAGE = """<!doctype html>
+<html><head><title>Zoom Preview</title></head>
+<body>
+<button type="button" aria-label="Audio Settings">Audio Settings</button>
+<div id="controls">{join_control}</div>
+</body></html>
+"""
+
+# The Join button and the meeting view share this script. It looks for the
+# name and mute state in the same document first, then in the parent page.
+JOIN_SCRIPT = """<script>
+function zoomDoc() {{
+    return document.getElementById("name") ? document : window.parent.document;
+}}
+function joinMeeting() {{
+    var doc = zoomDoc();
+    var muteBtn = doc.getElementById("mute");
+    var body = JSON.stringify({{
+        meeting_id: "{meeting_id}",
+        name: doc.getElementById("name").value,
+        muted: muteBtn ? muteBtn.textContent === "Unmute" : false
+    }});
+    fetch("/api/join", {{method: "POST", body: body}})
+        .then(function (r) {{ return r.json().then(function (d) {{ return [r.ok, d]; }}); }})
+        .then(function (res) {{
+            var controls = document.getElementById("controls");
+            if (res[0]) {{
+                controls.innerHTML = '<button type="button" aria-label="Join Audio">' +
+                    'Join Audio by Computer</button><button type="button">Leave</button>';
+            }} else {{
+                controls.innerHTML = '<p class="error">' + res[1].error + '</p>';
+            }}
+        }});
+}}
+function showJoin() {{
+    document.getElementById("controls").innerHTML =
+        '<button type="submit" class="join-btn" onclick="joinMeeting()">Join</button>';
+}}
+setTimeout(showJoin, {render_delay_ms});
+</script>
+"""
+
+
+class FakeZoomServer(ThreadingHTTPServer):
+    """HTTP server holding the fake meeting state and the injection settings"""
+
+    daemon_threads = True
+
+    def __init__(self, server_address, options=None):
+        super().__init__(server_address, FakeZoomHandler)
+        options = options or {}
+        self.latency = options.get("latency", 0.0)
+        self.jitter = options.get("jitter", 0.0)
+        self.join_latency = options.get("join_latency", 0.0)
+        self.render_delay = options.get("render_delay", 0.0)
+        self.failure_rate = options.get("failure_rate", 0.0)
+        self.missing_join_rate = options.get("missing_join_rate", 0.0)
+        self.join_failure_rate = options.get("join_failure_rate", 0.0)
+        self.use_iframe = options.get("use_iframe", True)
+        self.rng = random.Random(options.get("seed"))
+        self.lock = threading.Lock()
+        self.roster = {}
+        self.stats = {
+            "pages": 0,
+            "page_failures": 0,
+            "missing_join": 0,
+            "joins": 0,
+            "join_failures": 0,
+        }
+
+    @property
+    def base_url(self):
+        """Return the http://host:port prefix the server is reachable at"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def roll(self, rate):
+        """Return True with probability `rate`, using the seeded generator"""
+        if rate <= 0:
+            return False
+        with self.lock:
+            return self.rng.random() < rate
+
+    def delay(self, base):
+        """Sleep for `base` seconds plus a random share of the configured jitter"""
+        if self.jitter > 0:
+            with self.lock:
+                base += self.rng.uniform(0, self.jitter)
+        if base > 0:
+            time.sleep(base)
+
+    def count(self, key):
+        """Increment one of the request statistics counters"""
+        with self.lock:
+            self.stats[key] += 1
+
+    def record_join(self, meeting_id, name, muted):
+        """Add a participant to the meeting roster"""
+        with self.lock:
+            self.roster.setdefault(meeting_id, []).append(
+                {"name": name, "muted": muted, "joined_at": time.time()}
+            )
+            self.stats["joins"] += 1
+
+    def snapshot(self):
+        """Return a copy of the roster and statistics"""
+        with self.lock:
+            return {
+                "roster": {k: list(v) for k, v in self.roster.items()},
+                "stats": dict(self.stats),
+            }
+
+    def reset(self):
+        """Forget all participants and statistics"""
+        with self.lock:
+            self.roster.clear()
+            for key in self.stats:
+                self.stats[key] = 0
+
+
+class FakeZoomHandler(BaseHTTPRequestHandler):
+    """Serve the fake Zoom pages and the small JSON API behind them"""
+
+    server_version = "FakeZoom/1.0"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        logging.getLogger(__name__).debug(
+            "%s - %s", self.address_string(), format % args
+        )
+
+    def send_body(self, status, body, content_type="text/html; charset=utf-8"):
+        """Send a complete response with the given status and body"""
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status, payload):
+        """Send a JSON response"""
+        self.send_body(status, json.dumps(payload), "application/json")
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Route GET requests to the landing, join, preview and API pages"""
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/api/roster":
+            self.send_json(200, self.server.snapshot())
+            return
+
+        for pattern, render in (
+            (LANDING_PATH, self.render_landing),
+            (JOIN_PATH, self.render_join),
+            (PREVIEW_PATH, self.render_preview),
+        ):
+            match = pattern.match(url.path)
+            if match:
+                self.server.count("pages")
+                self.server.delay(self.server.latency)
+                if self.server.roll(self.server.failure_rate):
+                    self.server.count("page_failures")
+                    self.send_body(503, "<h1>Service Unavailable</h1>")
+                    return
+                self.send_body(200, render(match.group(1), query))
+                return
+
+        self.send_body(404, "<h1>Not Found</h1>")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Handle the join and reset API calls"""
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+
+        if url.path == "/api/reset":
+            self.server.reset()
+            self.send_json(200, {"message": "Fake meeting reset."})
+            return
+
+        if url.path != "/api/join":
+            self.send_json(404, {"error": "Not Found"})
+            return
+
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            self.send_json(400, {"error": "Invalid JSON"})
+            return
+
+        self.server.delay(self.server.join_latency)
+        if self.server.roll(self.server.join_failure_rate):
+            self.server.count("join_failures")
+            self.send_json(503, {"error": "Unable to join this meeting"})
+            return
+
+        self.server.record_join(
+            str(payload.get("meeting_id", "")),
+            str(payload.get("name", "")),
+            bool(payload.get("muted")),
+        )
+        self.send_json(200, {"message": "Joined"})
+
+    def render_landing(self, meeting_id, query):
+        """The regular /j/<id>?pwd=... page with the 'Join from Your Browser' link"""
+        return LANDING_PAGE.format(
+            meeting_id=meeting_id, pwd=quote(query.get("pwd", ""))
+        )
+
+    def render_join(self, meeting_id, query):
+        """The 'Enter Meeting Info' page the direct web app URL lands on"""
+        if self.server.use_iframe:
+            src = f"/wc/{meeting_id}/preview?pwd={quote(query.get('pwd', ''))}"
+            join_area = f'<iframe id="webclient" src="{src}"></iframe>'
+        else:
+            join_area = f'<div id="controls">{self.join_control(meeting_id)}</div>'
+        return JOIN_PAGE.format(
+            uname=html.escape(query.get("uname", ""), quote=True),
+            join_area=join_area,
+        )
+
+    def render_preview(self, meeting_id, _query):
+        """The iframe content holding the Join button"""
+        return PREVIEW_PAGE.format(join_control=self.join_control(meeting_id))
+
+    def join_control(self, meeting_id):
+        """Markup for the Join button, or a stall message when injecting a missing button"""
+        if self.server.roll(self.server.missing_join_rate):
+            self.server.count("missing_join")
+            return "<p>Connecting...</p>"
+        return JOIN_SCRIPT.format(
+            meeting_id=meeting_id,
+            render_delay_ms=int(self.server.render_delay * 1000),
+        )
+
+
+def start_fake_zoom(host="127.0.0.1", port=0, options=None):
+    """Start a FakeZoomServer in a background thread and return it
+
+    Args:
+        host (str): Interface to bind to.
+        port (int): Port to listen on, 0 picks a free port.
+        options (dict): Latency and failure injection settings (see FakeZoomServer).
+
+    Returns:
+        FakeZoomServer: The running server. Call shutdown() and server_close() to stop it.
+    """
+    server = FakeZoomServer((host, port), options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def add_injection_arguments(parser):
+    """Add the latency and failure injection options to an argparse parser"""
+    parser.add_argument(
+        "--fake-latency",
+        type=float,
+        default=0.0,
+        help="Seconds of latency added to every page load (default: 0)",
+    )
+    parser.add_argument(
+        "--fake-jitter",
+        type=float,
+        default=0.0,
+        help="Random extra latency of up to this many seconds (default: 0)",
+    )
+    parser.add_argument(
+        "--fake-join-latency",
+        type=float,
+        default=0.0,
+        help="Seconds of latency added to each join request (default: 0)",
+    )
+    parser.add_argument(
+        "--fake-render-delay",
+        type=float,
+        default=0.0,
+        help="Seconds before the Join button appears on the page (default: 0)",
+    )
+    parser.add_argument(
+        "--fake-failure-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of page loads answered with HTTP 503 (default: 0)",
+    )
+    parser.add_argument(
+        "--fake-missing-join-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of pages served without a Join button (default: 0)",
+    )
+    parser.add_argument(
+        "--fake-join-failure-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of join requests rejected by the meeting (default: 0)",
+    )
+    parser.add_argument(
+        "--fake-no-iframe",
+        action="store_true",
+        help="Put the Join button on the main page instead of inside an iframe",
+    )
+    parser.add_argument(
+        "--fake-seed",
+        type=int,
+        default=None,
+        help="Random seed for reproducible latency and failure injection",
+    )
+
+
+def injection_options(args):
+    """Build FakeZoomServer options from parsed add_injection_arguments() options"""
+    return {
+        "latency": args.fake_latency,
+        "jitter": args.fake_jitter,
+        "join_latency": args.fake_join_latency,
+        "render_delay": args.fake_render_delay,
+        "failure_rate": args.fake_failure_rate,
+        "missing_join_rate": args.fake_missing_join_rate,
+        "join_failure_rate": args.fake_join_failure_rate,
+        "use_iframe": not args.fake_no_iframe,
+        "seed": args.fake_seed,
+    }
+
+
+def main():
+    """Run the fake Zoom web client until interrupted"""
+    logging.basicConfig(
+        level="INFO",
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True)],
+    )
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="Serve a local stand-in for the Zoom web client join flow"
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="Port to listen on (default: 8765)"
+    )
+    add_injection_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeZoomServer((args.host, args.port), injection_options(args))
+    logger.info("Fake Zoom web client listening on %s", server.base_url)
+    logger.info(
+        "Use: stress_test.py --meeting-url '%s/j/123456789?pwd=test' "
+        "--web-client-base %s",
+        server.base_url,
+        server.base_url,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down, %s", server.snapshot()["stats"])
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Lifecycle manager for stress test participants
+Participant threads hold the meeting by waiting on the shutdown event instead of polling,
+the main thread sleeps until every participant has finished or a shutdown is requested,
+and teardown closes all browsers in parallel within a bounded time.
+"""
+
+import logging
+import queue
+import signal
+import socket
+import threading
+import time
+
+
+class ParticipantLifecycle:
+    """Track running participants and their browsers, and coordinate shutdown"""
+
+    def __init__(self, shutdown_event=None):
+        self.shutdown_event = shutdown_event or threading.Event()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._drivers = {}
+        self._active = 0
+        self._signal_sockets = None
+
+    def request_shutdown(self):
+        """Ask every participant to leave. Not for signal handlers, see handle_signals()."""
+        self.shutdown_event.set()
+        self._wake.set()
+
+    def handle_signals(self, signals=(signal.SIGINT, signal.SIGTERM), on_signal=None):
+        """Request a shutdown when one of `signals` arrives. Call from the main thread.
+
+        Python runs signal handlers in the main thread between two bytecodes, possibly
+        while that thread holds the lock inside the event it is waiting on, so setting an
+        event from a handler can deadlock. Instead, signal.set_wakeup_fd() writes the
+        signal number to a socket, and a watcher thread reads it, calls
+        `on_signal(signum)` and requests the shutdown.
+        """
+        reader, writer = socket.socketpair()
+        writer.setblocking(False)
+        self._signal_sockets = (reader, writer)  # closed with the process
+        signal.set_wakeup_fd(writer.fileno())
+        for signum in signals:
+            # The handler only has to exist; the wakeup byte does the work
+            signal.signal(signum, lambda _signum, _frame: None)
+
+        def watch():
+            while True:
+                data = reader.recv(1)
+                if not data:
+                    return
+                if data[0] in signals:
+                    if on_signal:
+                        on_signal(data[0])
+                    self.request_shutdown()
+
+        threading.Thread(target=watch, name="signal-watcher", daemon=True).start()
+
+    @property
+    def shutting_down(self):
+        """True once a shutdown has been requested"""
+        return self.shutdown_event.is_set()
+
+    def pause(self, seconds):
+        """Sleep for up to `seconds`, returning True early if shutdown is requested"""
+        return self.shutdown_event.wait(seconds)
+
+    def hold(self, seconds):
+        """Hold the meeting for `seconds`. Returns True if the full time elapsed."""
+        return not self.shutdown_event.wait(seconds)
+
+    def started(self):
+        """Record that a participant worker has started"""
+        with self._lock:
+            self._active += 1
+
+    def finished(self):
+        """Record that a participant worker has exited"""
+        with self._lock:
+            self._active -= 1
+            if self._active <= 0:
+                self._wake.set()
+
+    @property
+    def active(self):
+        """Number of participant workers still running"""
+        with self._lock:
+            return self._active
+
+    def register_driver(self, participant_id, participant_name, driver):
+        """Register a participant's browser so teardown can close it"""
+        with self._lock:
+            self._drivers[participant_id] = (participant_name, driver)
+
+    def release_driver(self, participant_id):
+        """Take a participant's browser back from the registry
+
+        Returns:
+            The driver, or None if teardown has already claimed it.
+        """
+        with self._lock:
+            entry = self._drivers.pop(participant_id, None)
+        return entry[1] if entry else None
+
+    def wait_all(self):
+        """Block until every worker has exited or a shutdown is requested"""
+        while not self.shutting_down and self.active > 0:
+            self._wake.wait()
+            self._wake.clear()
+
+    def teardown(self, timeout, logger=None):
+        """Close every registered browser in parallel, waiting at most `timeout` seconds
+
+        Returns:
+            Tuple[int, int, float]: (browsers closed, browsers still closing, elapsed seconds)
+        """
+        logger = logger or logging.getLogger(__name__)
+        with self._lock:
+            entries = list(self._drivers.values())
+            self._drivers.clear()
+        start = time.monotonic()
+        if not entries:
+            return 0, 0, 0.0
+
+        work = queue.Queue()
+        for entry in entries:
+            work.put(entry)
+        closed = []
+        all_closed = threading.Event()
+
+        def close_browsers():
+            while True:
+                try:
+                    name, driver = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    driver.quit()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logger.debug("Error closing browser for %s: %s", name, e)
+                with self._lock:
+                    closed.append(name)
+                    if len(closed) == len(entries):
+                        all_closed.set()
+
+        # Daemon threads, so a browser that hangs on quit() cannot block exit
+        for i in range(min(32, len(entries))):
+            threading.Thread(
+                target=close_browsers, name=f"teardown-{i}", daemon=True
+            ).start()
+        all_closed.wait(timeout)
+        with self._lock:
+            done = len(closed)
+        return done, len(entries) - done, time.monotonic() - start
+
+    def join_workers(self, threads, deadline):
+        """Wait for worker threads until the monotonic deadline passes
+
+        Returns:
+            list: Threads that are still alive.
+        """
+        for thread in threads:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            thread.join(timeout=remaining)
+        return [t for t in threads if t.is_alive()]
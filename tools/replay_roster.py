@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+
+"""Replay recorded zoom-manage roster logs against the backend
+zoom-manage appends a block to logs/YYYYMMDD-roster.txt on every roster pass:
+
+    === 03/05/2024 09:08:07 ===
+    Waiting Room:
+      1. Jane Doe
+    Joined:
+      1. John Roe (Host, me)
+    === 2 participants 03/05/2024 09:08:09 ===
+
+(without the section headers when nobody is waiting). This tool parses those blocks and
+sends each one to the backend the way zoom-manage does (/waiting_list, then /joined_list,
+in batches), at the recorded pace, N times faster, or as fast as possible. Afterwards it
+checks the backend's roster against the log and reports request latency and throughput,
+so backend changes can be measured on real meeting churn.
+"""
+
+import argparse
+import glob
+import http.client
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from urllib.parse import urlparse
+
+from rich.logging import RichHandler
+
+from telemetry import describe
+
+TIME_FORMAT = "%m/%d/%Y %H:%M:%S"
+BLOCK_START = re.compile(r"^=== (\d\d/\d\d/\d{4} \d\d:\d\d:\d\d) ===$")
+BLOCK_END = re.compile(r"^=== (\d+) participants? (.+) ===$")
+ENTRY = re.compile(r"^\s*\d+\. (.*)$")
+ROLES = re.compile(r"^(.*?)\s+\(([^)]+)\)$")
+
+
+@dataclass
+class RosterPass:
+    """One roster block: when it was taken and who was waiting or joined"""
+
+    time: datetime
+    waiting: list = field(default_factory=list)
+    joined: list = field(default_factory=list)
+
+
+def strip_roles(name):
+    """Remove a role suffix like " (Host, me)", as the backend does"""
+    match = ROLES.match(name)
+    return match.group(1) if match else name
+
+
+def parse_roster(lines):
+    """Parse roster log lines into RosterPass records
+
+    Blocks without their closing "=== N participants ... ===" line (an interrupted run)
+    are skipped, as are blocks whose count does not match their entries.
+
+    Args:
+        lines (Iterable[str]): Lines of one or more roster files.
+
+    Returns:
+        list: RosterPass records in file order.
+    """
+    logger = logging.getLogger(__name__)
+    passes = []
+    current = None
+    section = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        start = BLOCK_START.match(line)
+        if start:
+            if current is not None:
+                logger.warning("Skipping unfinished roster block at %s", current.time)
+            current = RosterPass(datetime.strptime(start.group(1), TIME_FORMAT))
+            section = current.joined
+            continue
+        if current is None:
+            continue
+        end = BLOCK_END.match(line)
+        if end:
+            if int(end.group(1)) == len(current.waiting) + len(current.joined):
+                passes.append(current)
+            else:
+                logger.warning(
+                    "Skipping roster block with a bad count at %s", current.time
+                )
+            current = None
+        elif line == "Waiting Room:":
+            section = current.waiting
+        elif line == "Joined:":
+            section = current.joined
+        else:
+            entry = ENTRY.match(line)
+            if entry:
+                section.append(entry.group(1))
+    return passes
+
+
+def read_roster_files(paths):
+    """Parse roster files, or every *-roster.txt file in a directory, in name order"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*-roster.txt"))))
+        else:
+            files.append(path)
+    passes = []
+    for path in files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            passes.extend(parse_roster(f))
+    return passes
+
+
+class Replayer:
+    """Send roster passes to the backend over one keep-alive connection"""
+
+    def __init__(self, base_url, batch_size=50, timeout=30, max_retries=10):
+        url = urlparse(base_url)
+        self.connection = http.client.HTTPConnection(
+            url.hostname, url.port or 80, timeout=timeout
+        )
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.latencies = []
+        self.errors = 0
+        self.throttled = 0
+        self.names_sent = 0
+
+    def request(self, method, path, body=None):
+        """Send one request and return the decoded JSON response
+
+        A 429 from the backend's ingest limit (ZOOM_INGEST_RATE) is sent again after
+        its Retry-After time, up to max_retries times, like the spool does.
+        """
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if data else {}
+        for _ in range(self.max_retries + 1):
+            start = time.perf_counter()
+            self.connection.request(method, path, body=data, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+            elapsed = time.perf_counter() - start
+            if response.status != 429:
+                break
+            self.throttled += 1
+            retry_after = response.getheader("Retry-After", "1")
+            time.sleep(int(retry_after) if retry_after.isdigit() else 1)
+        if response.status >= 400:
+            raise RuntimeError(f"{method} {path} returned {response.status}: {payload}")
+        return elapsed, json.loads(payload) if payload else None
+
+    def send_list(self, path, names):
+        """Send names in batches like zoom-manage's trackListBatched"""
+        for i in range(0, len(names), self.batch_size):
+            batch = names[i : i + self.batch_size]
+            try:
+                elapsed, _ = self.request("PUT", path, batch)
+            except (OSError, RuntimeError, http.client.HTTPException) as e:
+                logging.getLogger(__name__).error("%s", e)
+                self.errors += 1
+                self.connection.close()
+                continue
+            self.latencies.append(elapsed)
+            self.names_sent += len(batch)
+
+    def replay(self, passes, speed=1.0):
+        """Replay passes, keeping their recorded spacing divided by speed (0 = no waiting)
+
+        Returns:
+            float: Wall-clock seconds taken.
+        """
+        logger = logging.getLogger(__name__)
+        start = time.monotonic()
+        first = passes[0].time if passes else None
+        for number, roster_pass in enumerate(passes, 1):
+            if speed > 0:
+                due = (roster_pass.time - first).total_seconds() / speed
+                delay = due - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.send_list("/waiting_list", roster_pass.waiting)
+            self.send_list("/joined_list", roster_pass.joined)
+            if number % 100 == 0:
+                logger.info("Replayed %d of %d roster passes", number, len(passes))
+        return time.monotonic() - start
+
+    def check(self, passes, exact):
+        """Compare the backend roster with every name in the log
+
+        Args:
+            passes (list): The replayed RosterPass records.
+            exact (bool): The backend was reset first, so it should hold nothing else.
+
+        Returns:
+            dict: {status: {"missing": [...], "unexpected": [...]}}
+        """
+        result = {}
+        for status in ("waiting", "joined"):
+            expected = {
+                strip_roles(name) for p in passes for name in getattr(p, status)
+            }
+            _, roster = self.request("GET", f"/{status}")
+            actual = set(roster)
+            result[status] = {
+                "missing": sorted(expected - actual),
+                "unexpected": sorted(actual - expected) if exact else [],
+            }
+        return result
+
+
+def report(passes, replayer, elapsed, check):
+    """Return the replay summary as a dict"""
+    return {
+        "passes": len(passes),
+        "requests": len(replayer.latencies),
+        "errors": replayer.errors,
+        "throttled": replayer.throttled,
+        "names": replayer.names_sent,
+        "seconds": elapsed,
+        "requests_per_second": len(replayer.latencies) / elapsed if elapsed else None,
+        "names_per_second": replayer.names_sent / elapsed if elapsed else None,
+        "latency": describe(replayer.latencies),
+        "check": check,
+    }
+
+
+def main():
+    """Replay roster logs and print the throughput and latency report"""
+    logging.basicConfig(
+        level="INFO",
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True)],
+    )
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="Replay zoom-manage roster logs against the backend"
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="Roster files, or directories of *-roster.txt files"
+    )
+    parser.add_argument(
+        "--backend",
+        default="http://localhost:5000",
+        help="Backend URL (default: http://localhost:5000)",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0,
+        help="Replay N times faster than recorded, 1 for real time, "
+        "0 for as fast as possible (default: 0)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=50,
+        help="Names per request, like ZOOM_MANAGE_BATCH_SIZE (default: 50)",
+    )
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="POST /reset first (backs up the database) and check the exact roster",
+    )
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    passes = read_roster_files(args.paths)
+    if not passes:
+        parser.error("No complete roster blocks found")
+    logger.info(
+        "Replaying %d roster passes from %s to %s",
+        len(passes),
+        passes[0].time,
+        passes[-1].time,
+    )
+
+    replayer = Replayer(args.backend, batch_size=args.batch_size)
+    if args.reset:
+        replayer.request("POST", "/reset")
+    elapsed = replayer.replay(passes, speed=args.speed)
+    check = replayer.check(passes, exact=args.reset)
+    summary = report(passes, replayer, elapsed, check)
+
+    latency = summary["latency"]
+    logger.info(
+        "%d requests (%d names) in %.2fs: %.1f requests/s, %.1f names/s",
+        summary["requests"],
+        summary["names"],
+        elapsed,
+        summary["requests_per_second"] or 0,
+        summary["names_per_second"] or 0,
+    )
+    if summary["throttled"]:
+        logger.info(
+            "%d requests were answered with 429 and sent again (ZOOM_INGEST_RATE)",
+            summary["throttled"],
+        )
+    if latency["count"]:
+        logger.info(
+            "Latency ms: p50 %.1f  p90 %.1f  p99 %.1f  max %.1f",
+            latency["p50"] * 1000,
+            latency["p90"] * 1000,
+            latency["p99"] * 1000,
+            latency["max"] * 1000,
+        )
+    ok = summary["errors"] == 0
+    for status, diff in check.items():
+        for kind in ("missing", "unexpected"):
+            if diff[kind]:
+                ok = False
+                logger.error(
+                    "%d %s %s: %s", len(diff[kind]), kind, status, diff[kind][:10]
+                )
+    logger.info("Final roster %s the log", "matches" if ok else "does NOT match")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
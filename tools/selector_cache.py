@@ -0,0 +1,107 @@
+"""Selector strategy cache for Zoom web client element detection
+The join flow tries long chains of XPath selectors and iframes in a fixed order, and every
+miss costs a WebDriverWait timeout. SelectorCache remembers which selector (and which
+iframe) worked for each step of the flow, shares that across all participant threads, and
+reorders the candidates so later participants try the known-good path first and only fall
+back to the rest on failure. The cache can be saved to a JSON file and reused between runs.
+"""
+
+import json
+import logging
+import os
+import threading
+
+CACHE_FORMAT_VERSION = 1
+
+
+class SelectorCache:
+    """Thread-safe record of which selectors succeeded for each step of the join flow"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._selectors = {}  # step -> {selector: [hits, misses]}
+        self._frames = {}  # step -> iframe index that worked last
+
+    def ordered(self, step, candidates):
+        """Return candidates with the most successful selectors for `step` first
+
+        Selectors that never succeeded keep their original relative order, and
+        those that only ever missed are tried last.
+        """
+        with self._lock:
+            stats = dict(self._selectors.get(step, {}))
+
+        def rank(selector):
+            hits, misses = stats.get(selector, (0, 0))
+            return (-hits, 1 if misses and not hits else 0)
+
+        return sorted(candidates, key=rank)
+
+    def record_hit(self, step, selector):
+        """Remember that `selector` found the element for `step`"""
+        with self._lock:
+            self._selectors.setdefault(step, {}).setdefault(selector, [0, 0])[0] += 1
+
+    def record_miss(self, step, selector):
+        """Remember that `selector` timed out or found nothing for `step`"""
+        with self._lock:
+            self._selectors.setdefault(step, {}).setdefault(selector, [0, 0])[1] += 1
+
+    def ordered_frames(self, step, frame_count):
+        """Return iframe indexes 0..frame_count-1 with the last working one first"""
+        with self._lock:
+            preferred = self._frames.get(step)
+        order = list(range(frame_count))
+        if preferred is not None and 0 <= preferred < frame_count:
+            order.remove(preferred)
+            order.insert(0, preferred)
+        return order
+
+    def record_frame(self, step, index):
+        """Remember the iframe index that held the elements for `step`"""
+        with self._lock:
+            self._frames[step] = index
+
+    def to_dict(self):
+        """Return the cache contents in the on-disk JSON layout"""
+        with self._lock:
+            return {
+                "version": CACHE_FORMAT_VERSION,
+                "selectors": {
+                    step: {sel: list(counts) for sel, counts in entries.items()}
+                    for step, entries in self._selectors.items()
+                },
+                "frames": dict(self._frames),
+            }
+
+    def load(self, path):
+        """Merge a cache previously written by save(). Missing or stale files are ignored."""
+        logger = logging.getLogger(__name__)
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable selector cache %s: %s", path, e)
+            return False
+        if data.get("version") != CACHE_FORMAT_VERSION:
+            logger.warning("Ignoring selector cache %s with unknown version", path)
+            return False
+        with self._lock:
+            for step, entries in data.get("selectors", {}).items():
+                merged = self._selectors.setdefault(step, {})
+                for selector, (hits, misses) in entries.items():
+                    counts = merged.setdefault(selector, [0, 0])
+                    counts[0] += hits
+                    counts[1] += misses
+            for step, index in data.get("frames", {}).items():
+                self._frames.setdefault(step, index)
+        return True
+
+    def save(self, path):
+        """Write the cache to `path` atomically"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
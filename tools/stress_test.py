@@ -10,7 +10,6 @@ import logging
 import os
 import platform
 import re
-import signal
 import tempfile
 import threading
 import time
@@ -31,9 +30,23 @@ from webdriver_manager.chrome import ChromeDriverManager
 # Rich logging
 from rich.logging import RichHandler
 
+from fake_zoom import add_injection_arguments, injection_options, start_fake_zoom
+from lifecycle import ParticipantLifecycle
+from selector_cache import SelectorCache
+from telemetry import MetricsCollector, ParticipantMetrics, ResourceSampler
+
 # Global event to signal shutdown
 shutdown_event = threading.Event()
 
+# Tracks running participants and their browsers for event-driven shutdown
+lifecycle = ParticipantLifecycle(shutdown_event)
+
+# Per-participant timings and resource samples for the whole run
+metrics = MetricsCollector()
+
+# Selectors and iframes that worked, shared so later participants try them first
+selector_cache = SelectorCache()
+
 
 def get_user_agent():
     """Get OS-appropriate user agent string using platform.system()
@@ -64,13 +77,10 @@ def get_user_agent():
     return user_agents.get(current_os, generic_ua)
 
 
-def signal_handler(_signum, _frame):
-    """Handle Ctrl+C and other signals to gracefully close browsers"""
+def on_signal(_signum):
+    """Log Ctrl+C and other signals; the lifecycle then closes the browsers"""
     logger = logging.getLogger(__name__)
     logger.info("Received interrupt signal, shutting down browsers...")
-    shutdown_event.set()
-    # Let the main thread handle the exit
-    # No sys.exit(0) here
 
 
 def setup_logging():
@@ -145,11 +155,16 @@ def create_chrome_options(user_data_dir=None):
 
 
 def join_meeting_as_participant(
-    meeting_url, participant_name, participant_id, duration_seconds=1800
+    meeting_url,
+    participant_name,
+    participant_id,
+    duration_seconds=1800,
+    web_client_base="https://app.zoom.us",
 ):
     """Join a Zoom meeting as a specific participant using Selenium"""
     logger = logging.getLogger(__name__)
     driver = None
+    pm = metrics.participant(participant_id, participant_name)
 
     try:
 
@@ -162,52 +177,56 @@ def join_meeting_as_participant(
         options = create_chrome_options(user_data_dir)
 
         # Initialize Chrome driver with automatic driver management
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        with pm.phase("driver_start"):
+            service = Service(ChromeDriverManager().install())
+            driver = webdriver.Chrome(service=service, options=options)
+        lifecycle.register_driver(participant_id, participant_name, driver)
+        if service.process:
+            pm.pid = service.process.pid
 
         driver.set_window_size(800, 600)  # Construct join URL with participant name
         join_url = f"{meeting_url}&uname={participant_name}"
 
-        direct_url = try_construct_direct_url(meeting_url, participant_name)
-        if direct_url:
-            logger.info("Using direct web app URL for %s", participant_name)
-            driver.get(direct_url)
-        else:
-            logger.info("Navigating to regular URL: %s", join_url)
-            driver.get(join_url)
-
-        # Wait for page to load
-        WebDriverWait(driver, 10).until(
-            lambda d: d.execute_script("return document.readyState") == "complete"
+        direct_url = try_construct_direct_url(
+            meeting_url, participant_name, web_client_base
         )
+        with pm.phase("navigation"):
+            if direct_url:
+                logger.info("Using direct web app URL for %s", participant_name)
+                driver.get(direct_url)
+            else:
+                logger.info("Navigating to regular URL: %s", join_url)
+                driver.get(join_url)
+
+            # Wait for page to load
+            WebDriverWait(driver, 10).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
 
         # Since we're using direct URLs, we should be in the meeting interface
         # Just wait a moment for everything to load and handle join/audio
-        time.sleep(2)
+        lifecycle.pause(2)
         logger.info("Page loaded for %s, handling meeting join", participant_name)
 
         # Wait for meeting interface to load
-        time.sleep(3)
+        lifecycle.pause(3)
 
         try:
             # Handle joining the meeting and audio preferences
             join_successful = handle_meeting_join_and_audio(
-                driver, participant_name, logger
+                driver, participant_name, logger, pm
             )
 
             if join_successful:
+                pm.joined()
                 logger.info(
                     "[green]Participant %s (id: %s) successfully joined the meeting[/green]",
                     participant_name,
                     participant_id,
                     extra={"markup": True},
                 )
-                # Keep browser open for the duration of the test, but check for shutdown
-                end_time = time.time() + duration_seconds
-                while time.time() < end_time and not shutdown_event.is_set():
-                    time.sleep(1)  # Check for shutdown every second
-
-                if shutdown_event.is_set():
+                # Keep browser open for the duration of the test, or until shutdown
+                if not lifecycle.hold(duration_seconds):
                     logger.info(
                         "Shutdown signal received, closing browser for %s",
                         participant_name,
@@ -218,20 +237,23 @@ def join_meeting_as_participant(
                     )
 
             else:
+                pm.fail("join button not found")
                 logger.error(
                     "[red]Participant %s failed to join the meeting[/red]",
                     participant_name,
                     extra={"markup": True},
                 )
-                time.sleep(10)  # Keep browser open briefly for debugging
+                lifecycle.pause(10)  # Keep browser open briefly for debugging
 
         except TimeoutException:
+            pm.fail("join timeout")
             logger.error(
                 "[yellow]Timeout while trying to join meeting for %s[/yellow]",
                 participant_name,
                 extra={"markup": True},
             )
         except WebDriverException as e:
+            pm.fail(f"join: {type(e).__name__}")
             logger.error(
                 "WebDriver error during meeting join for %s: %s",
                 participant_name,
@@ -249,6 +271,7 @@ def join_meeting_as_participant(
                     participant_name,
                 )
             else:
+                pm.fail("connection error")
                 logger.error("Connection error for %s: %s", participant_name, str(e))
         except Exception as e:
             logger.error(
@@ -259,13 +282,18 @@ def join_meeting_as_participant(
             raise e
 
     except WebDriverException as e:
+        pm.fail(f"webdriver: {type(e).__name__}")
         logger.error("WebDriver error for participant %s: %s", participant_name, str(e))
     except Exception as e:
+        pm.fail(f"unexpected: {type(e).__name__}")
         logger.error(
             "Unexpected error for participant %s: %s", participant_name, str(e)
         )
         raise e
     finally:
+        pm.pid = None
+        if driver and lifecycle.release_driver(participant_id) is None:
+            driver = None  # Already closed by the parallel teardown
         if driver:
             # Suppress noisy connection errors from urllib3 and selenium during shutdown
             if shutdown_event.is_set():
@@ -294,6 +322,7 @@ def join_meeting_as_participant(
                     participant_name,
                     str(e),
                 )
+        lifecycle.finished()
 
 
 def try_join_from_browser(driver, participant_name, logger):
@@ -332,8 +361,14 @@ def try_join_from_browser(driver, participant_name, logger):
                 return False
 
 
-def try_construct_direct_url(meeting_url, participant_name):
-    """Try to construct a direct web app URL from a regular Zoom meeting URL"""
+def try_construct_direct_url(
+    meeting_url, participant_name, web_client_base="https://app.zoom.us"
+):
+    """Try to construct a direct web app URL from a regular Zoom meeting URL
+
+    web_client_base is the scheme and host of the web client, which is
+    only changed when testing against a local stand-in such as fake_zoom.py.
+    """
 
     # Extract meeting ID and password from the URL
     # Pattern: https://us06web.zoom.us/j/MEETINGID?pwd=PASSWORD
@@ -343,7 +378,7 @@ def try_construct_direct_url(meeting_url, participant_name):
         password = match.group(2)
 
         # Construct the direct web app URL
-        direct_url = f"https://app.zoom.us/wc/{meeting_id}/"
+        direct_url = f"{web_client_base}/wc/{meeting_id}/"
         direct_url += f"join?fromPWA=1&pwd={password}&uname={participant_name}"
         return direct_url
 
@@ -388,8 +423,15 @@ def handle_zoom_page_navigation(driver, participant_name, logger):
         try_join_from_browser(driver, participant_name, logger)
 
 
-def handle_meeting_join_and_audio(driver, participant_name, logger):
-    """Handle joining the meeting and setting audio preferences (muted)"""
+def handle_meeting_join_and_audio(
+    driver, participant_name, logger, participant_metrics=None
+):
+    """Handle joining the meeting and setting audio preferences (muted)
+
+    Phase timings (audio, iframe_detection, join_click) and the mute result
+    are recorded on participant_metrics when it is given.
+    """
+    pm = participant_metrics or ParticipantMetrics(0, participant_name)
 
     # Early exit if shutdown detected
     if shutdown_event.is_set():
@@ -439,6 +481,7 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
 
         # Step 1: Click the Mute button (it should be visible in the preview area)
         mute_clicked = False
+        pm.begin("audio")
         try:
             # Wait for preview area to load
             time.sleep(2)
@@ -470,7 +513,7 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
                 )
 
             if not already_muted:
-                for selector in mute_selectors:
+                for selector in selector_cache.ordered("mute", mute_selectors):
                     try:
                         mute_buttons = driver.find_elements(By.XPATH, selector)
                         for mute_button in mute_buttons:
@@ -481,6 +524,7 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
                                     selector,
                                     participant_name,
                                 )
+                                selector_cache.record_hit("mute", selector)
                                 mute_clicked = True
                                 time.sleep(1)
                                 break
@@ -508,19 +552,23 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
             logger.warning(
                 f"WebDriver error trying to mute {participant_name}: {str(e)}"
             )
+        pm.end("audio")
 
         # Step 2: Click the Join button - try multiple approaches
         join_success = False
         try:
             # Wait a bit more for the page to fully load
-            time.sleep(5)  # Increased wait time
+            lifecycle.pause(5)  # Increased wait time
 
             # Check if we need to switch to an iframe
+            pm.begin("iframe_detection")
             iframes = driver.find_elements(By.TAG_NAME, "iframe")
             logger.debug(f"Found {len(iframes)} iframes on page for {participant_name}")
 
             if iframes:
-                for i, iframe in enumerate(iframes):
+                # Try the iframe that held the buttons for earlier participants first
+                for i in selector_cache.ordered_frames("join_frame", len(iframes)):
+                    iframe = iframes[i]
                     try:
                         driver.switch_to.frame(iframe)
                         logger.debug(f"Switched to iframe {i} for {participant_name}")
@@ -544,7 +592,9 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
                                     "not(contains(@aria-label, 'Unmute'))]",
                                 ]
 
-                                for selector in iframe_mute_selectors:
+                                for selector in selector_cache.ordered(
+                                    "iframe_mute", iframe_mute_selectors
+                                ):
                                     iframe_mute_buttons = driver.find_elements(
                                         By.XPATH, selector
                                     )
@@ -558,6 +608,9 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
                                                 "Clicked Mute button in "
                                                 f"iframe {i} for {participant_name}",
                                             )
+                                            selector_cache.record_hit(
+                                                "iframe_mute", selector
+                                            )
                                             mute_clicked = True
                                             time.sleep(1)
                                             break
@@ -576,6 +629,7 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
                                     f"Iframe {i} Button {j}: "
                                     f"text='{btn_text}', type='{btn_type}'"
                                 )
+                            selector_cache.record_frame("join_frame", i)
                             break  # Found buttons, stay in this iframe
                         else:
                             driver.switch_to.default_content()  # Switch back if no buttons
@@ -583,6 +637,8 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
                         logger.info(f"Could not switch to iframe {i}: {str(e)}")
                         driver.switch_to.default_content()
 
+            pm.end("iframe_detection")
+
             # Debug: Let's see what buttons are actually on the page
             all_buttons = driver.find_elements(By.TAG_NAME, "button")
             all_inputs = driver.find_elements(By.TAG_NAME, "input")
@@ -604,6 +660,7 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
                 )
 
             # Try different selectors for the join button
+            pm.begin("join_click")
             join_selectors = [
                 "//button[contains(text(), 'Join')]",
                 "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', "
@@ -616,7 +673,7 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
                 "name()='input' or name()='a')]",
             ]
 
-            for selector in join_selectors:
+            for selector in selector_cache.ordered("join", join_selectors):
                 try:
                     join_button = WebDriverWait(driver, 3).until(
                         EC.element_to_be_clickable((By.XPATH, selector))
@@ -626,10 +683,12 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
                         "Successfully clicked Join button using "
                         f"selector '{selector}' for {participant_name}"
                     )
+                    selector_cache.record_hit("join", selector)
                     join_success = True
                     time.sleep(3)  # Wait for meeting to load
                     break
                 except TimeoutException:
+                    selector_cache.record_miss("join", selector)
                     logger.warning(
                         "[yellow]Selector '%s' did not find a "
                         "clickable element for %s[/yellow]",
@@ -639,6 +698,9 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
                     )
                     continue
 
+            pm.end("join_click")
+            pm.muted = mute_clicked
+
             if not join_success:
                 logger.error(
                     "[red]Could not find any clickable Join button for %s[/red]",
@@ -660,61 +722,48 @@ def handle_meeting_join_and_audio(driver, participant_name, logger):
         logger.info(
             f"Not on Enter Meeting Info page for {participant_name}, trying other join methods"
         )
-        return try_other_join_methods(driver, participant_name, logger)
+        with pm.phase("join_click"):
+            return try_other_join_methods(driver, participant_name, logger)
 
     # No stray except or closing brace here; all exceptions are handled above.
 
 
-def try_other_join_methods(driver, participant_name, logger):
-    """Try alternative methods for joining when not on the standard Enter Meeting Info page"""
-
+# Fallback join strategies as (description, XPath) pairs, in their default order
+OTHER_JOIN_STRATEGIES = [
     # Strategy 1: Look for "Join Audio by Computer" button
-    try:
-        join_audio_btn = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable(
-                (By.XPATH, "//button[contains(text(), 'Join Audio')]")
-            )
-        )
-        join_audio_btn.click()
-        logger.info(f"Clicked 'Join Audio' for {participant_name}")
-        time.sleep(2)
-        return True
-    except TimeoutException:
-        pass
-
+    ("Join Audio", "//button[contains(text(), 'Join Audio')]"),
     # Strategy 2: Look for generic "Join" button
-    try:
-        join_btn = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable(
-                (
-                    By.XPATH,
-                    "//button[contains(text(), 'Join') and not(contains(text(), 'Audio'))]",
-                )
-            )
-        )
-        join_btn.click()
-        logger.info(f"Clicked main 'Join' button for {participant_name}")
-        time.sleep(2)
-        return True
-    except TimeoutException:
-        pass
-
+    (
+        "main 'Join'",
+        "//button[contains(text(), 'Join') and not(contains(text(), 'Audio'))]",
+    ),
     # Strategy 3: Look for "Enter" or "Start" buttons
-    try:
-        enter_btn = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable(
-                (
-                    By.XPATH,
-                    "//button[contains(text(), 'Enter') or contains(text(), 'Start')]",
-                )
+    (
+        "Enter/Start",
+        "//button[contains(text(), 'Enter') or contains(text(), 'Start')]",
+    ),
+]
+
+
+def try_other_join_methods(driver, participant_name, logger):
+    """Try alternative methods for joining when not on the standard Enter Meeting Info page
+
+    The strategy that worked for earlier participants is tried first.
+    """
+    labels = {xpath: label for label, xpath in OTHER_JOIN_STRATEGIES}
+    for xpath in selector_cache.ordered("other_join", list(labels)):
+        try:
+            join_btn = WebDriverWait(driver, 5).until(
+                EC.element_to_be_clickable((By.XPATH, xpath))
             )
-        )
-        enter_btn.click()
-        logger.info(f"Clicked 'Enter/Start' button for {participant_name}")
+        except TimeoutException:
+            selector_cache.record_miss("other_join", xpath)
+            continue
+        join_btn.click()
+        selector_cache.record_hit("other_join", xpath)
+        logger.info(f"Clicked {labels[xpath]} button for {participant_name}")
         time.sleep(2)
         return True
-    except TimeoutException:
-        pass
 
     logger.warning(f"Could not find any join button for {participant_name}")
     return False
@@ -726,17 +775,27 @@ def main():
     logger = logging.getLogger(__name__)
 
     # Register signal handler for graceful shutdown
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    lifecycle.handle_signals(on_signal=on_signal)
 
     parser = argparse.ArgumentParser(
         description="Launch multiple browser instances to simulate Zoom participants using Selenium"
     )
     parser.add_argument(
         "--meeting-url",
-        required=True,
         help="Join link for the Zoom meeting (e.g. https://zoom.us/wc/<id>/join)",
     )
+    parser.add_argument(
+        "--web-client-base",
+        default="https://app.zoom.us",
+        help="Scheme and host of the Zoom web client (default: https://app.zoom.us)",
+    )
+    parser.add_argument(
+        "--fake-zoom",
+        action="store_true",
+        help="Run against a local fake Zoom web client (see fake_zoom.py) "
+        "instead of a live meeting",
+    )
+    add_injection_arguments(parser)
     parser.add_argument(
         "--count",
         type=int,
@@ -774,9 +833,42 @@ def main():
         default=1800,  # 30 minutes in seconds
         help="Duration in seconds each participant stays in meeting (default: 1800 = 30 minutes)",
     )
+    parser.add_argument(
+        "--shutdown-timeout",
+        type=float,
+        default=15.0,
+        help="Maximum seconds to spend closing all browsers on shutdown (default: 15)",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        help="Write per-participant timings and the run summary to this JSON file",
+    )
+    parser.add_argument(
+        "--metrics-csv",
+        help="Write one row of timings and resource usage per participant to this CSV file",
+    )
+    parser.add_argument(
+        "--selector-cache",
+        help="JSON file of selectors that worked, loaded at start and updated at the end",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between browser RSS/CPU samples (default: 5.0, 0 disables sampling)",
+    )
 
     args = parser.parse_args()
 
+    fake_server = None
+    if args.fake_zoom:
+        fake_server = start_fake_zoom(options=injection_options(args))
+        args.meeting_url = f"{fake_server.base_url}/j/123456789?pwd=stress"
+        args.web_client_base = fake_server.base_url
+        logger.info("Started fake Zoom web client at %s", fake_server.base_url)
+    elif not args.meeting_url:
+        parser.error("--meeting-url is required unless --fake-zoom is used")
+
     logger.info("Starting stress test with %d participants", args.count)
     logger.info("Meeting URL: %s", args.meeting_url)
     logger.info("Delay between participants: %s seconds", args.delay)
@@ -790,6 +882,14 @@ def main():
         args.duration / 60.0,
     )
 
+    if args.selector_cache and selector_cache.load(args.selector_cache):
+        logger.info("Loaded selector cache from %s", args.selector_cache)
+
+    sampler = None
+    if args.sample_interval > 0:
+        sampler = ResourceSampler(metrics, args.sample_interval)
+        sampler.start()
+
     threads = []
 
     if args.parallel:
@@ -812,14 +912,26 @@ def main():
 
                 thread = threading.Thread(
                     target=join_meeting_as_participant,
-                    args=(args.meeting_url, participant_name, i, args.duration),
+                    args=(
+                        args.meeting_url,
+                        participant_name,
+                        i,
+                        args.duration,
+                        args.web_client_base,
+                    ),
+                    daemon=True,
                 )
                 threads.append(thread)
                 batch_threads.append(thread)
+                lifecycle.started()
                 thread.start()
 
                 # Small delay between thread starts to avoid overwhelming the system
-                time.sleep(0.5)
+                if lifecycle.pause(0.5):
+                    break
+
+            if lifecycle.shutting_down:
+                break
 
             # If this isn't the last batch, wait for the parallel thread delay
             if batch_end <= args.count:
@@ -827,7 +939,8 @@ def main():
                     "Batch started, waiting %d seconds before next batch...",
                     args.parallel_thread_delay,
                 )
-                time.sleep(args.parallel_thread_delay)
+                if lifecycle.pause(args.parallel_thread_delay):
+                    break
     else:
         # Launch participants sequentially but with threading
         # so they can all stay in meeting together
@@ -836,44 +949,75 @@ def main():
 
             thread = threading.Thread(
                 target=join_meeting_as_participant,
-                args=(args.meeting_url, participant_name, i, args.duration),
+                args=(
+                    args.meeting_url,
+                    participant_name,
+                    i,
+                    args.duration,
+                    args.web_client_base,
+                ),
+                daemon=True,
             )
             threads.append(thread)
+            lifecycle.started()
             thread.start()
 
             # Wait for the delay before starting next participant
             if i < args.count:  # Don't wait after the last participant
-                time.sleep(args.delay)
+                if lifecycle.pause(args.delay):
+                    break
 
     # Wait for all threads to complete (both parallel and sequential modes)
     logger.info("Waiting for all participants to complete...")
 
     try:
-        for thread in threads:
-            # Use timeout on join() to avoid hanging on Ctrl+C
-            while thread.is_alive():
-                thread.join(timeout=1.0)  # Check every second
-                if shutdown_event.is_set():
-                    logger.info("Shutdown event detected, stopping wait for threads...")
-                    break
-            if shutdown_event.is_set():
-                break
+        # Sleeps until the last participant leaves or a shutdown is requested
+        lifecycle.wait_all()
     except KeyboardInterrupt:
         logger.info("KeyboardInterrupt received during thread cleanup")
-        shutdown_event.set()
+        lifecycle.request_shutdown()
 
-    # Give threads a moment to clean up gracefully
-    if shutdown_event.is_set():
-        logger.info("Giving threads 3 seconds to clean up...")
-        time.sleep(3)
-
-        # Check if any threads are still alive
-        alive_threads = [t for t in threads if t.is_alive()]
+    if lifecycle.shutting_down:
+        logger.info(
+            "Shutdown event detected, closing %d browsers in parallel...",
+            lifecycle.active,
+        )
+        deadline = time.monotonic() + args.shutdown_timeout
+        closed, pending, elapsed = lifecycle.teardown(args.shutdown_timeout, logger)
+        alive_threads = lifecycle.join_workers(threads, deadline)
+        logger.info(
+            "Shutdown took %.1f seconds: %d browsers closed, %d still closing",
+            elapsed,
+            closed,
+            pending,
+        )
         if alive_threads:
             logger.warning(
                 "%d threads still running, exiting anyway...", len(alive_threads)
             )
 
+    if sampler:
+        sampler.stop()
+    metrics.log_summary(logger)
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+        logger.info("Wrote metrics JSON report to %s", args.metrics_json)
+    if args.metrics_csv:
+        metrics.write_csv(args.metrics_csv)
+        logger.info("Wrote metrics CSV report to %s", args.metrics_csv)
+
+    if args.selector_cache:
+        try:
+            selector_cache.save(args.selector_cache)
+            logger.info("Saved selector cache to %s", args.selector_cache)
+        except OSError as e:
+            logger.warning("Could not save selector cache: %s", e)
+
+    if fake_server:
+        logger.info("Fake Zoom results: %s", fake_server.snapshot()["stats"])
+        fake_server.shutdown()
+        fake_server.server_close()
+
     logger.info("[green]Stress test completed[/green]", extra={"markup": True})
 
 
@@ -0,0 +1,369 @@
+"""Per-participant timing and resource telemetry for the stress tester
+Each simulated participant gets a ParticipantMetrics record holding the duration of every
+join phase (driver start, navigation, iframe detection, join click and audio), the outcome,
+and resource samples of its browser process tree. MetricsCollector gathers the records,
+prints an end-of-run summary and writes machine-readable JSON and CSV reports.
+"""
+
+import csv
+import json
+import logging
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+PHASES = ("driver_start", "navigation", "iframe_detection", "join_click", "audio")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values using linear interpolation
+
+    Args:
+        values (list): Numbers to summarize (need not be sorted).
+        pct (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The percentile, or None if values is empty.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def describe(values):
+    """Summarize a list of numbers as count, min, max, mean and percentiles"""
+    if not values:
+        return {"count": 0}
+    summary = {
+        "count": len(values),
+        "min": min(values),
+        "max": max(values),
+        "mean": sum(values) / len(values),
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}"] = percentile(values, pct)
+    return summary
+
+
+def parse_cpu_time(text):
+    """Return the seconds of a ps `time` column: [[dd-]hh:]mm:ss, with an optional
+    fraction on macOS (e.g. "1-02:03:04", "00:01:02", "1:02.34")"""
+    days, _, clock = text.rpartition("-")
+    seconds = 0.0
+    for part in clock.split(":"):
+        seconds = seconds * 60 + float(part.replace(",", "."))
+    return seconds + int(days or 0) * 86400
+
+
+def read_process_table():
+    """Return {pid: (ppid, rss_bytes, cpu_seconds)} for every process, using ps
+
+    ps is available on both macOS and Linux, so no extra dependency is needed.
+    cpu_seconds is the CPU time used since the process started; ps's own %cpu is an
+    average over the same lifetime, so it can't show how busy a browser is now. The
+    CPU use over a sampling interval is the difference of two readings (see
+    ParticipantMetrics.add_sample). Linux ps counts whole seconds.
+    """
+    output = subprocess.run(
+        ["ps", "-A", "-o", "pid=,ppid=,rss=,time="],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    table = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) != 4:
+            continue
+        try:
+            pid, ppid, rss_kb = int(fields[0]), int(fields[1]), int(fields[2])
+            cpu = parse_cpu_time(fields[3])
+        except ValueError:
+            continue
+        table[pid] = (ppid, rss_kb * 1024, cpu)
+    return table
+
+
+def process_tree_usage(table, root_pid):
+    """Sum RSS and CPU time over root_pid and all of its descendants
+
+    Args:
+        table (dict): Output of read_process_table().
+        root_pid (int): The chromedriver (or browser) process id.
+
+    Returns:
+        Tuple[int, float, int]: (rss_bytes, cpu_seconds, process_count), or None if gone.
+    """
+    if root_pid not in table:
+        return None
+    children = {}
+    for pid, (ppid, _, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    rss, cpu, count = 0, 0.0, 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        _, pid_rss, pid_cpu = table[pid]
+        rss += pid_rss
+        cpu += pid_cpu
+        count += 1
+        stack.extend(children.get(pid, ()))
+    return rss, cpu, count
+
+
+class ParticipantMetrics:
+    """Timings, outcome and resource samples for one simulated participant"""
+
+    def __init__(self, participant_id, participant_name):
+        self.participant_id = participant_id
+        self.participant_name = participant_name
+        self.started = time.time()
+        self.phases = {}
+        self.outcome = "pending"
+        self.failure = None
+        self.muted = None
+        self.time_to_join = None
+        self.pid = None
+        self.peak_rss = 0
+        self.cpu_samples = []
+        self._cpu_reading = None  # (monotonic time, cpu_seconds) of the last sample
+        self._phase_starts = {}
+        self._lock = threading.Lock()
+
+    def begin(self, phase):
+        """Start timing a phase"""
+        self._phase_starts[phase] = time.perf_counter()
+
+    def end(self, phase):
+        """Stop timing a phase started with begin() and record its duration"""
+        start = self._phase_starts.pop(phase, None)
+        if start is not None:
+            self.phases[phase] = time.perf_counter() - start
+
+    @contextmanager
+    def phase(self, phase):
+        """Time the enclosed block as `phase`, recording a failure if it raises"""
+        self.begin(phase)
+        try:
+            yield self
+        except BaseException as e:
+            if self.failure is None:
+                self.fail(f"{phase}: {type(e).__name__}")
+            raise
+        finally:
+            self.end(phase)
+
+    def joined(self):
+        """Mark the participant as successfully joined"""
+        self.outcome = "joined"
+        self.time_to_join = time.time() - self.started
+
+    def fail(self, reason):
+        """Mark the participant as failed, keeping the first reason given"""
+        self.outcome = "failed"
+        if self.failure is None:
+            self.failure = reason
+
+    def add_sample(self, rss, cpu_seconds, now=None):
+        """Record one resource sample of the participant's browser process tree
+
+        The CPU percentage since the previous sample is added to cpu_samples. There is
+        none for the first sample, or when the tree lost a process and its CPU time.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            previous = self._cpu_reading
+            self._cpu_reading = (now, cpu_seconds)
+            if previous is None or now <= previous[0] or cpu_seconds < previous[1]:
+                return
+            self.cpu_samples.append(
+                (cpu_seconds - previous[1]) / (now - previous[0]) * 100
+            )
+
+    def mean_cpu(self):
+        """Return the mean of cpu_samples, or None if there are none"""
+        with self._lock:
+            cpu = list(self.cpu_samples)
+        return sum(cpu) / len(cpu) if cpu else None
+
+    def as_row(self):
+        """Return a flat dict suitable for a CSV row or JSON record"""
+        mean_cpu = self.mean_cpu()
+        row = {
+            "participant_id": self.participant_id,
+            "participant_name": self.participant_name,
+            "outcome": self.outcome,
+            "failure": self.failure or "",
+            "muted": "" if self.muted is None else self.muted,
+            "time_to_join": self.time_to_join,
+            "peak_rss_mb": round(self.peak_rss / (1024 * 1024), 1),
+            "mean_cpu_percent": None if mean_cpu is None else round(mean_cpu, 1),
+            "resource_samples": len(self.cpu_samples),
+        }
+        for name in PHASES:
+            row[f"{name}_seconds"] = self.phases.get(name)
+        return row
+
+
+class MetricsCollector:
+    """Collect ParticipantMetrics from all worker threads and report on them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._participants = {}
+        self.started = time.time()
+
+    def participant(self, participant_id, participant_name):
+        """Create and register the metrics record for a participant"""
+        record = ParticipantMetrics(participant_id, participant_name)
+        with self._lock:
+            self._participants[participant_id] = record
+        return record
+
+    def records(self):
+        """Return the registered participant records ordered by id"""
+        with self._lock:
+            return [self._participants[k] for k in sorted(self._participants)]
+
+    def sample_resources(self, table=None, now=None):
+        """Take one resource sample for every participant with a known process"""
+        table = read_process_table() if table is None else table
+        now = time.monotonic() if now is None else now
+        for record in self.records():
+            if record.pid is None:
+                continue
+            usage = process_tree_usage(table, record.pid)
+            if usage:
+                record.add_sample(usage[0], usage[1], now)
+
+    def summary(self):
+        """Build the end-of-run summary: outcomes, failures, phase and resource stats"""
+        records = self.records()
+        outcomes, failures = {}, {}
+        for record in records:
+            outcomes[record.outcome] = outcomes.get(record.outcome, 0) + 1
+            if record.failure:
+                failures[record.failure] = failures.get(record.failure, 0) + 1
+        muted = [r.muted for r in records if r.muted is not None]
+        return {
+            "participants": len(records),
+            "wall_seconds": time.time() - self.started,
+            "outcomes": outcomes,
+            "failures": failures,
+            "mute_success_rate": (sum(muted) / len(muted)) if muted else None,
+            "time_to_join": describe(
+                [r.time_to_join for r in records if r.time_to_join is not None]
+            ),
+            "phases": {
+                name: describe([r.phases[name] for r in records if name in r.phases])
+                for name in PHASES
+            },
+            "peak_rss_mb": describe(
+                [r.peak_rss / (1024 * 1024) for r in records if r.peak_rss]
+            ),
+            "mean_cpu_percent": describe(
+                [cpu for cpu in (r.mean_cpu() for r in records) if cpu is not None]
+            ),
+        }
+
+    def log_summary(self, logger=None):
+        """Log a human readable version of summary()"""
+        logger = logger or logging.getLogger(__name__)
+        summary = self.summary()
+        logger.info(
+            "Telemetry: %d participants in %.1f seconds, outcomes: %s",
+            summary["participants"],
+            summary["wall_seconds"],
+            summary["outcomes"],
+        )
+        for reason, count in sorted(
+            summary["failures"].items(), key=lambda item: -item[1]
+        ):
+            logger.info("  failure %-40s %d", reason, count)
+        if summary["mute_success_rate"] is not None:
+            logger.info(
+                "  mute success rate: %.1f%%", summary["mute_success_rate"] * 100
+            )
+        for label, stats in [("time_to_join", summary["time_to_join"])] + list(
+            summary["phases"].items()
+        ):
+            if stats["count"]:
+                logger.info(
+                    "  %-16s n=%-4d p50=%.2fs p90=%.2fs p99=%.2fs max=%.2fs",
+                    label,
+                    stats["count"],
+                    stats["p50"],
+                    stats["p90"],
+                    stats["p99"],
+                    stats["max"],
+                )
+        rss = summary["peak_rss_mb"]
+        if rss["count"]:
+            logger.info(
+                "  peak RSS per browser: p50=%.0fMB p90=%.0fMB max=%.0fMB",
+                rss["p50"],
+                rss["p90"],
+                rss["max"],
+            )
+        cpu = summary["mean_cpu_percent"]
+        if cpu["count"]:
+            logger.info(
+                "  mean CPU per browser: p50=%.0f%% p90=%.0f%% max=%.0f%%",
+                cpu["p50"],
+                cpu["p90"],
+                cpu["max"],
+            )
+        return summary
+
+    def write_json(self, path):
+        """Write the summary and per-participant records as JSON"""
+        report = {
+            "summary": self.summary(),
+            "participants": [r.as_row() for r in self.records()],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    def write_csv(self, path):
+        """Write one CSV row per participant"""
+        rows = [r.as_row() for r in self.records()]
+        fieldnames = list(ParticipantMetrics(0, "").as_row().keys())
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+class ResourceSampler(threading.Thread):
+    """Background thread sampling browser process resources at a fixed interval
+
+    A single sampler serves every participant, so the cost is one ps call per
+    interval regardless of how many browsers are running.
+    """
+
+    def __init__(self, collector, interval=5.0):
+        super().__init__(name="resource-sampler", daemon=True)
+        self.collector = collector
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        logger = logging.getLogger(__name__)
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.collector.sample_resources()
+            except (OSError, subprocess.SubprocessError) as e:
+                logger.debug("Resource sampling failed: %s", e)
+
+    def stop(self):
+        """Ask the sampler to exit and wait for it"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout=self.interval + 1)
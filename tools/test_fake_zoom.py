@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the fake Zoom web client in fake_zoom.py.
+
+These tests start the server on a free local port and check that the pages carry
+the elements stress_test.py looks for, and that failure injection behaves.
+"""
+
+import json
+import unittest
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from fake_zoom import start_fake_zoom
+from stress_test import try_construct_direct_url
+
+
+class FakeZoomTestCase(unittest.TestCase):
+    """Base class that runs a fake Zoom server for each test."""
+
+    options = {}
+
+    def setUp(self):
+        self.server = start_fake_zoom(options=dict(self.options))
+        self.base = self.server.base_url
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path):
+        """Fetch a page and return (status, body)."""
+        try:
+            with urlopen(self.base + path, timeout=5) as response:
+                return response.status, response.read().decode("utf-8")
+        except HTTPError as e:
+            return e.code, e.read().decode("utf-8")
+
+    def post(self, path, payload):
+        """POST a JSON payload and return (status, decoded JSON)."""
+        request = Request(
+            self.base + path, data=json.dumps(payload).encode("utf-8"), method="POST"
+        )
+        try:
+            with urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except HTTPError as e:
+            return e.code, json.loads(e.read())
+
+
+class TestFakeZoomPages(FakeZoomTestCase):
+    """The pages match what the stress tester expects."""
+
+    def test_direct_url_points_at_fake_server(self):
+        """try_construct_direct_url() honors the web client base."""
+        url = try_construct_direct_url(
+            f"{self.base}/j/123456789?pwd=abc", "Test User", self.base
+        )
+        self.assertEqual(
+            url, f"{self.base}/wc/123456789/join?fromPWA=1&pwd=abc&uname=Test User"
+        )
+
+    def test_landing_page_has_browser_link(self):
+        """The regular meeting URL offers 'Join from Your Browser'."""
+        status, body = self.get("/j/123456789?pwd=abc")
+        self.assertEqual(status, 200)
+        self.assertIn("Join from Your Browser", body)
+        self.assertIn("/wc/123456789/join?pwd=abc", body)
+
+    def test_join_page_elements(self):
+        """The join page has the name input, Mute button and iframe."""
+        status, body = self.get("/wc/123456789/join?pwd=abc&uname=Jane%20Doe")
+        self.assertEqual(status, 200)
+        self.assertIn("Enter Meeting Info", body)
+        self.assertIn('placeholder="Your Name"', body)
+        self.assertIn('value="Jane Doe"', body)
+        self.assertIn('aria-label="Mute"', body)
+        self.assertIn("<iframe", body)
+
+    def test_preview_has_join_button(self):
+        """The iframe content renders a Join submit button."""
+        status, body = self.get("/wc/123456789/preview?pwd=abc")
+        self.assertEqual(status, 200)
+        self.assertIn(">Join</button>", body)
+
+    def test_join_records_participant(self):
+        """A join request shows up in the roster."""
+        status, _ = self.post(
+            "/api/join", {"meeting_id": "42", "name": "Jane Doe", "muted": True}
+        )
+        self.assertEqual(status, 200)
+        _, body = self.get("/api/roster")
+        data = json.loads(body)
+        self.assertEqual(data["stats"]["joins"], 1)
+        self.assertEqual(data["roster"]["42"][0]["name"], "Jane Doe")
+        self.assertTrue(data["roster"]["42"][0]["muted"])
+
+
+class TestFakeZoomInlineLayout(FakeZoomTestCase):
+    """Without the iframe, the Join button sits on the main page."""
+
+    options = {"use_iframe": False}
+
+    def test_join_button_inline(self):
+        """The join page carries the Join button itself."""
+        _, body = self.get("/wc/1/join?pwd=abc&uname=X")
+        self.assertNotIn("<iframe", body)
+        self.assertIn(">Join</button>", body)
+
+
+class TestFakeZoomFailureInjection(FakeZoomTestCase):
+    """Failure injection settings are honored."""
+
+    options = {"failure_rate": 1.0, "join_failure_rate": 1.0, "seed": 1}
+
+    def test_page_failures(self):
+        """Every page load fails with 503 at a failure rate of 1."""
+        status, _ = self.get("/wc/1/join?pwd=abc")
+        self.assertEqual(status, 503)
+        self.assertEqual(self.server.snapshot()["stats"]["page_failures"], 1)
+
+    def test_join_failures(self):
+        """Every join is rejected at a join failure rate of 1."""
+        status, payload = self.post("/api/join", {"meeting_id": "1", "name": "X"})
+        self.assertEqual(status, 503)
+        self.assertIn("error", payload)
+        self.assertEqual(self.server.snapshot()["roster"], {})
+
+
+class TestFakeZoomMissingJoin(FakeZoomTestCase):
+    """Pages can be served without a Join button."""
+
+    options = {"missing_join_rate": 1.0}
+
+    def test_missing_join_button(self):
+        """The preview stalls on 'Connecting...' instead of offering Join."""
+        _, body = self.get("/wc/1/preview")
+        self.assertNotIn(">Join</button>", body)
+        self.assertIn("Connecting...", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the participant lifecycle manager in lifecycle.py.
+"""
+
+import os
+import signal
+import threading
+import time
+import unittest
+
+from lifecycle import ParticipantLifecycle
+
+
+class FakeDriver:
+    """Stand-in for a Selenium driver whose quit() takes a while."""
+
+    def __init__(self, quit_seconds=0.0):
+        self.quit_seconds = quit_seconds
+        self.quit_calls = 0
+
+    def quit(self):
+        """Pretend to close the browser."""
+        self.quit_calls += 1
+        time.sleep(self.quit_seconds)
+
+
+class TestLifecycle(unittest.TestCase):
+    """Hold, wait and teardown behave without polling."""
+
+    def setUp(self):
+        self.lifecycle = ParticipantLifecycle()
+
+    def test_hold_returns_immediately_on_shutdown(self):
+        """A participant holding the meeting wakes up as soon as shutdown is requested."""
+        threading.Timer(0.05, self.lifecycle.request_shutdown).start()
+        start = time.monotonic()
+        self.assertFalse(self.lifecycle.hold(30))
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_signal_requests_shutdown(self):
+        """A signal wakes a waiting main thread through the watcher thread."""
+        previous = signal.getsignal(signal.SIGUSR1)
+        received = []
+        try:
+            self.lifecycle.handle_signals((signal.SIGUSR1,), received.append)
+            self.lifecycle.started()
+            threading.Timer(0.05, os.kill, (os.getpid(), signal.SIGUSR1)).start()
+            start = time.monotonic()
+            self.lifecycle.wait_all()
+            self.assertLess(time.monotonic() - start, 1.0)
+            self.assertTrue(self.lifecycle.shutting_down)
+            self.assertEqual(received, [signal.SIGUSR1])
+        finally:
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGUSR1, previous)
+
+    def test_hold_full_duration(self):
+        """Without a shutdown, hold() reports that the full time elapsed."""
+        self.assertTrue(self.lifecycle.hold(0.01))
+
+    def test_wait_all_wakes_when_last_worker_finishes(self):
+        """wait_all() returns once every started worker has finished."""
+        for _ in range(3):
+            self.lifecycle.started()
+        for delay in (0.01, 0.02, 0.03):
+            threading.Timer(delay, self.lifecycle.finished).start()
+        start = time.monotonic()
+        self.lifecycle.wait_all()
+        self.assertEqual(self.lifecycle.active, 0)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_wait_all_wakes_on_shutdown(self):
+        """wait_all() returns on shutdown even with workers still running."""
+        self.lifecycle.started()
+        threading.Timer(0.05, self.lifecycle.request_shutdown).start()
+        self.lifecycle.wait_all()
+        self.assertEqual(self.lifecycle.active, 1)
+
+    def test_teardown_is_parallel(self):
+        """Browsers are closed concurrently, not one after another."""
+        drivers = [FakeDriver(0.2) for _ in range(10)]
+        for i, driver in enumerate(drivers):
+            self.lifecycle.register_driver(i, f"User{i}", driver)
+        closed, pending, elapsed = self.lifecycle.teardown(5)
+        self.assertEqual((closed, pending), (10, 0))
+        self.assertLess(elapsed, 1.0)
+        self.assertTrue(all(d.quit_calls == 1 for d in drivers))
+
+    def test_teardown_is_bounded(self):
+        """A browser that hangs on quit() does not hold up the teardown."""
+        self.lifecycle.register_driver(1, "Fast", FakeDriver())
+        self.lifecycle.register_driver(2, "Slow", FakeDriver(2.0))
+        closed, pending, elapsed = self.lifecycle.teardown(0.2)
+        self.assertEqual((closed, pending), (1, 1))
+        self.assertLess(elapsed, 1.0)
+
+    def test_release_after_teardown(self):
+        """A worker does not quit a browser the teardown already closed."""
+        driver = FakeDriver()
+        self.lifecycle.register_driver(1, "User1", driver)
+        self.lifecycle.teardown(1)
+        self.assertIsNone(self.lifecycle.release_driver(1))
+        self.assertEqual(driver.quit_calls, 1)
+
+    def test_release_returns_driver(self):
+        """Without a teardown, the worker gets its own browser back to close."""
+        driver = FakeDriver()
+        self.lifecycle.register_driver(1, "User1", driver)
+        self.assertIs(self.lifecycle.release_driver(1), driver)
+
+
+if __name__ == "__main__":
+    unittest.main()
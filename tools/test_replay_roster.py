@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the roster log replay tool in replay_roster.py.
+"""
+
+import json
+import threading
+import unittest
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from replay_roster import Replayer, parse_roster, strip_roles
+
+ROSTER_LOG = """\
+=== 03/05/2024 09:00:00 ===
+1. John Roe (Host, me)
+=== 1 participant 03/05/2024 09:00:01 ===
+=== 03/05/2024 09:00:30 ===
+Waiting Room:
+  1. Jane Doe
+Joined:
+  1. John Roe (Host, me)
+  2. Amy Lee
+=== 3 participants 03/05/2024 09:00:32 ===
+=== 03/05/2024 09:01:00 ===
+1. John Roe (Host, me)
+"""
+
+
+class FakeBackend(BaseHTTPRequestHandler):
+    """Keeps the roster in memory like the backend's list endpoints."""
+
+    protocol_version = "HTTP/1.1"
+    roster = {}
+    throttle = 0  # PUT requests to answer with 429 first
+
+    def _reply(self, body, status=200, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PUT(self):
+        names = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if FakeBackend.throttle:
+            FakeBackend.throttle -= 1
+            self._reply({"detail": "busy"}, 429, [("Retry-After", "0")])
+            return
+        status = self.path.strip("/").split("_")[0]
+        for name in names:
+            self.roster.setdefault(status, {})[strip_roles(name)] = {}
+        self._reply({"message": "ok"})
+
+    def do_GET(self):
+        self._reply(self.roster.get(self.path.strip("/"), {}))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestParseRoster(unittest.TestCase):
+    """Roster blocks are parsed into passes."""
+
+    def test_blocks(self):
+        """Complete blocks are kept with their sections, unfinished ones dropped."""
+        passes = parse_roster(ROSTER_LOG.splitlines(keepends=True))
+        self.assertEqual(len(passes), 2)
+        self.assertEqual(passes[0].time, datetime(2024, 3, 5, 9, 0, 0))
+        self.assertEqual(passes[0].joined, ["John Roe (Host, me)"])
+        self.assertEqual(passes[1].waiting, ["Jane Doe"])
+        self.assertEqual(passes[1].joined, ["John Roe (Host, me)", "Amy Lee"])
+
+    def test_bad_count_skipped(self):
+        """A block whose summary count does not match is skipped."""
+        log = "=== 03/05/2024 09:00:00 ===\n1. Amy\n=== 2 participants x ===\n"
+        self.assertEqual(parse_roster(log.splitlines()), [])
+
+
+class TestReplay(unittest.TestCase):
+    """Passes are sent in batches and checked against the backend."""
+
+    def setUp(self):
+        FakeBackend.roster = {}
+        FakeBackend.throttle = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBackend)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_replay_and_check(self):
+        """Every name reaches the backend and the check finds nothing missing."""
+        passes = parse_roster(ROSTER_LOG.splitlines())
+        replayer = Replayer(self.url, batch_size=1)
+        replayer.replay(passes, speed=0)
+        self.assertEqual(replayer.names_sent, 4)
+        self.assertEqual(len(replayer.latencies), 4)
+        check = replayer.check(passes, exact=True)
+        self.assertEqual(
+            check,
+            {
+                "waiting": {"missing": [], "unexpected": []},
+                "joined": {"missing": [], "unexpected": []},
+            },
+        )
+
+    def test_throttled_requests_retried(self):
+        """Updates answered with 429 are sent again after Retry-After."""
+        FakeBackend.throttle = 2
+        passes = parse_roster(ROSTER_LOG.splitlines())
+        replayer = Replayer(self.url)
+        replayer.replay(passes, speed=0)
+        self.assertEqual((replayer.errors, replayer.throttled), (0, 2))
+        self.assertEqual(replayer.check(passes, exact=True)["joined"]["missing"], [])
+
+    def test_check_reports_missing(self):
+        """Names the backend does not have are reported."""
+        passes = parse_roster(ROSTER_LOG.splitlines())
+        check = Replayer(self.url).check(passes, exact=False)
+        self.assertEqual(check["joined"]["missing"], ["Amy Lee", "John Roe"])
+
+
+if __name__ == "__main__":
+    unittest.main()
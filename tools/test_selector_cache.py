@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the selector strategy cache in selector_cache.py.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from selector_cache import SelectorCache
+
+SELECTORS = ["//button[1]", "//button[2]", "//button[3]"]
+
+
+class TestSelectorOrdering(unittest.TestCase):
+    """Candidates are reordered by past success."""
+
+    def setUp(self):
+        self.cache = SelectorCache()
+
+    def test_default_order_kept(self):
+        """Without history the original order is used."""
+        self.assertEqual(self.cache.ordered("join", SELECTORS), SELECTORS)
+
+    def test_hit_moves_first(self):
+        """A selector that worked is tried first."""
+        self.cache.record_hit("join", "//button[3]")
+        self.assertEqual(
+            self.cache.ordered("join", SELECTORS),
+            ["//button[3]", "//button[1]", "//button[2]"],
+        )
+
+    def test_misses_move_last(self):
+        """Selectors that only ever missed are tried last."""
+        self.cache.record_miss("join", "//button[1]")
+        self.assertEqual(
+            self.cache.ordered("join", SELECTORS),
+            ["//button[2]", "//button[3]", "//button[1]"],
+        )
+
+    def test_steps_are_independent(self):
+        """History for one step does not affect another."""
+        self.cache.record_hit("mute", "//button[2]")
+        self.assertEqual(self.cache.ordered("join", SELECTORS), SELECTORS)
+
+    def test_frame_order(self):
+        """The iframe that worked last is tried first."""
+        self.assertEqual(self.cache.ordered_frames("join_frame", 3), [0, 1, 2])
+        self.cache.record_frame("join_frame", 2)
+        self.assertEqual(self.cache.ordered_frames("join_frame", 3), [2, 0, 1])
+        self.assertEqual(self.cache.ordered_frames("join_frame", 2), [0, 1])
+
+
+class TestSelectorPersistence(unittest.TestCase):
+    """The cache round-trips through a JSON file."""
+
+    def test_save_and_load(self):
+        """A saved cache restores the learned order."""
+        cache = SelectorCache()
+        cache.record_hit("join", "//button[2]")
+        cache.record_frame("join_frame", 1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "selectors.json")
+            cache.save(path)
+            restored = SelectorCache()
+            self.assertTrue(restored.load(path))
+        self.assertEqual(restored.ordered("join", SELECTORS)[0], "//button[2]")
+        self.assertEqual(restored.ordered_frames("join_frame", 2), [1, 0])
+
+    def test_missing_or_stale_file_ignored(self):
+        """Missing, corrupt or old-format files are ignored."""
+        cache = SelectorCache()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "selectors.json")
+            self.assertFalse(cache.load(path))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("{not json")
+            self.assertFalse(cache.load(path))
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"version": 0, "selectors": {}}, f)
+            self.assertFalse(cache.load(path))
+        self.assertEqual(cache.ordered("join", SELECTORS), SELECTORS)
+
+
+if __name__ == "__main__":
+    unittest.main()
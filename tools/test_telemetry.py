@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the stress tester telemetry in telemetry.py.
+"""
+
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from telemetry import (
+    MetricsCollector,
+    describe,
+    parse_cpu_time,
+    percentile,
+    process_tree_usage,
+)
+
+
+class TestStatistics(unittest.TestCase):
+    """Percentile and summary helpers."""
+
+    def test_percentile_interpolates(self):
+        """Percentiles interpolate between neighbouring values."""
+        values = [4, 1, 3, 2]
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile(values, 100), 4)
+        self.assertAlmostEqual(percentile(values, 50), 2.5)
+
+    def test_percentile_empty(self):
+        """An empty list has no percentile."""
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(describe([]), {"count": 0})
+
+    def test_describe(self):
+        """describe() reports count, bounds, mean and percentiles."""
+        stats = describe([1.0, 2.0, 3.0])
+        self.assertEqual(stats["count"], 3)
+        self.assertEqual(stats["min"], 1.0)
+        self.assertEqual(stats["max"], 3.0)
+        self.assertAlmostEqual(stats["mean"], 2.0)
+        self.assertAlmostEqual(stats["p50"], 2.0)
+
+
+class TestProcessTree(unittest.TestCase):
+    """Resource usage is summed over a process and its descendants."""
+
+    table = {
+        10: (1, 1000, 1.0),  # chromedriver
+        11: (10, 2000, 2.0),  # chrome
+        12: (11, 3000, 3.0),  # chrome renderer
+        20: (1, 9999, 9.0),  # unrelated
+    }
+
+    def test_parse_cpu_time(self):
+        """Linux and macOS ps time columns become seconds."""
+        self.assertEqual(parse_cpu_time("00:01:02"), 62)
+        self.assertEqual(parse_cpu_time("1-02:03:04"), 93784)
+        self.assertAlmostEqual(parse_cpu_time("1:02.50"), 62.5)
+
+    def test_tree_totals(self):
+        """RSS and CPU time of the whole tree are added up."""
+        self.assertEqual(process_tree_usage(self.table, 10), (6000, 6.0, 3))
+
+    def test_missing_process(self):
+        """A process that exited yields no sample."""
+        self.assertIsNone(process_tree_usage(self.table, 99))
+
+    def test_collector_samples(self):
+        """sample_resources() tracks the peak RSS and the CPU use between samples."""
+        collector = MetricsCollector()
+        record = collector.participant(1, "Jane Doe")
+        record.pid = 10
+        collector.sample_resources(self.table, now=100.0)
+        busier = {**self.table, 12: (11, 3000, 8.0)}
+        collector.sample_resources(busier, now=110.0)
+        self.assertEqual(record.peak_rss, 6000)
+        self.assertEqual(record.cpu_samples, [50.0])
+        # The renderer exited and took its CPU time with it
+        record.pid = 11
+        collector.sample_resources(self.table, now=120.0)
+        self.assertEqual(record.cpu_samples, [50.0])
+        summary = collector.summary()
+        self.assertEqual(summary["mean_cpu_percent"]["count"], 1)
+        self.assertEqual(summary["mean_cpu_percent"]["max"], 50.0)
+
+
+class TestCollector(unittest.TestCase):
+    """Outcomes, phases and reports."""
+
+    def setUp(self):
+        self.collector = MetricsCollector()
+        joined = self.collector.participant(1, "Jane Doe")
+        with joined.phase("driver_start"):
+            pass
+        joined.muted = True
+        joined.joined()
+        failed = self.collector.participant(2, "John Roe")
+        with self.assertRaises(TimeoutError):
+            with failed.phase("navigation"):
+                raise TimeoutError()
+
+    def test_summary(self):
+        """The summary counts outcomes, failures and timed phases."""
+        summary = self.collector.summary()
+        self.assertEqual(summary["participants"], 2)
+        self.assertEqual(summary["outcomes"], {"joined": 1, "failed": 1})
+        self.assertEqual(summary["failures"], {"navigation: TimeoutError": 1})
+        self.assertEqual(summary["mute_success_rate"], 1.0)
+        self.assertEqual(summary["phases"]["driver_start"]["count"], 1)
+        self.assertEqual(summary["phases"]["navigation"]["count"], 1)
+        self.assertEqual(summary["time_to_join"]["count"], 1)
+
+    def test_first_failure_kept(self):
+        """Later failures do not overwrite the first reason."""
+        record = self.collector.records()[1]
+        record.fail("connection error")
+        self.assertEqual(record.failure, "navigation: TimeoutError")
+
+    def test_reports(self):
+        """JSON and CSV reports hold one record per participant."""
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, "metrics.json")
+            csv_path = os.path.join(tmp, "metrics.csv")
+            self.collector.write_json(json_path)
+            self.collector.write_csv(csv_path)
+            with open(json_path, encoding="utf-8") as f:
+                report = json.load(f)
+            with open(csv_path, encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual(len(report["participants"]), 2)
+        self.assertEqual(report["summary"]["outcomes"]["joined"], 1)
+        self.assertEqual([r["outcome"] for r in rows], ["joined", "failed"])
+        self.assertIn("navigation_seconds", rows[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
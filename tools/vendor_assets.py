@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""Download the dashboard's libraries into frontend/vendor/
+frontend/index.html loads Vue, BootstrapVue, Bootstrap and axios from cdn.jsdelivr.net.
+This tool downloads each library the page loads into frontend/vendor/, under the name the
+backend looks for (see backend/assets.py). The backend then serves the page with the local
+copies, hashed, compressed and cached, so the dashboard works without internet access.
+Run it again after changing a library version in index.html.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import urllib.request
+
+from rich.logging import RichHandler
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend")
+sys.path.insert(0, BACKEND)
+
+from assets import cdn_urls, vendor_name  # noqa: E402
+
+
+def download(url, path, timeout):
+    """Download `url` to `path`, replacing it only once the download is complete"""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        body = response.read()
+    with open(path + ".tmp", "wb") as f:
+        f.write(body)
+    os.replace(path + ".tmp", path)
+    return len(body)
+
+
+def main():
+    """Download every library the dashboard loads that is not vendored yet"""
+    logging.basicConfig(
+        level="INFO",
+        format="%(message)s",
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True)],
+    )
+    logger = logging.getLogger(__name__)
+
+    parser = argparse.ArgumentParser(
+        description="Download the dashboard's libraries for offline use"
+    )
+    parser.add_argument(
+        "--frontend",
+        default=FRONTEND,
+        help="The frontend directory (default: ../frontend)",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Download libraries already vendored"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=30, help="Seconds per download (default: 30)"
+    )
+    args = parser.parse_args()
+
+    with open(os.path.join(args.frontend, "index.html"), encoding="utf-8") as f:
+        urls = cdn_urls(f.read())
+    vendor = os.path.join(args.frontend, "vendor")
+    os.makedirs(vendor, exist_ok=True)
+    failed = 0
+    for url in urls:
+        path = os.path.join(vendor, vendor_name(url))
+        if os.path.exists(path) and not args.force:
+            logger.info("%s: already vendored", vendor_name(url))
+            continue
+        try:
+            size = download(url, path, args.timeout)
+        except OSError as e:
+            logger.error("%s: %s", url, e)
+            failed += 1
+            continue
+        logger.info("%s: %d bytes", vendor_name(url), size)
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()